@@ -0,0 +1,83 @@
+##### API V1 FOR ADMIN PROFILING ENDPOINTS ####
+
+
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import PlainTextResponse
+from app.services.profiling import (
+    DEFAULT_SAMPLE_INTERVAL_MS,
+    MAX_PROFILE_SECONDS,
+    get_route_profiler,
+    get_sampling_profiler,
+)
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    '''
+    Admin endpoints only exist when ADMIN_TOKEN is set, and every
+      request must send it in the X-Admin-Token header.
+    '''
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix='/admin', dependencies=[Depends(_require_admin)])
+
+
+@router.get('/profiling')
+async def get_profiling_report():
+    '''
+    Endpoint for per-route latency percentiles, request counts,
+      dependency timings, process memory and profiler status
+    '''
+    return {
+        **get_route_profiler().report(),
+        'sampling_profiler': get_sampling_profiler().status(),
+    }
+
+
+@router.post('/profiling')
+async def set_profiling(enabled: bool):
+    '''
+    Endpoint turning latency recording on or off at runtime
+    '''
+    get_route_profiler().set_enabled(enabled)
+    return {'enabled': enabled}
+
+
+@router.post('/profiling/reset')
+async def reset_profiling():
+    get_route_profiler().reset()
+    return {'reset': True}
+
+
+@router.post('/profile')
+async def start_sampling_profile(seconds: float = 30, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS):
+    '''
+    Endpoint starting the sampling profiler for a time window of at
+      most MAX_PROFILE_SECONDS, fetch the result from GET /admin/profile
+    '''
+    if seconds <= 0 or seconds > MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=422, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+
+    profiler = get_sampling_profiler()
+    if not profiler.start(seconds, interval_ms):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return profiler.status()
+
+
+@router.get('/profile', response_class=PlainTextResponse)
+async def get_sampling_profile():
+    '''
+    Endpoint returning the sampled stacks in folded format, ready for
+      flamegraph.pl or speedscope (partial while still running)
+    '''
+    profiler = get_sampling_profiler()
+    if profiler.status()['started_at'] is None:
+        raise HTTPException(status_code=404, detail="No profile has been started")
+    return PlainTextResponse(profiler.folded())
@@ -0,0 +1,36 @@
+##### API V1 FOR PIPELINE AND SERVICE METRICS ####
+
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.services.metrics import get_metrics, load_run_report, to_prometheus
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    '''
+    Endpoint for Prometheus scrapes: stage timings and counters from
+      the last pipeline run plus this API process's own metrics
+    '''
+    text = to_prometheus(get_metrics().snapshot(), prefix='nba_api')
+
+    report = load_run_report()
+    if report is not None:
+        text += to_prometheus(report, prefix='nba_pipeline')
+
+    return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get('/pipeline/report')
+async def get_pipeline_report():
+    '''
+    Endpoint for GET requests on the JSON report of the last pipeline run
+    '''
+    report = load_run_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No pipeline run has been reported yet")
+    return report
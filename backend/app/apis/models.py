@@ -0,0 +1,17 @@
+##### API V1 FOR RATING MODEL ENDPOINTS ####
+
+
+from fastapi import APIRouter
+from app.ml.model_registry import get_model_registry
+
+router = APIRouter()
+
+
+@router.get('/models')
+async def get_models():
+    '''
+    Endpoint for GET requests on the registered rating models and
+      their parameters. Prediction and rating endpoints pick one
+      with ?model=name, the default model otherwise
+    '''
+    return get_model_registry().describe()
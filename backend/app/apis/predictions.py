@@ -1,17 +1,46 @@
 ##### API V1 FOR PREDICTION API ENDPOINTS ####
 
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from app.services.prediction_service import PredictionService, get_prediction_service
+import json
+from datetime import date, datetime
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional
+from app.services.prediction_service import AsOfOutOfRange, PredictionService, get_prediction_service
+from app.services.response_cache import cached_json_response
 
 router = APIRouter()
 
+MAX_BATCH_GAMES = 100_000
+BATCH_STREAM_CHUNK = 5_000 # games serialized per streamed chunk
+
+def _as_of_error(error: AsOfOutOfRange) -> HTTPException:
+    '''
+    Returns the HTTP error of an uncovered as-of date: 404 without
+      any timeline, 422 before its first game, with the covered range.
+    '''
+    status_code = 404 if error.covered is None else 422
+    return HTTPException(status_code=status_code, detail={'message': str(error), 'covered': error.covered})
+
+
 class PredictionRequest(BaseModel):
     home_team_id: int
     away_team_id: int
 
 
+class BatchPredictionRequest(BaseModel):
+    '''
+    Columnar batch of matchups, game i is home_team_ids[i] vs away_team_ids[i].
+    Plain lists keep validation cheap for tens of thousands of games.
+    '''
+    home_team_ids: list[int]
+    away_team_ids: list[int]
+    home_advantages: Optional[list[Annotated[float, Field(allow_inf_nan=False)]]] = None # per game home court override, finite only
+    decimals: int = 2
+
+
 
 @router.post('/prediction')
 async def predict_winner(
@@ -30,43 +59,150 @@ async def predict_winner(
         return prediction
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get('/prediction/as-of')
+async def predict_winner_as_of(
+    home_team_id: int,
+    away_team_id: int,
+    as_of: date,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    '''
+    Endpoint for GET requests on the prediction that would have
+      been made between two teams on the morning of a past date
+    '''
+    try:
+        # The first as-of query loads the timeline from disk, keep it off the event loop
+        return await run_in_threadpool(
+            prediction_service.make_prediction_as_of,
+            home_team_id,
+            away_team_id,
+            datetime.combine(as_of, datetime.min.time())
+        )
+    except AsOfOutOfRange as e:
+        raise _as_of_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _stream_batch_predictions(
+    home_ids: list[int],
+    away_ids: list[int],
+    home_probs: list[float],
+    away_probs: list[float],
+    generation: str
+):
+    '''
+    Yields the batch response as JSON text chunks, in request order.
+    '''
+    yield f'{{"generation":{json.dumps(generation)},"predictions":['
+    n = len(home_ids)
+    for start in range(0, n, BATCH_STREAM_CHUNK):
+        end = min(start + BATCH_STREAM_CHUNK, n)
+        rows = ','.join(
+            f'{{"home_team_id":{home_ids[i]},"away_team_id":{away_ids[i]},'
+            f'"home_win_probability":{home_probs[i]},"away_win_probability":{away_probs[i]}}}'
+            for i in range(start, end)
+        )
+        yield rows if start == 0 else ',' + rows
+    yield ']}'
+
+
+@router.post('/predictions/batch')
+async def predict_batch(
+    batch_request: BatchPredictionRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    '''
+    Endpoint scores a full slate of matchups in one vectorized pass
+      and streams the results back in request order
+    '''
+    n = len(batch_request.home_team_ids)
+    if len(batch_request.away_team_ids) != n:
+        raise HTTPException(status_code=422, detail="home_team_ids and away_team_ids must be the same length")
+    if batch_request.home_advantages is not None and len(batch_request.home_advantages) != n:
+        raise HTTPException(status_code=422, detail="home_advantages must match the number of games")
+    if n > MAX_BATCH_GAMES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_GAMES} games per batch")
+
+    home_probs, generation = prediction_service.predict_batch(
+        batch_request.home_team_ids,
+        batch_request.away_team_ids,
+        batch_request.home_advantages
+    )
+    away_probs = 1 - home_probs
+
+    return StreamingResponse(
+        _stream_batch_predictions(
+            batch_request.home_team_ids,
+            batch_request.away_team_ids,
+            home_probs.round(batch_request.decimals).tolist(),
+            away_probs.round(batch_request.decimals).tolist(),
+            generation
+        ),
+        media_type='application/json'
+    )
+
+
+@router.get('/predictions/matrix')
+async def get_prediction_matrix(
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    '''
+    Endpoint for GET requests on every home/away matchup probability,
+      so clients can fetch once instead of POSTing per matchup
+    '''
+    return prediction_service.get_prediction_matrix()
     
 
 @router.get('/teamnames')
 async def get_team_names(
+    request: Request,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
-    return {
-        'team_names': prediction_service.get_team_names(),
-    }
+    '''
+    Endpoint for GET requests on team names, answers 304 when the
+      client's ETag is current
+    '''
+    return cached_json_response(request, prediction_service.get_team_names_response())
     
 
 @router.get('/rating/{team_id}')
 async def get_team_rating(
     team_id: int,
+    request: Request,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     '''
     Endpoint for GET requests on a single team's rating
     '''
-    rating = round(prediction_service.get_team_rating(team_id=team_id), 0)
+    return cached_json_response(request, prediction_service.get_team_rating_response(team_id))
 
-    return {
-        'team_id': team_id,
-        'rating': rating
-    }
+
+@router.get('/ratings/as-of')
+async def get_team_ratings_as_of(
+    as_of: date,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    '''
+    Endpoint for GET requests on all team elo ratings entering a past date
+    '''
+    try:
+        return await run_in_threadpool(prediction_service.get_ratings_as_of, datetime.combine(as_of, datetime.min.time()))
+    except AsOfOutOfRange as e:
+        raise _as_of_error(e)
 
 
 @router.get('/ratings')
 async def get_team_ratings(
+    request: Request,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     '''
-    Endpoint for GET requests on getting all team elo ratings
+    Endpoint for GET requests on getting all team elo ratings,
+      pre-serialized once per ratings generation
     '''
-
-    all_team_ratings = prediction_service.get_all_ratings()
-
-    return all_team_ratings
+    return cached_json_response(request, prediction_service.get_ratings_response())
 
 
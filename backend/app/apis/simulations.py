@@ -0,0 +1,67 @@
+##### API V1 FOR SEASON SIMULATION ENDPOINTS ####
+
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Optional
+from app.services.prediction_service import PredictionService, get_prediction_service
+
+router = APIRouter()
+
+MAX_SIMULATIONS = 1_000_000
+MAX_SCHEDULE_GAMES = 1_230 # a full regular season
+
+
+class SeasonSimulationRequest(BaseModel):
+    '''
+    Remaining schedule as columns, game i is home_team_ids[i] vs
+      away_team_ids[i]. current_records maps team id to [wins, losses],
+      by default each team's record so far this season per the
+      rating timeline. Every team id must be a rated team.
+    '''
+    home_team_ids: list[int]
+    away_team_ids: list[int]
+    simulations: int = 10_000
+    seed: int = 0
+    update_ratings: bool = False # move ratings after every simulated game
+    current_records: Optional[dict[int, list[int]]] = None
+
+
+@router.post('/simulations/season')
+async def simulate_season(
+    simulation_request: SeasonSimulationRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    '''
+    Endpoint simulates the rest of the season and the playoffs many
+      times and returns projected win totals, seeding and title odds
+      per team, cached per ratings generation
+    '''
+    n = len(simulation_request.home_team_ids)
+    if len(simulation_request.away_team_ids) != n:
+        raise HTTPException(status_code=422, detail="home_team_ids and away_team_ids must be the same length")
+    if n > MAX_SCHEDULE_GAMES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SCHEDULE_GAMES} games per schedule")
+    if not 1 <= simulation_request.simulations <= MAX_SIMULATIONS:
+        raise HTTPException(status_code=422, detail=f"simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    records = None
+    if simulation_request.current_records is not None:
+        if any(len(record) != 2 for record in simulation_request.current_records.values()):
+            raise HTTPException(status_code=422, detail="current_records values must be [wins, losses]")
+        records = {team_id: tuple(record) for team_id, record in simulation_request.current_records.items()}
+
+    try:
+        # CPU bound, keep it off the event loop
+        return await run_in_threadpool(
+            prediction_service.simulate_season,
+            simulation_request.home_team_ids,
+            simulation_request.away_team_ids,
+            simulation_request.simulations,
+            simulation_request.seed,
+            simulation_request.update_ratings,
+            records
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -5,11 +5,100 @@
 # elo system up to date indefinitely.
 ##############################################
 
-from nba_api.stats.endpoints import leaguegamelog
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from services.update_service import UpdateService
 from ml.elo_system import EloSystem
+from background_tasks.season_fetcher import SeasonFetcher
+from services.metrics import get_metrics
+from typing import Dict
+
+
+DAILY_MAX_DAYS_BEHIND = 2 # last game yesterday or the day before: the daily fetch of yesterday covers it
+
+# matchup column suffix: nba api game log column, kept for both teams
+TEAM_LOG_COLUMNS = {
+    'team_id': 'TEAM_ID',
+    'team_name': 'TEAM_NAME',
+    'team_abbr': 'TEAM_ABBREVIATION',
+    'wl': 'WL',
+    'pts': 'PTS',
+    'fgm': 'FGM',
+    'fga': 'FGA',
+    'fg_pct': 'FG_PCT',
+    'fg3m': 'FG3M',
+    'fg3a': 'FG3A',
+    'fg3_pct': 'FG3_PCT',
+    'ftm': 'FTM',
+    'fta': 'FTA',
+    'ft_pct': 'FT_PCT',
+    'oreb': 'OREB',
+    'dreb': 'DREB',
+    'reb': 'REB',
+    'ast': 'AST',
+    'stl': 'STL',
+    'blk': 'BLK',
+    'tov': 'TOV',
+    'pf': 'PF',
+}
+
+
+def convert_to_matchups(game_log_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a pd dataframe with one row per game from nba api team
+      game logs (two rows per game), home and away side by side.
+
+    Works on whole columns: rows are paired per GAME_ID with a
+      groupby, and home/away is split on the MATCHUP '@' marker
+      in bulk, so cost grows linearly with the number of rows.
+      Games without exactly two team rows are dropped.
+    """
+    if game_log_df.empty:
+        return pd.DataFrame()
+
+    logs = game_log_df.reset_index(drop=True)
+    game_ids = logs['GAME_ID'].to_numpy()
+    by_game = logs.groupby('GAME_ID', sort=False)['GAME_ID']
+    paired = (by_game.transform('size') == 2).to_numpy()
+    row_in_game = by_game.cumcount().to_numpy()
+
+    # First rows come out in first-seen game order; line each game's second row up with them
+    first_rows = np.flatnonzero(paired & (row_in_game == 0))
+    if len(first_rows) == 0:
+        return pd.DataFrame()
+
+    second_mask = paired & (row_in_game == 1)
+    second_rows = (
+        pd.Series(np.flatnonzero(second_mask), index=game_ids[second_mask])
+        .reindex(game_ids[first_rows])
+        .to_numpy()
+    )
+
+    # The '@' side of a matchup ("BOS @ NYK") is the away team
+    first_is_away = logs['MATCHUP'].str.contains('@', regex=False).to_numpy()[first_rows]
+    home_rows = np.where(first_is_away, second_rows, first_rows)
+    away_rows = np.where(first_is_away, first_rows, second_rows)
+
+    home = logs.take(home_rows).reset_index(drop=True)
+    away = logs.take(away_rows).reset_index(drop=True)
+
+    matchups = {
+        # Game info
+        'game_id': home['GAME_ID'],
+        'game_date': home['GAME_DATE'],
+        'season_id': home['SEASON_ID'],
+    }
+    for side, team in (('home', home), ('away', away)):
+        for suffix, column in TEAM_LOG_COLUMNS.items():
+            matchups[f'{side}_{suffix}'] = team[column]
+
+    # Derived fields
+    matchups['home_win'] = (home['WL'] == 'W').astype(int)
+    matchups['away_win'] = (away['WL'] == 'W').astype(int)
+    matchups['point_differential'] = home['PTS'] - away['PTS']
+
+    return pd.DataFrame(matchups)
 
 
 class NBADataPipeline:
@@ -17,9 +106,10 @@ class NBADataPipeline:
     NBADataPipeline class handles async methods for 
       updating database daily with new NBA game data.
     '''
-    def __init__(self, update_service):
+    def __init__(self, update_service, fetcher: SeasonFetcher = None):
         self.mode = "catchup" # state for either batch process or daily
         self._update_service: UpdateService = update_service
+        self._fetcher: SeasonFetcher = fetcher or SeasonFetcher()
         self._elo_sys: EloSystem = EloSystem()
         self._elo_sys._load_ratings()
         self.last_update: str = datetime.isoformat(self._elo_sys.last_game_date) # last updated time from db
@@ -28,7 +118,23 @@ class NBADataPipeline:
         self.mode = "daily"
 
     def toggle_mode_catchup(self):
-        self._mode = "catchup"
+        self.mode = "catchup"
+
+    def select_mode(self, now: datetime = None) -> str:
+        '''
+        Returns the mode after picking it from the gap since the last
+          recorded game: daily while only yesterday can be missing,
+          catch-up when more days were missed, so they are all
+          fetched in one run instead of being dropped.
+        '''
+        now = now or datetime.now()
+        days_behind = (now.date() - datetime.fromisoformat(self.last_update).date()).days
+
+        if days_behind <= DAILY_MAX_DAYS_BEHIND:
+            self.toggle_mode_daily()
+        else:
+            self.toggle_mode_catchup()
+        return self.mode
     
     def _szn_for_date(self, date: datetime):
         year = date.year
@@ -56,88 +162,7 @@ class NBADataPipeline:
         
         Must be called inside self.fetch_games_since for data consistency.
         """
-        if game_log_df.empty:
-            return pd.DataFrame()
-        
-        matchups = []
-        
-        # Process each unique game
-        for game_id in game_log_df['GAME_ID'].unique():
-            game_data: pd.DataFrame = game_log_df[game_log_df['GAME_ID'] == game_id]
-            
-            if len(game_data) != 2:
-                continue
-            
-            teams = game_data.to_dict('records')
-            
-            if '@' in teams[0]['MATCHUP']:
-                away_team, home_team = teams[0], teams[1]
-            else:
-                home_team, away_team = teams[0], teams[1]
-            
-            matchup = {
-                # Game info
-                'game_id': game_id,
-                'game_date': home_team['GAME_DATE'],
-                'season_id': home_team['SEASON_ID'],
-                
-                # Home team
-                'home_team_id': home_team['TEAM_ID'],
-                'home_team_name': home_team['TEAM_NAME'],
-                'home_team_abbr': home_team['TEAM_ABBREVIATION'],
-                'home_wl': home_team['WL'],
-                'home_pts': home_team['PTS'],
-                'home_fgm': home_team['FGM'],
-                'home_fga': home_team['FGA'],
-                'home_fg_pct': home_team['FG_PCT'],
-                'home_fg3m': home_team['FG3M'],
-                'home_fg3a': home_team['FG3A'],
-                'home_fg3_pct': home_team['FG3_PCT'],
-                'home_ftm': home_team['FTM'],
-                'home_fta': home_team['FTA'],
-                'home_ft_pct': home_team['FT_PCT'],
-                'home_oreb': home_team['OREB'],
-                'home_dreb': home_team['DREB'],
-                'home_reb': home_team['REB'],
-                'home_ast': home_team['AST'],
-                'home_stl': home_team['STL'],
-                'home_blk': home_team['BLK'],
-                'home_tov': home_team['TOV'],
-                'home_pf': home_team['PF'],
-                
-                # Away team
-                'away_team_id': away_team['TEAM_ID'],
-                'away_team_name': away_team['TEAM_NAME'],
-                'away_team_abbr': away_team['TEAM_ABBREVIATION'],
-                'away_wl': away_team['WL'],
-                'away_pts': away_team['PTS'],
-                'away_fgm': away_team['FGM'],
-                'away_fga': away_team['FGA'],
-                'away_fg_pct': away_team['FG_PCT'],
-                'away_fg3m': away_team['FG3M'],
-                'away_fg3a': away_team['FG3A'],
-                'away_fg3_pct': away_team['FG3_PCT'],
-                'away_ftm': away_team['FTM'],
-                'away_fta': away_team['FTA'],
-                'away_ft_pct': away_team['FT_PCT'],
-                'away_oreb': away_team['OREB'],
-                'away_dreb': away_team['DREB'],
-                'away_reb': away_team['REB'],
-                'away_ast': away_team['AST'],
-                'away_stl': away_team['STL'],
-                'away_blk': away_team['BLK'],
-                'away_tov': away_team['TOV'],
-                'away_pf': away_team['PF'],
-                
-                # Derived fields
-                'home_win': 1 if home_team['WL'] == 'W' else 0,
-                'away_win': 1 if away_team['WL'] == 'W' else 0,
-                'point_differential': home_team['PTS'] - away_team['PTS'],
-            }
-            
-            matchups.append(matchup)
-        
-        return pd.DataFrame(matchups)
+        return convert_to_matchups(game_log_df)
     
     def fetch_games_since(
             self, 
@@ -168,28 +193,15 @@ class NBADataPipeline:
             except Exception as e:
                 print(f"Error fetching seasons {seasons}: {e}")
 
-        all_games = []
-    
-        for season in seasons:
-            try:
-                log = leaguegamelog.LeagueGameLog(
-                    season=season,
-                    season_type_all_star=season_type,
-                    player_or_team_abbreviation='T',
-                    date_from_nullable=date_from,
-                    date_to_nullable=date_to,
-                    sorter='DATE',
-                    direction='ASC'
-                )
-                
-                df: pd.DataFrame = log.get_data_frames()[0]
-                
-                if not df.empty:
-                    all_games.append(df)
-                
-            except Exception as e:
-                print(f"Error fetching season {season}: {e}")
-                continue
+        metrics = get_metrics()
+        with metrics.stage('fetch') as timer:
+            all_games = self._fetcher.fetch_seasons(
+                seasons,
+                season_type=season_type,
+                date_from=date_from,
+                date_to=date_to
+            )
+            timer.add_items(sum(len(df) for df in all_games))
 
         if not all_games:
             return pd.DataFrame()
@@ -199,42 +211,99 @@ class NBADataPipeline:
         games["GAME_DATE"] = pd.to_datetime(games["GAME_DATE"])
         games = games[games["GAME_DATE"] > last_dt] # in case not sorted
 
-        games_unique = self._convert_to_matchups(games)
-        
+        with metrics.stage('convert_to_matchups', items=len(games)):
+            games_unique = self._convert_to_matchups(games)
+
+        metrics.count('games_fetched', len(games_unique))
         return games_unique
     
 
     def fetch_and_update_games(
         self,
-    ) -> None:
+    ) -> bool:
+        '''
+        Returns False if a season failed to fetch or rating the new
+          games failed, True otherwise (including when there was
+          nothing new).
+        '''
         last_date_iso: str = self.last_update
         new_games = self.fetch_games_since(last_date_iso)
 
+        # Rating past a season that failed to fetch would skip its games for good
+        if self._fetcher.failed_seasons:
+            print(f"Not updating ratings, failed to fetch {', '.join(self._fetcher.failed_seasons)}")
+            return False
+
         if new_games is None or new_games.empty:
-            return
+            return True
         
-        self._update_service.update_team_ratings(new_games)
-        return None
+        updated = self._update_service.update_team_ratings(new_games)
+
+        # The pipeline may live on in the API's scheduler, start the next run from here
+        last_game_date = self._update_service.Elo.last_game_date
+        if updated and last_game_date is not None:
+            self.last_update = datetime.isoformat(last_game_date)
+        return updated
+
+
+
 
+def update_once(fetcher: SeasonFetcher = None) -> Dict:
+    """
+    Returns a summary of one full update: load the latest ratings,
+      pick the mode, fetch and rate the new games, then write the
+      run report.
 
+    The caller must hold the store's writer lock, see run_update.
+    """
+    metrics = get_metrics()
+    metrics.reset() # one report per run, even in a long lived process
+
+    # Loaded under the lock, so nothing written since is overwritten
+    update_service = UpdateService()
+    pipeline = NBADataPipeline(update_service, fetcher)
+    mode = pipeline.select_mode()
+
+    with metrics.stage('pipeline_run'):
+        updated = pipeline.fetch_and_update_games()
+
+    last_game_date = update_service.Elo.last_game_date.isoformat()
+    if metrics.enabled:
+        metrics.write_report(mode=mode, last_game_date=last_game_date)
+
+    return {'status': 'updated' if updated else 'failed', 'mode': mode, 'last_game_date': last_game_date}
+
+
+def run_update(fetcher: SeasonFetcher = None, blocking: bool = False) -> Dict:
+    """
+    Returns the summary of update_once run under the store's writer
+      lock. Without blocking the run is skipped when another process
+      (a cron job, an API worker's scheduler) holds the lock.
+    """
+    lock = EloSystem()._store.writer_lock()
+    if not lock.acquire(blocking=blocking):
+        return {'status': 'skipped', 'reason': 'another process is updating the ratings'}
+
+    try:
+        return update_once(fetcher)
+    finally:
+        lock.release()
 
 
 
 if __name__ == "__main__":
+    import argparse
+    import json
     import sys
     from pathlib import Path
     
     # Add parent directory to path
     sys.path.insert(0, str(Path(__file__).parent.parent))
-    
-    from services.update_service import get_update_service
-    
-    # Get update service instance
-    update_service = get_update_service()
-
-    pipeline = NBADataPipeline(update_service)
-    pipeline.toggle_mode_daily()
-    result = pipeline.fetch_and_update_games()
-    
 
+    parser = argparse.ArgumentParser(description="Fetch and rate the games played since the last update")
+    parser.add_argument('--lock-held', action='store_true', help="the calling process already holds the store's writer lock, see UpdateScheduler")
+    args = parser.parse_args()
 
+    # Wait for a run already in progress rather than skipping
+    summary = update_once() if args.lock_held else run_update(blocking=True)
+    print(json.dumps(summary)) # last line of output, read back by the API's scheduler
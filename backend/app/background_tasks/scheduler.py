@@ -0,0 +1,170 @@
+#### IN-PROCESS SCHEDULER FOR THE DAILY RATING UPDATE ####
+
+## imports
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Dict
+
+from app.ml.elo_system import RUNTIME_DIR, EloSystem
+
+
+SCHEDULER_ENABLED = os.getenv('UPDATE_SCHEDULER', '0') == '1'
+UPDATE_RUN_AT = os.getenv('UPDATE_RUN_AT', '10:00') # local time the update is due, once last night's games are final
+CHECK_SECONDS = float(os.getenv('UPDATE_CHECK_SECONDS', '600')) # how often a due or failed run is checked for
+STATE_PATH = RUNTIME_DIR / "update_state.json" # machine-local, shared by every worker on the host
+PIPELINE_ROOT = Path(__file__).parent.parent # backend/app, the root the pipeline modules import from
+
+
+class UpdateScheduler:
+    '''
+    Class UpdateScheduler runs the rating update inside the API
+      process once a day at UPDATE_RUN_AT, on a worker thread so
+      the event loop keeps serving.
+
+    A run is due while the last successful one is older than the
+      latest scheduled time, so any number of runs missed while no
+      worker was up coalesce into one, which catch-up mode fills.
+      The state file is shared and checked again under the store's
+      writer lock, so with several workers only one of them runs.
+
+    The pipeline runs in a child process started from the app folder
+      root, the way cron runs it, so its app-root imports never load
+      a second copy of the API's modules. Its stages and counters
+      reach /apis/metrics through the run report it writes.
+    '''
+    def __init__(self, run_at: str = UPDATE_RUN_AT, check_seconds: float = CHECK_SECONDS, state_path: Path = STATE_PATH):
+        hour, minute = (int(part) for part in run_at.split(':'))
+        self.run_at = time(hour, minute)
+        self.check_seconds = check_seconds
+        self.state_path = Path(state_path)
+        self._stop = None
+        self._task = None
+
+    def load_state(self) -> Dict:
+        """
+        Returns the last run's summary plus its last_attempt and
+          last_success times, or {} before the first run.
+        """
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except ValueError as e:
+            print(f"Error reading scheduler state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self, state: Dict) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+        return None
+
+    def last_scheduled(self, now: datetime) -> datetime:
+        slot = datetime.combine(now.date(), self.run_at)
+        return slot if now >= slot else slot - timedelta(days=1)
+
+    def is_due(self, now: datetime = None) -> bool:
+        last_success = self.load_state().get('last_success')
+        if last_success is None:
+            return True
+        return datetime.fromisoformat(last_success) < self.last_scheduled(now or datetime.now())
+
+    def _run_pipeline(self) -> Dict:
+        """
+        Returns the summary the pipeline prints as its last line of
+          output, run in a child process while this one holds the
+          store's writer lock.
+        """
+        result = subprocess.run(
+            [sys.executable, '-m', 'background_tasks.pipeline', '--lock-held'],
+            cwd=PIPELINE_ROOT,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            print(result.stdout + result.stderr, end='')
+            reason = result.stderr.strip().splitlines()[-1:] or [f"pipeline exited with code {result.returncode}"]
+            raise RuntimeError(reason[0])
+
+        lines = result.stdout.splitlines()
+        print('\n'.join(lines[:-1])) # the run's progress, as cron would log it
+        return json.loads(lines[-1])
+
+    def run_now(self) -> Dict:
+        """
+        Returns the summary of one update if it is still due once the
+          store's writer lock is held, blocking, so call it off the
+          event loop.
+        """
+        lock = EloSystem()._store.writer_lock()
+        if not lock.acquire(blocking=False):
+            return {'status': 'skipped', 'reason': 'another process is updating the ratings'}
+
+        try:
+            if not self.is_due():
+                return {'status': 'skipped', 'reason': 'already ran since the last scheduled time'}
+
+            started = datetime.now().isoformat()
+            try:
+                summary = self._run_pipeline()
+            except Exception as e:
+                print(f"Error in scheduled rating update: {e}")
+                summary = {'status': 'failed', 'reason': str(e)}
+
+            state = self.load_state()
+            state.pop('reason', None) # only the latest failure's reason is kept
+            state.update(summary, last_attempt=started)
+            if summary['status'] == 'updated':
+                state['last_success'] = started
+            self._save_state(state)
+        finally:
+            lock.release()
+
+        if summary['status'] == 'updated':
+            from app.services.prediction_service import reload_prediction_services
+            reload_prediction_services() # serve the new ratings without waiting for the watchers
+        return summary
+
+    async def _loop(self) -> None:
+        while not self._stop.is_set():
+            if self.is_due():
+                summary = await asyncio.to_thread(self.run_now)
+                print(f"Scheduled rating update: {summary}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.check_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """
+        Returns None once the loop has ended, letting a run in
+          progress finish so the lock is released cleanly.
+        """
+        if self._task is None:
+            return None
+        self._stop.set()
+        await self._task
+        self._task = None
+        return None
+
+
+
+_singleton_update_scheduler = None
+def get_update_scheduler() -> UpdateScheduler:
+    global _singleton_update_scheduler
+
+    if (_singleton_update_scheduler == None):
+        _singleton_update_scheduler = UpdateScheduler()
+    return _singleton_update_scheduler
@@ -0,0 +1,209 @@
+##############################################
+# Fetch layer for season game logs used by the pipeline.
+# Seasons are requested concurrently with bounded
+# parallelism and retry/backoff, and seasons that are
+# already over are cached on disk so they are only
+# downloaded once.
+##############################################
+
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from services.metrics import get_metrics
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / ".cache" / "seasons" # backend/.cache/seasons
+NBA_API_DATE_FORMAT = '%m/%d/%Y'
+
+
+def season_is_complete(season: str, now: datetime = None) -> bool:
+    '''
+    Returns True once a season ("2023-24") can no longer change,
+      i.e. the next season's October has started.
+    '''
+    now = now or datetime.now()
+    end_year = int(season[:4]) + 1
+    return now >= datetime(end_year, 10, 1)
+
+
+def _filter_dates(df: pd.DataFrame, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+    if df.empty or (date_from is None and date_to is None):
+        return df
+
+    game_dates = pd.to_datetime(df['GAME_DATE'])
+    keep = pd.Series(True, index=df.index)
+    if date_from:
+        keep &= game_dates >= datetime.strptime(date_from, NBA_API_DATE_FORMAT)
+    if date_to:
+        keep &= game_dates <= datetime.strptime(date_to, NBA_API_DATE_FORMAT)
+
+    return df[keep].reset_index(drop=True)
+
+
+def _cache_key(season: str, season_type: str) -> str:
+    return f"{season}__{season_type.replace(' ', '_')}"
+
+
+class NBAApiSource:
+    '''
+    Season source backed by the live nba_api LeagueGameLog endpoint.
+    '''
+    def fetch(self, season: str, season_type: str, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+        from nba_api.stats.endpoints import leaguegamelog
+
+        log = leaguegamelog.LeagueGameLog(
+            season=season,
+            season_type_all_star=season_type,
+            player_or_team_abbreviation='T',
+            date_from_nullable=date_from or '',
+            date_to_nullable=date_to or '',
+            sorter='DATE',
+            direction='ASC'
+        )
+        return log.get_data_frames()[0]
+
+
+class LocalSource:
+    '''
+    Offline season source reading a directory of CSV game logs or
+      recorded nba_api JSON responses, named like
+      "2023-24__Regular_Season.csv" / "2023-24__Regular_Season.json".
+
+    latency_seconds simulates network time for benchmarks.
+    '''
+    def __init__(self, directory: Path, latency_seconds: float = 0.0):
+        self.directory = Path(directory)
+        self.latency_seconds = latency_seconds
+
+    def fetch(self, season: str, season_type: str, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        stem = _cache_key(season, season_type)
+        csv_path = self.directory / f"{stem}.csv"
+        json_path = self.directory / f"{stem}.json"
+
+        if csv_path.exists():
+            df = pd.read_csv(csv_path, dtype={'GAME_ID': str, 'SEASON_ID': str})
+        elif json_path.exists():
+            with open(json_path, 'r') as f:
+                result_set = json.load(f)['resultSets'][0]
+            df = pd.DataFrame(result_set['rowSet'], columns=result_set['headers'])
+        else:
+            return pd.DataFrame()
+
+        return _filter_dates(df, date_from, date_to)
+
+
+class SeasonFetcher:
+    '''
+    SeasonFetcher requests several seasons at once from a source,
+      retrying failures with exponential backoff, and keeps
+      completed seasons in an on-disk cache keyed by season and
+      season type.
+    '''
+    def __init__(
+        self,
+        source=None,
+        cache_dir: Path = None,
+        max_workers: int = 3,
+        retries: int = 3,
+        backoff_seconds: float = 1.0,
+        use_cache: bool = True
+    ):
+        self.source = source or NBAApiSource()
+        self.cache_dir = Path(cache_dir or os.getenv('SEASON_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.failed_seasons: list[str] = [] # seasons the last fetch_seasons call gave up on
+        self.use_cache = use_cache
+
+    def _cache_path(self, season: str, season_type: str) -> Path:
+        return self.cache_dir / f"{_cache_key(season, season_type)}.pkl"
+
+    def _read_cache(self, season: str, season_type: str):
+        path = self._cache_path(season, season_type)
+        if not path.exists():
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"Ignoring unreadable cache {path}: {e}")
+            return None
+
+    def _write_cache(self, season: str, season_type: str, df: pd.DataFrame) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._cache_path(season, season_type)
+        tmp_path = path.with_name(path.name + '.tmp')
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        return None
+
+    def _fetch_with_retry(self, season: str, season_type: str, date_from: str, date_to: str) -> pd.DataFrame:
+        for attempt in range(self.retries + 1):
+            try:
+                return self.source.fetch(season, season_type, date_from, date_to)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                get_metrics().count('fetch_retries')
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+                print(f"Error fetching season {season} (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def fetch_season(self, season: str, season_type: str, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+        """
+        Returns one season's team game logs between date_from and
+          date_to (mm/dd/YYYY), served from the cache when the
+          season is complete.
+        """
+        if not self.use_cache or not season_is_complete(season):
+            return self._fetch_with_retry(season, season_type, date_from, date_to)
+
+        full_season = self._read_cache(season, season_type)
+        if full_season is None:
+            get_metrics().count('season_cache_misses')
+            full_season = self._fetch_with_retry(season, season_type, None, None)
+            if not full_season.empty:
+                self._write_cache(season, season_type, full_season)
+        else:
+            get_metrics().count('season_cache_hits')
+
+        return _filter_dates(full_season, date_from, date_to)
+
+    def fetch_seasons(
+        self,
+        seasons: list[str],
+        season_type: str = "Regular Season",
+        date_from: str = None,
+        date_to: str = None
+    ) -> list[pd.DataFrame]:
+        """
+        Returns the non-empty game logs of every season, in the
+          order given. Seasons that still fail after all retries
+          are reported, skipped and listed in failed_seasons.
+        """
+        self.failed_seasons = []
+
+        def fetch_one(season: str):
+            try:
+                return self.fetch_season(season, season_type, date_from, date_to)
+            except Exception as e:
+                print(f"Error fetching season {season}: {e}")
+                get_metrics().count('season_fetch_failures')
+                self.failed_seasons.append(season)
+                return None
+
+        workers = max(1, min(self.max_workers, len(seasons)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch_one, seasons))
+
+        return [df for df in results if df is not None and not df.empty]
@@ -1,11 +1,51 @@
 #### MAIN ENTRY POINT OF THE APP ####
 
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter() # start of the startup_import stage
+
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from app.apis import predictions
+from app.apis import predictions, metrics, admin, simulations, models
+from app.background_tasks.scheduler import SCHEDULER_ENABLED, get_update_scheduler
+from app.services.metrics import get_metrics
+from app.services.prediction_service import get_prediction_service, get_simulation_pool, shutdown_simulation_pool
+from app.services.profiling import ProfilingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''
+    Loads the ratings and builds the prediction tables before the
+      first request is accepted, so no request pays for them.
+      API_WARMUP=0 leaves it to the first request.
+
+    With UPDATE_SCHEDULER=1 the daily rating update also runs in
+      this process, see UpdateScheduler.
+
+    The season simulation pool is created here, before requests
+      arrive, and shut down with the app.
+    '''
+    if os.getenv('API_WARMUP', '1') != '0':
+        with get_metrics().stage('startup_warmup'):
+            get_prediction_service()
+
+    get_simulation_pool()
+
+    scheduler = get_update_scheduler() if SCHEDULER_ENABLED else None
+    if scheduler is not None:
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        await scheduler.stop()
+    shutdown_simulation_pool()
 
 
 app = FastAPI(
@@ -13,7 +53,8 @@ app = FastAPI(
     description="ELO-based NBA game predictions with real-time ratings",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 load_dotenv()
@@ -29,6 +70,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+## Per-route latency recording, off unless API_PROFILING=1 or enabled on /apis/admin/profiling
+app.add_middleware(ProfilingMiddleware)
+
+
+def _finite_json(value):
+    '''
+    Returns value with non-finite floats (NaN, Infinity) as strings,
+      which json can't encode.
+    '''
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _finite_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_json(item) for item in value]
+    return value
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    '''
+    Same 422 body as FastAPI's default, but a rejected NaN or
+      Infinity input is echoed back as a string instead of breaking
+      the response.
+    '''
+    return JSONResponse(status_code=422, content={'detail': _finite_json(jsonable_encoder(exc.errors()))})
+
 
 @app.get("/")
 def read_root():
@@ -37,4 +105,12 @@ def read_root():
 
 
 ## Handle api endpoints ftom other files
-app.include_router(predictions.router, prefix="/apis", tags=["predictions"])
\ No newline at end of file
+app.include_router(predictions.router, prefix="/apis", tags=["predictions"])
+app.include_router(metrics.router, prefix="/apis", tags=["metrics"])
+app.include_router(admin.router, prefix="/apis", tags=["admin"])
+app.include_router(simulations.router, prefix="/apis", tags=["simulations"])
+app.include_router(models.router, prefix="/apis", tags=["models"])
+
+
+## Time spent importing and wiring the app, exported on /apis/metrics
+get_metrics().record_stage('startup_import', time.perf_counter() - _import_started)
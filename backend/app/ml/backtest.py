@@ -0,0 +1,186 @@
+#### WALK-FORWARD BACKTEST OF THE ELO MODEL ####
+
+## imports
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from .elo_replay import EloReplayEngine
+from .elo_sweep import PROBABILITY_EPSILON
+
+
+SEASON_ID_TO_YEAR_FACTOR = 10000
+BACKTEST_CHUNK_GAMES = 4096 # games replayed and scored per step
+RELIABILITY_BUCKETS = 10 # equal width buckets of predicted home win probability
+
+
+class SeasonScores:
+    '''
+    Class SeasonScores keeps running sums of the prediction metrics
+      for one season, so games can be scored as they stream past
+      without keeping any of them.
+    '''
+    def __init__(self, buckets: int = RELIABILITY_BUCKETS):
+        self.games = 0
+        self.log_loss_sum = 0.0
+        self.brier_sum = 0.0
+        self.correct = 0
+        self.bucket_games = np.zeros(buckets, dtype=np.int64)
+        self.bucket_prob_sum = np.zeros(buckets, dtype=np.float64)
+        self.bucket_home_wins = np.zeros(buckets, dtype=np.int64)
+
+    def add(self, home_win_prob: np.ndarray, home_won: np.ndarray) -> None:
+        prob = np.clip(home_win_prob, PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+        outcome = home_won.astype(np.float64)
+        buckets = len(self.bucket_games)
+
+        self.games += len(prob)
+        self.log_loss_sum += float(-np.sum(outcome * np.log(prob) + (1 - outcome) * np.log(1 - prob)))
+        self.brier_sum += float(np.sum((prob - outcome) ** 2))
+        self.correct += int(np.sum((prob > 0.5) == home_won))
+
+        bucket = np.minimum((home_win_prob * buckets).astype(np.int64), buckets - 1)
+        self.bucket_games += np.bincount(bucket, minlength=buckets)
+        self.bucket_prob_sum += np.bincount(bucket, weights=home_win_prob, minlength=buckets)
+        self.bucket_home_wins += np.bincount(bucket, weights=outcome, minlength=buckets).astype(np.int64)
+
+    def merge(self, other: 'SeasonScores') -> None:
+        self.games += other.games
+        self.log_loss_sum += other.log_loss_sum
+        self.brier_sum += other.brier_sum
+        self.correct += other.correct
+        self.bucket_games += other.bucket_games
+        self.bucket_prob_sum += other.bucket_prob_sum
+        self.bucket_home_wins += other.bucket_home_wins
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Returns log-loss, Brier score, accuracy and the expected
+          calibration error, the game-weighted gap between the
+          predicted and observed home win rate of each bucket.
+        """
+        if self.games == 0:
+            return {'log_loss': float('nan'), 'brier': float('nan'), 'accuracy': float('nan'), 'calibration_error': float('nan'), 'games': 0}
+
+        filled = self.bucket_games > 0
+        gaps = np.abs(self.bucket_prob_sum[filled] - self.bucket_home_wins[filled])
+
+        return {
+            'log_loss': self.log_loss_sum / self.games,
+            'brier': self.brier_sum / self.games,
+            'accuracy': self.correct / self.games,
+            'calibration_error': float(gaps.sum() / self.games),
+            'games': self.games,
+        }
+
+    def reliability(self) -> list[Dict]:
+        """
+        Returns one reliability curve point per bucket: the mean
+          predicted home win probability and the observed rate.
+        """
+        buckets = len(self.bucket_games)
+        points = []
+        for i in range(buckets):
+            games = int(self.bucket_games[i])
+            points.append({
+                'bucket_low': i / buckets,
+                'bucket_high': (i + 1) / buckets,
+                'games': games,
+                'mean_predicted': float(self.bucket_prob_sum[i] / games) if games else float('nan'),
+                'observed_home_win_rate': float(self.bucket_home_wins[i] / games) if games else float('nan'),
+            })
+        return points
+
+
+class EloBacktest:
+    '''
+    Class EloBacktest replays games in date order and scores each
+      game's pre-game home win probability before the ratings are
+      updated with its result, the same number EloSystem.predict
+      would have returned that morning.
+
+    Everything runs in one streaming pass over fixed-size chunks,
+      holding only the team ratings and per-season running sums.
+    '''
+    def __init__(
+        self,
+        k_factor: int = 20,
+        base_elo: int = 1300,
+        home_advantage: int = 100,
+        score_from_year: int = None,
+        buckets: int = RELIABILITY_BUCKETS
+    ):
+        self.engine = EloReplayEngine(k_factor=k_factor, base_elo=base_elo, home_advantage=home_advantage, keep_output=False)
+        self.score_from_year = score_from_year # earlier seasons only warm the ratings up
+        self.buckets = buckets
+        self.seasons: Dict[int, SeasonScores] = {}
+
+    def add_games(self, season_ids, home_ids, away_ids, home_scores, away_scores) -> None:
+        """
+        Returns None after replaying and scoring one chronological
+          batch of games, continuing from earlier batches.
+        """
+        home_scores = np.asarray(home_scores)
+        away_scores = np.asarray(away_scores)
+        if len(home_scores) == 0:
+            return None
+
+        self.engine.replay(home_ids, away_ids, home_scores, away_scores)
+
+        prob = self.engine.batch_pregame_home_prob
+        home_won = (home_scores.astype(np.float64) - away_scores.astype(np.float64)) > 0
+        years = np.asarray(season_ids).astype(np.int64) % SEASON_ID_TO_YEAR_FACTOR
+
+        for year in np.unique(years):
+            if self.score_from_year is not None and year < self.score_from_year:
+                continue
+            in_season = years == year
+            scores = self.seasons.setdefault(int(year), SeasonScores(self.buckets))
+            scores.add(prob[in_season], home_won[in_season])
+
+        return None
+
+    def run(self, columns: Dict[str, np.ndarray], chunk_games: int = BACKTEST_CHUNK_GAMES) -> 'EloBacktest':
+        """
+        Returns self after streaming every game in `columns`, the
+          date-sorted arrays from NBADataProcessor.get_modern_game_columns
+          (or a DataFrame with the same columns).
+        """
+        n = len(columns['season_id'])
+        for start in range(0, n, chunk_games):
+            end = start + chunk_games
+            self.add_games(
+                columns['season_id'][start:end],
+                columns['team_id_home'][start:end],
+                columns['team_id_away'][start:end],
+                columns['pts_home'][start:end],
+                columns['pts_away'][start:end],
+            )
+        return self
+
+    def overall(self) -> SeasonScores:
+        total = SeasonScores(self.buckets)
+        for scores in self.seasons.values():
+            total.merge(scores)
+        return total
+
+    def season_report(self) -> pd.DataFrame:
+        """
+        Returns one row of metrics per scored season plus an
+          'all' row over every scored game.
+        """
+        rows = [{'season': str(year), **self.seasons[year].metrics()} for year in sorted(self.seasons)]
+        rows.append({'season': 'all', **self.overall().metrics()})
+        return pd.DataFrame(rows)
+
+    def reliability_report(self) -> pd.DataFrame:
+        """
+        Returns the reliability curve of every scored season and of
+          all seasons together, one row per (season, bucket).
+        """
+        rows = []
+        seasons = [(str(year), self.seasons[year]) for year in sorted(self.seasons)]
+        for season, scores in seasons + [('all', self.overall())]:
+            rows.extend({'season': season, **point} for point in scores.reliability())
+        return pd.DataFrame(rows)
@@ -1,18 +1,34 @@
 #### Logic for data cleaning and pre-processing ####
 
 import pandas as pd
-from sklearn.impute import SimpleImputer
+
+# Columns the elo replay needs from the historical game.csv
+ELO_COLUMNS = ['season_id', 'game_date', 'team_id_home', 'team_id_away', 'pts_home', 'pts_away', 'wl_home', 'wl_away']
+
+# Score columns the elo update reads, in both the csv and the pipeline matchup naming.
+# Only these are mean-imputed; team ids are never guessed.
+IMPUTED_COLUMNS = ['pts_home', 'pts_away', 'home_pts', 'away_pts']
+TEAM_ID_COLUMNS = ['team_id_home', 'team_id_away', 'home_team_id', 'away_team_id']
+
+DEFAULT_CHUNK_ROWS = 100_000
 
 class NBADataProcessor:
     '''
     Class containing all logic and methods for cleaning
      and pre-processing raw csv data.
     '''
-    def __init__(self, data_path: str = "../../data/raw/game.csv"):
+    def __init__(self, data_path: str = "../../data/raw/game.csv", chunk_rows: int = DEFAULT_CHUNK_ROWS):
         self.data_path = data_path
-        self.imputer = SimpleImputer(strategy='mean')
+        self.chunk_rows = chunk_rows
+
+    def clean_data(self, df: pd.DataFrame, column_means: dict = None) -> pd.DataFrame:
+        '''
+        Returns df with parsed dates, home/away win targets and
+          missing scores filled with the column mean.
 
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        column_means overrides the per-batch means, so chunks of
+          one file can all be filled with the whole file's means.
+        '''
         if df.empty:
             return df
 
@@ -22,24 +38,66 @@ class NBADataProcessor:
         df['game_date'] = pd.to_datetime(df['game_date'])
 
         # Target columns
-        if ('home_win') not in df.columns:
-            df['home_win'] = df['wl_home'].apply(lambda x: 1 if x == 'W' else 0)
-        if ('away_win') not in df.columns:
-            df['away_win'] = df['wl_away'].apply(lambda x: 1 if x == 'W' else 0)
-
-        df_numeric = df.select_dtypes(include=['number'])
-        df[df_numeric.columns] = self.imputer.fit_transform(df_numeric)
+        if ('home_win') not in df.columns and 'wl_home' in df.columns:
+            df['home_win'] = (df['wl_home'] == 'W').astype(int)
+        if ('away_win') not in df.columns and 'wl_away' in df.columns:
+            df['away_win'] = (df['wl_away'] == 'W').astype(int)
+
+        # Rows without both teams can't be rated
+        id_columns = [col for col in TEAM_ID_COLUMNS if col in df.columns]
+        if id_columns and df[id_columns].isna().any(axis=None):
+            df.dropna(subset=id_columns, inplace=True)
+
+        for col in IMPUTED_COLUMNS:
+            if col not in df.columns or not df[col].isna().any():
+                continue
+            mean = column_means[col] if column_means and col in column_means else df[col].mean()
+            df[col] = df[col].fillna(mean)
 
         return df
 
 
-    def load_and_clean_data(self) -> pd.DataFrame:
-        df = pd.read_csv(self.data_path)
+    def _column_means(self, columns: list[str]) -> dict:
+        '''
+        Returns the mean of each imputed column over the whole csv,
+          reading only those columns, one chunk at a time.
+        '''
+        header = pd.read_csv(self.data_path, nrows=0).columns
+        imputed = [col for col in IMPUTED_COLUMNS if col in header and (columns is None or col in columns)]
+        if not imputed:
+            return {}
+
+        sums = pd.Series(0.0, index=imputed)
+        counts = pd.Series(0, index=imputed)
+        for chunk in pd.read_csv(self.data_path, usecols=imputed, chunksize=self.chunk_rows):
+            sums += chunk.sum()
+            counts += chunk.count()
+
+        return (sums / counts).to_dict()
+
+
+    def iter_clean_chunks(self, columns: list[str] = None):
+        '''
+        Yields cleaned chunks of the csv of at most chunk_rows rows,
+          so the raw file never has to sit in memory at once.
+
+        Missing scores are filled with whole-file means, found by a
+          cheap first pass over just the score columns.
+        '''
+        column_means = self._column_means(columns)
+        reader = pd.read_csv(self.data_path, usecols=columns, chunksize=self.chunk_rows)
+
+        for chunk in reader:
+            yield self.clean_data(chunk, column_means=column_means)
+
+
+    def load_and_clean_data(self, columns: list[str] = None) -> pd.DataFrame:
+        df = pd.read_csv(self.data_path, usecols=columns)
         df_processed = self.clean_data(df)
 
         return df_processed
-    
-    
+
+
 
     def split_dataset(self, df: pd.DataFrame, year_from: int = 1978, year_to: int = 2020):
         SZN_ID_TO_YEAR_FACTOR = 10000 ## id decode key
@@ -57,25 +115,35 @@ class NBADataProcessor:
         test_data = modern_regular[modern_regular['actual_year'] >= year_to]
 
         return train_data, test_data
-    
 
-    def get_modern_games(self, start_year: int = 1978) -> pd.DataFrame:
+
+    def get_modern_game_columns(self, start_year: int = 1978) -> dict:
+        """
+        Returns the modern era games as date-sorted NumPy columns
+          from the binary cache of the csv, built on first use.
+        """
+        from .game_cache import GameColumnCache
+
+        return GameColumnCache(self.data_path).modern_games(start_year)
+
+
+    def get_modern_games(self, start_year: int = 1978, columns: list[str] = ELO_COLUMNS) -> pd.DataFrame:
         """Get all modern era games for ELO initialization"""
-        df = self.load_and_clean_data()
-        
         SEASON_ID_TO_YEAR_FACTOR = 10000
-
-        df['actual_year'] = df['season_id'] % SEASON_ID_TO_YEAR_FACTOR
-        
         valid_years_cutoff = (2 * SEASON_ID_TO_YEAR_FACTOR) + start_year
-        modern_games = df[
-            (df['season_id'] >= valid_years_cutoff) &
-            (df['season_id'] < 30000)
-        ].copy()
-        
+
+        # Filter chunk by chunk so only modern games are ever held together
+        modern_chunks = []
+        for df in self.iter_clean_chunks(columns):
+            modern_chunks.append(df[
+                (df['season_id'] >= valid_years_cutoff) &
+                (df['season_id'] < 30000)
+            ])
+
+        modern_games = pd.concat(modern_chunks, ignore_index=True)
+        modern_games['actual_year'] = modern_games['season_id'] % SEASON_ID_TO_YEAR_FACTOR
+
         ## data should already be sorted but just in case
         modern_games = modern_games.sort_values('game_date')
-        
-        return modern_games
-
 
+        return modern_games
@@ -0,0 +1,384 @@
+#### BATCH ELO REPLAY ENGINE ####
+
+## imports
+import math
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+from .elo_system import EloSystem, TRACKED_GAME_LIMIT, TRACKED_RATING_LIMIT
+
+
+STREAK_WINDOW = 5 # games looked at by EloSystem.get_recent_streak
+STREAK_MASK = (1 << STREAK_WINDOW) - 1
+
+
+def _full_window_streak_factors(hot_factor: float, cold_factor: float) -> list[float]:
+    '''
+    Returns the winner streak factor for every possible last-5
+      result bitmask (1 = win). Mirrors _calculate_mov_multiplier:
+      with a full window a team is always either hot (3+ wins) or
+      cold (3+ losses).
+    '''
+    return [
+        hot_factor if bin(mask).count('1') >= 3 else cold_factor
+        for mask in range(1 << STREAK_WINDOW)
+    ]
+
+
+def _team_event_order(home_codes, away_codes, margins, home_rating_after, away_rating_after):
+    '''
+    Returns (order, starts, teams, rating_seq, won_seq, margin_seq)
+      where order groups every team's games chronologically.
+    '''
+    n = len(margins)
+    team_seq = np.empty(2 * n, dtype=np.int64)
+    team_seq[0::2] = home_codes
+    team_seq[1::2] = away_codes
+
+    rating_seq = np.empty(2 * n, dtype=np.float64)
+    rating_seq[0::2] = home_rating_after
+    rating_seq[1::2] = away_rating_after
+
+    home_won = (margins > 0).astype(np.int64)
+    won_seq = np.empty(2 * n, dtype=np.int64)
+    won_seq[0::2] = home_won
+    won_seq[1::2] = 1 - home_won
+
+    rounded = np.rint(margins).astype(np.int64) # stored whole, like EloSystem's history ring
+    margin_seq = np.empty(2 * n, dtype=np.int64)
+    margin_seq[0::2] = rounded
+    margin_seq[1::2] = -rounded
+
+    order = np.argsort(team_seq, kind='stable')
+    teams, starts = np.unique(team_seq[order], return_index=True)
+
+    return order, starts, teams, rating_seq, won_seq, margin_seq
+
+
+def build_histories(team_ids, home_codes, away_codes, margins, game_dates, home_rating_after, away_rating_after):
+    """
+    Returns (rating_history, game_history) dicts in the same shape
+      and trim limits EloSystem keeps, from per-game replay arrays.
+
+    Codes index team_ids; game_dates is datetime64[us] or None.
+    """
+    rating_history = {}
+    game_history = {}
+
+    if len(margins) == 0:
+        return rating_history, game_history
+
+    order, starts, teams, rating_seq, won_seq, margin_seq = _team_event_order(
+        home_codes, away_codes, margins, home_rating_after, away_rating_after
+    )
+    ends = np.append(starts[1:], len(order))
+
+    event_dates = None
+    if game_dates is not None:
+        event_dates = np.repeat(game_dates, 2)
+
+    iso_cache = {}
+    def to_iso(value):
+        if value not in iso_cache:
+            iso_cache[value] = value.astype(datetime).isoformat()
+        return iso_cache[value]
+
+    for code, start, end in sorted(zip(teams.tolist(), starts.tolist(), ends.tolist())):
+        team_id = int(team_ids[code])
+        game_idx = order[max(start, end - TRACKED_GAME_LIMIT):end]
+        game_history[team_id] = [
+            {
+                'date': to_iso(event_dates[j]) if event_dates is not None else None,
+                'won': int(won_seq[j]),
+                'margin': int(margin_seq[j]),
+            }
+            for j in game_idx
+        ]
+
+        if event_dates is not None:
+            rating_idx = order[max(start, end - TRACKED_RATING_LIMIT):end]
+            rating_history[team_id] = [
+                {'date': to_iso(event_dates[j]), 'rating': float(rating_seq[j])}
+                for j in rating_idx
+            ]
+
+    return rating_history, game_history
+
+
+class EloReplayEngine:
+    '''
+    Class EloReplayEngine replays whole game logs through the same
+      elo update rules as EloSystem.update_ratings, but on flat
+      arrays instead of per-game dicts and history lists.
+
+    Results are identical to the per-game path, including the
+      MOV multiplier and the hot/cold streak factor.
+
+    With keep_output=False only the latest batch's pre-game
+      probabilities are kept, so memory stays bounded by the
+      number of teams and the batch size.
+    '''
+    def __init__(
+        self,
+        k_factor: int = 20,
+        base_elo: int = 1300,
+        home_advantage: int = 100,
+        keep_output: bool = True,
+        mov_scale: float = 1.5,
+        upset_bonus: float = 1.2,
+        mov_cap: float = 15.0,
+        hot_streak_factor: float = 0.7,
+        cold_streak_factor: float = 1.3
+    ):
+        self.k_factor = k_factor
+        self.initial_rating = base_elo
+        self.home_advantage = home_advantage
+        # margin-of-victory settings, same meaning as on EloSystem
+        self.mov_scale = mov_scale
+        self.upset_bonus = upset_bonus
+        self.mov_cap = mov_cap
+        self._streak_factors = _full_window_streak_factors(hot_streak_factor, cold_streak_factor)
+        self.keep_output = keep_output
+
+        self.team_ids: list[int] = [] # dense index: team id
+        self._team_index: dict[int, int] = {} # team id: dense index
+        self.ratings: list[float] = [] # dense index: current elo
+        self.streak_masks: list[int] = [] # dense index: last 5 results as bits
+        self.streak_counts: list[int] = [] # dense index: games seen, capped at 5
+        self.last_game_date = None
+
+        # Per game replay output, appended on every call to replay()
+        self.home_codes = np.empty(0, dtype=np.int64)
+        self.away_codes = np.empty(0, dtype=np.int64)
+        self.margins = np.empty(0, dtype=np.float64) # home pts - away pts, fractional for mean-imputed scores
+        self.game_dates = None # datetime64[us] or None if not supplied
+        self.home_rating_after = np.empty(0, dtype=np.float64)
+        self.away_rating_after = np.empty(0, dtype=np.float64)
+        self.pregame_home_prob = np.empty(0, dtype=np.float64)
+        self.batch_pregame_home_prob = np.empty(0, dtype=np.float64) # last replay() call only
+
+    def _encode_teams(self, home_ids: np.ndarray, away_ids: np.ndarray):
+        '''
+        Returns dense team indices for home and away ids, registering
+          unseen teams in order of first appearance.
+        '''
+        interleaved = np.empty(2 * len(home_ids), dtype=np.int64)
+        interleaved[0::2] = home_ids
+        interleaved[1::2] = away_ids
+
+        unique_ids, first_seen, inverse = np.unique(
+            interleaved, return_index=True, return_inverse=True
+        )
+        for pos in np.argsort(first_seen, kind='stable'):
+            team_id = int(unique_ids[pos])
+            if team_id not in self._team_index:
+                self._team_index[team_id] = len(self.team_ids)
+                self.team_ids.append(team_id)
+                self.ratings.append(float(self.initial_rating))
+                self.streak_masks.append(0)
+                self.streak_counts.append(0)
+
+        dense = np.array([self._team_index[int(t)] for t in unique_ids], dtype=np.int64)
+        codes = dense[inverse.reshape(-1)]
+
+        return codes[0::2], codes[1::2]
+
+    def replay(
+        self,
+        home_ids: np.ndarray,
+        away_ids: np.ndarray,
+        home_scores: np.ndarray,
+        away_scores: np.ndarray,
+        game_dates: np.ndarray = None
+    ) -> None:
+        """
+        Returns None and replays a chronologically sorted batch of games,
+          continuing from whatever state earlier batches left behind.
+        """
+        home_ids = np.asarray(home_ids).astype(np.int64)
+        away_ids = np.asarray(away_ids).astype(np.int64)
+        # Float like update_ratings: truncating a mean-imputed score could flip the result or the MOV
+        margins = np.asarray(home_scores, dtype=np.float64) - np.asarray(away_scores, dtype=np.float64)
+        n = len(margins)
+
+        if n == 0:
+            return None
+
+        home_codes, away_codes = self._encode_teams(home_ids, away_ids)
+
+        # Plain python scalars keep the float arithmetic bit-identical
+        #  to EloSystem and avoid numpy scalar overhead in the loop.
+        home = home_codes.tolist()
+        away = away_codes.tolist()
+        margin_list = margins.tolist()
+        ratings = self.ratings
+        masks = self.streak_masks
+        counts = self.streak_counts
+        k = self.k_factor
+        hca = self.home_advantage
+        full_factors = self._streak_factors
+        mov_scale = self.mov_scale
+        upset_bonus = self.upset_bonus
+        mov_cap = self.mov_cap
+        log = math.log
+
+        post_home = [0.0] * n
+        post_away = [0.0] * n
+        pregame = [0.0] * n
+
+        for i in range(n):
+            h = home[i]
+            a = away[i]
+            rating_home = ratings[h]
+            rating_away = ratings[a]
+            margin = margin_list[i]
+
+            expected_home = 1 / (1 + 10 ** ((rating_away - (rating_home + hca)) / 400))
+            expected_away = 1 - expected_home
+
+            if margin > 0:
+                actual_home = 1
+                rating_diff = rating_home - rating_away
+                winner = h
+            else:
+                actual_home = 0
+                rating_diff = rating_away - rating_home
+                winner = a
+
+            base_change_home = k * (actual_home - expected_home)
+            base_change_away = k * ((1 - actual_home) - expected_away)
+
+            # Same steps as EloSystem._calculate_mov_multiplier
+            mov_multiplier = log(abs(margin) + 1) * mov_scale
+            mov_multiplier = mov_multiplier * (upset_bonus if rating_diff < 0 else 1.0)
+            if counts[winner] >= STREAK_WINDOW:
+                mov_multiplier = mov_multiplier * full_factors[masks[winner]]
+            if mov_multiplier > mov_cap:
+                mov_multiplier = mov_cap
+
+            new_home = rating_home + base_change_home + mov_multiplier
+            new_away = rating_away + base_change_away - mov_multiplier
+            ratings[h] = new_home
+            ratings[a] = new_away
+
+            masks[h] = ((masks[h] << 1) | actual_home) & STREAK_MASK
+            masks[a] = ((masks[a] << 1) | (1 - actual_home)) & STREAK_MASK
+            if counts[h] < STREAK_WINDOW:
+                counts[h] += 1
+            if counts[a] < STREAK_WINDOW:
+                counts[a] += 1
+
+            post_home[i] = new_home
+            post_away[i] = new_away
+            pregame[i] = expected_home
+
+        self.batch_pregame_home_prob = np.array(pregame, dtype=np.float64)
+
+        if self.keep_output:
+            self.home_codes = np.concatenate([self.home_codes, home_codes])
+            self.away_codes = np.concatenate([self.away_codes, away_codes])
+            self.margins = np.concatenate([self.margins, margins])
+            self.home_rating_after = np.concatenate([self.home_rating_after, post_home])
+            self.away_rating_after = np.concatenate([self.away_rating_after, post_away])
+            self.pregame_home_prob = np.concatenate([self.pregame_home_prob, self.batch_pregame_home_prob])
+
+        if game_dates is not None:
+            dates = np.asarray(game_dates).astype('datetime64[us]')
+            if self.keep_output:
+                if self.game_dates is None:
+                    self.game_dates = dates
+                else:
+                    self.game_dates = np.concatenate([self.game_dates, dates])
+
+            batch_last = dates.max().astype(datetime)
+            if self.last_game_date is None or batch_last > self.last_game_date:
+                self.last_game_date = batch_last
+
+        return None
+
+    def replay_games(self, games_df) -> None:
+        """
+        Returns None and replays a games DataFrame as returned by
+          NBADataProcessor.get_modern_games, or the dict of columns
+          from NBADataProcessor.get_modern_game_columns.
+        """
+        return self.replay(
+            home_ids=np.asarray(games_df['team_id_home']),
+            away_ids=np.asarray(games_df['team_id_away']),
+            home_scores=np.asarray(games_df['pts_home']),
+            away_scores=np.asarray(games_df['pts_away']),
+            game_dates=np.asarray(games_df['game_date']),
+        )
+
+    def get_ratings(self) -> Dict[int, float]:
+        return dict(zip(self.team_ids, self.ratings))
+
+    def get_recent_streak(self, team_id: int) -> Dict:
+        """
+        Returns the same streak summary as EloSystem.get_recent_streak
+          for the default 5 game window.
+        """
+        if team_id not in self._team_index:
+            return {'wins': 0, 'losses': 0, 'is_hot': False, 'is_cold': False}
+
+        idx = self._team_index[team_id]
+        played = self.streak_counts[idx]
+        wins = bin(self.streak_masks[idx]).count('1')
+        losses = played - wins
+
+        return {
+            'wins': wins,
+            'losses': losses,
+            'is_hot': wins >= 3 and played >= STREAK_WINDOW,
+            'is_cold': losses >= 3 and played >= STREAK_WINDOW,
+        }
+
+    def get_histories(self):
+        """
+        Returns (rating_history, game_history) dicts in the same
+          shape and trim limits EloSystem keeps.
+        """
+        return build_histories(
+            self.team_ids, self.home_codes, self.away_codes, self.margins,
+            self.game_dates, self.home_rating_after, self.away_rating_after
+        )
+
+    def seed_state(self, team_ids, ratings, streak_masks, streak_counts) -> None:
+        """
+        Returns None after loading a saved league state, e.g. a
+          RatingTimeline checkpoint, so replay() continues from it.
+          Teams with a NaN rating are left unseen.
+        """
+        for team_id, rating, mask, count in zip(team_ids, ratings, streak_masks, streak_counts):
+            if rating != rating:
+                continue
+            team_id = int(team_id)
+            idx = self._team_index.get(team_id)
+            if idx is None:
+                idx = len(self.team_ids)
+                self._team_index[team_id] = idx
+                self.team_ids.append(team_id)
+                self.ratings.append(0.0)
+                self.streak_masks.append(0)
+                self.streak_counts.append(0)
+            self.ratings[idx] = float(rating)
+            self.streak_masks[idx] = int(mask) & STREAK_MASK
+            self.streak_counts[idx] = min(int(count), STREAK_WINDOW)
+        return None
+
+    def apply_to(self, elo: EloSystem) -> EloSystem:
+        """
+        Returns the given EloSystem after loading the replayed ratings,
+          histories and last game date onto it, ready for _save_ratings.
+        """
+        rating_history, game_history = self.get_histories()
+
+        elo.team_ratings = self.get_ratings()
+        elo.rating_history = rating_history
+        elo.game_history = game_history
+        if self.last_game_date is not None:
+            elo.last_game_date = self.last_game_date
+
+        return elo
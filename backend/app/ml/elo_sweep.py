@@ -0,0 +1,122 @@
+#### PARALLEL HYPERPARAMETER SWEEP FOR THE ELO MODEL ####
+
+## imports
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from .data_cleaning import NBADataProcessor
+from .elo_replay import EloReplayEngine
+
+
+GAME_COLUMNS = ['team_id_home', 'team_id_away', 'pts_home', 'pts_away', 'game_date']
+PROBABILITY_EPSILON = 1e-15 # keeps log-loss finite for 0/1 predictions
+
+# Set once per worker process by _init_worker so the game arrays
+#  are shipped to each worker a single time instead of per config.
+_worker_train = None
+_worker_test = None
+
+
+def _games_to_arrays(games: pd.DataFrame) -> Dict[str, np.ndarray]:
+    games = games.sort_values('game_date', kind='stable')
+    return {col: games[col].to_numpy() for col in GAME_COLUMNS}
+
+
+def score_predictions(home_win_prob: np.ndarray, home_won: np.ndarray) -> Dict[str, float]:
+    """
+    Returns log-loss, Brier score and accuracy of home win
+      probabilities against actual home results (1 = home win).
+    """
+    prob = np.clip(np.asarray(home_win_prob, dtype=np.float64), PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+    outcome = np.asarray(home_won, dtype=np.float64)
+
+    if len(prob) == 0:
+        return {'log_loss': float('nan'), 'brier': float('nan'), 'accuracy': float('nan'), 'games': 0}
+
+    log_loss = -np.mean(outcome * np.log(prob) + (1 - outcome) * np.log(1 - prob))
+    brier = np.mean((prob - outcome) ** 2)
+    accuracy = np.mean((prob > 0.5) == (outcome == 1))
+
+    return {
+        'log_loss': float(log_loss),
+        'brier': float(brier),
+        'accuracy': float(accuracy),
+        'games': int(len(prob)),
+    }
+
+
+def evaluate_config(
+    train: Dict[str, np.ndarray],
+    test: Dict[str, np.ndarray],
+    k_factor: int,
+    base_elo: int,
+    home_advantage: int
+) -> Dict:
+    """
+    Returns test split metrics for one parameter combination after
+      replaying the train split to warm the ratings up.
+    """
+    engine = EloReplayEngine(k_factor=k_factor, base_elo=base_elo, home_advantage=home_advantage)
+    engine.replay(train['team_id_home'], train['team_id_away'], train['pts_home'], train['pts_away'])
+
+    n_train = len(engine.margins)
+    engine.replay(test['team_id_home'], test['team_id_away'], test['pts_home'], test['pts_away'])
+
+    test_probs = engine.pregame_home_prob[n_train:]
+    test_home_won = engine.margins[n_train:] > 0
+
+    return {
+        'k_factor': k_factor,
+        'base_elo': base_elo,
+        'home_advantage': home_advantage,
+        **score_predictions(test_probs, test_home_won),
+    }
+
+
+def _init_worker(train: Dict[str, np.ndarray], test: Dict[str, np.ndarray]) -> None:
+    global _worker_train, _worker_test
+    _worker_train = train
+    _worker_test = test
+
+
+def _evaluate_in_worker(params: tuple) -> Dict:
+    k_factor, base_elo, home_advantage = params
+    return evaluate_config(_worker_train, _worker_test, k_factor, base_elo, home_advantage)
+
+
+def run_sweep(
+    games: pd.DataFrame,
+    k_factors: Iterable[int],
+    base_elos: Iterable[int],
+    home_advantages: Iterable[int],
+    year_from: int = 1978,
+    year_to: int = 2020,
+    max_workers: int = None
+) -> pd.DataFrame:
+    """
+    Returns a DataFrame of every parameter combination ranked by
+      test log-loss, with one replay per combination spread
+      across a process pool.
+
+    games must be the cleaned frame from NBADataProcessor.load_and_clean_data.
+    """
+    train_df, test_df = NBADataProcessor().split_dataset(games, year_from=year_from, year_to=year_to)
+    train = _games_to_arrays(train_df)
+    test = _games_to_arrays(test_df)
+
+    grid = list(itertools.product(k_factors, base_elos, home_advantages))
+    workers = min(max_workers or os.cpu_count() or 1, len(grid)) or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(train, test)) as pool:
+        results = list(pool.map(_evaluate_in_worker, grid))
+
+    table = pd.DataFrame(results)
+    table = table.sort_values(['log_loss', 'brier'], kind='stable').reset_index(drop=True)
+    table.insert(0, 'rank', range(1, len(table) + 1))
+
+    return table
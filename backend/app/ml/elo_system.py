@@ -1,34 +1,140 @@
 #### ELO CLASS MODEL ####
 
 ## imports
-import json
+import os
 from pathlib import Path
-from typing import Dict, Tuple
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
 from datetime import datetime
+from array import array
 import math
 
+from .rating_store import RatingStore
+from .team_state import TeamState, NO_DATE, date_to_stamp, stamp_to_iso, summarize_streak
+
+
+TRACKED_GAME_LIMIT = 10 # recent games kept per team
+TRACKED_RATING_LIMIT = 50 # recent elo scores kept per team
+STREAK_GAMES = 5 # games looked at for hot/cold streaks
+# Machine-local files derived from the store (serving snapshot, ...), kept out of the tracked db folder
+RUNTIME_DIR = Path(os.getenv('RATINGS_RUNTIME_DIR', Path(__file__).parent.parent.parent / ".cache" / "ratings")) # backend/.cache/ratings
+
+# Shared streak summaries for the default window, indexed [played][wins].
+# update_ratings reads these instead of building a dict per game.
+_DEFAULT_STREAKS = [
+    [summarize_streak(wins, played) for wins in range(played + 1)]
+    for played in range(STREAK_GAMES + 1)
+]
 
 class EloSystem:
     '''
     Class EloSystem contains all logic for updating elo scores 
       of teams and predicting win outcomes in team matchups.
     '''
-    def __init__(self, k_factor: int=20, base_elo: int = 1300):
+    def __init__(
+        self,
+        k_factor: int=20,
+        base_elo: int = 1300,
+        home_advantage: int = 100,
+        mov_scale: float = 1.5,
+        upset_bonus: float = 1.2,
+        mov_cap: float = 15.0,
+        hot_streak_factor: float = 0.7,
+        cold_streak_factor: float = 1.3,
+        save_path: Path = None,
+        runtime_dir: Path = None
+    ):
         self.k_factor: int = k_factor
         self.initial_rating = base_elo
-        self.team_ratings: dict[int, int] = {} # team id: team elo
-        self.rating_history: dict[int, list] = {}  # team id: [team ratings]
-        self.game_history: dict[int, list] = {} # team id: [team w/l results]
+        self.home_advantage = home_advantage # default home court bump for updates and predictions
+        # margin-of-victory settings, see _calculate_mov_multiplier
+        self.mov_scale = mov_scale
+        self.upset_bonus = upset_bonus
+        self.mov_cap = mov_cap
+        self.hot_streak_factor = hot_streak_factor
+        self.cold_streak_factor = cold_streak_factor
+        # ratings plus rating/game history ring buffers, per dense team index
+        self._teams = TeamState(TRACKED_GAME_LIMIT, TRACKED_RATING_LIMIT)
         self.team_names: list[dict[str, int]] = [] # array of: {official team names: team ids}
         self.last_game_date = None
+        self.last_updated = None
 
         # Set default save path
         self_dir = Path(__file__).parent.parent  # backend/app 
-        self._default_save_path = self_dir / "db" / "database.json"
+        self._default_save_path = Path(save_path) if save_path else self_dir / "db" / "database.json"
+        # Default store: RUNTIME_DIR. Any other store keeps them next to itself unless told otherwise
+        if runtime_dir is None:
+            runtime_dir = RUNTIME_DIR if save_path is None else self._default_save_path.parent
+        self._runtime_dir = Path(runtime_dir)
+        self._store = RatingStore(self._default_save_path, lock_path=self._runtime_path('.lock')) # lock file stays out of the tracked db folder
+        self._timeline_path = self._default_save_path.with_suffix('.timeline.npz') # point-in-time ratings, see RatingTimeline
+        self._serving_path = self._runtime_path('.serving.npz') # binary state the API starts from
+        self._shared_path = self._runtime_path('.shared.json') # pointer to the ratings every API worker maps, segments sit next to it
+        self._log_seq = 0 # seq of the last game recorded
+        self._reset_pending_log()
+
+        # last converted game date, games arrive in date order
+        self._stamp_date = None
+        self._stamp = NO_DATE
+
+    def _runtime_path(self, suffix: str) -> Path:
+        # machine-local file of this store, e.g. database.serving.npz in the runtime dir
+        return self._runtime_dir / self._default_save_path.with_suffix(suffix).name
+
+    ## dict views of the array state, in the on-disk format
+
+    # The history views below are read-only snapshots built from the team
+    #  arrays, so writing into one raises instead of being silently lost.
+    #  Assign a whole dict to replace them.
+
+    @property
+    def team_ratings(self) -> Mapping[int, float]: # team id: team elo
+        return MappingProxyType(self._teams.ratings_dict())
+
+    @team_ratings.setter
+    def team_ratings(self, ratings: dict[int, float]) -> None:
+        self._teams.load_ratings(ratings)
+
+    @property
+    def rating_history(self) -> Mapping[int, tuple]: # team id: (team ratings)
+        return MappingProxyType({team_id: tuple(entries) for team_id, entries in self._teams.rating_history_dict().items()})
+
+    @rating_history.setter
+    def rating_history(self, rating_history: dict[int, list]) -> None:
+        self._teams.load_rating_history(rating_history)
+
+    @property
+    def game_history(self) -> Mapping[int, tuple]: # team id: (team w/l results)
+        return MappingProxyType({team_id: tuple(entries) for team_id, entries in self._teams.game_history_dict().items()})
+
+    @game_history.setter
+    def game_history(self, game_history: dict[int, list]) -> None:
+        self._teams.load_game_history(game_history)
 
     def get_rating(self, team_id: int):
-        return self.team_ratings.get(team_id, self.initial_rating)
+        idx = self._teams.index.get(team_id)
+        if idx is None:
+            return self.initial_rating
+
+        rating = self._teams.ratings[idx]
+        return rating if rating == rating else self.initial_rating # NaN: no rating yet
     
+    def replay_parameters(self) -> Dict:
+        '''
+        Returns the update rule settings as EloReplayEngine keyword
+          arguments, so a replay rates games exactly like this system.
+        '''
+        return {
+            'k_factor': self.k_factor,
+            'base_elo': self.initial_rating,
+            'home_advantage': self.home_advantage,
+            'mov_scale': self.mov_scale,
+            'upset_bonus': self.upset_bonus,
+            'mov_cap': self.mov_cap,
+            'hot_streak_factor': self.hot_streak_factor,
+            'cold_streak_factor': self.cold_streak_factor,
+        }
+
     def get_team_names(self):
         return self.team_names
     
@@ -57,25 +163,25 @@ class EloSystem:
         Returns:
             Dict with streak info: wins, losses, is_hot, is_cold
         """
-        if team_id not in self.game_history:
-            return {'wins': 0, 'losses': 0, 'is_hot': False, 'is_cold': False}
-        
-        recent_games = self.game_history[team_id][-games:]
-        wins = sum(1 for g in recent_games if g['won'])
-        losses = len(recent_games) - wins
-        
-        # Hot streak: 3+ wins in last 5 games
-        is_hot = wins >= 3 and len(recent_games) >= 5
-        
-        # Cold streak: 3+ losses in last 5 games
-        is_cold = losses >= 3 and len(recent_games) >= 5
-        
-        return {
-            'wins': wins,
-            'losses': losses,
-            'is_hot': is_hot,
-            'is_cold': is_cold,
-        }
+        idx = self._teams.index.get(team_id)
+        if idx is None:
+            return summarize_streak(0, 0)
+
+        wins, played = self._teams.recent_wins(idx, games)
+        return summarize_streak(wins, played)
+
+
+    def _shared_streak(self, team_id: int) -> Dict:
+        '''
+        Returns the default window streak summary as a shared,
+          read-only dict, for the update hot path.
+        '''
+        idx = self._teams.index.get(team_id)
+        if idx is None:
+            return _DEFAULT_STREAKS[0][0]
+
+        wins, played = self._teams.recent_wins(idx, STREAK_GAMES)
+        return _DEFAULT_STREAKS[played][wins]
     
 
     def _calculate_mov_multiplier(
@@ -89,30 +195,29 @@ class EloSystem:
         Returns margin-of-victory multiplier with diminishing returns 
           based on win/lose streaks.
         """
-        SCALE_FACTOR = 1.5
         abs_margin = abs(point_margin)
-        base_multiplier = math.log(abs_margin + 1) * SCALE_FACTOR # log scaling to limit large values
+        base_multiplier = math.log(abs_margin + 1) * self.mov_scale # log scaling to limit large values
         
         rating_diff = winner_rating - loser_rating
         upset_bonus = None
         if rating_diff < 0:
-            upset_bonus = 1.2  # 20% boost
+            upset_bonus = self.upset_bonus  # 20% boost by default
         else:
             upset_bonus = 1.0
         
         # Streak adjustment logic
         streak_factor = None
         if winner_streak['is_hot']:
-            streak_factor = 0.7  # 30% reduction
+            streak_factor = self.hot_streak_factor  # 30% reduction by default
         elif winner_streak['is_cold']:
-            streak_factor = 1.3  # 30% boost
+            streak_factor = self.cold_streak_factor  # 30% boost by default
         else:
             streak_factor = 1.0
         
         final_multiplier = base_multiplier * upset_bonus * streak_factor
         
-        # Cap the maximum adjustment to ±15 ELO points from MOV alone
-        return min(final_multiplier, 15.0)
+        # Cap the maximum adjustment from MOV alone, ±15 ELO points by default
+        return min(final_multiplier, self.mov_cap)
     
 
     def _update_game_history(
@@ -125,20 +230,8 @@ class EloSystem:
         """
         Private method to update and track game outcomes.
         """
-        if team_id not in self.game_history:
-            self.game_history[team_id] = []
-        
-        TRACKED_GAME_LIMIT = 10
-        
-        self.game_history[team_id].append({
-            'date': game_date.isoformat() if game_date else None,
-            'won': won,
-            'margin': margin
-        })
-        
-        # Keep only recent games
-        if len(self.game_history[team_id]) > TRACKED_GAME_LIMIT:
-            self.game_history[team_id] = self.game_history[team_id][-TRACKED_GAME_LIMIT:]
+        # Ring buffer keeps only the recent TRACKED_GAME_LIMIT games
+        self._teams.push_game(self._teams.register(team_id), won, margin, self._date_stamp(game_date))
     
 
     def _update_rating_history(
@@ -150,19 +243,20 @@ class EloSystem:
         """
         Private method to update historical ratings.
         """
-        if team_id not in self.rating_history:
-            self.rating_history[team_id] = []
-        
-        TRACKED_RATING_LIMIT = 50 
-        
-        self.rating_history[team_id].append({
-            'date': game_date.isoformat(),
-            'rating': rating
-        })
-        
-        # keep last 50 elo scores
-        if len(self.rating_history[team_id]) > TRACKED_RATING_LIMIT:
-            self.rating_history[team_id] = self.rating_history[team_id][-TRACKED_RATING_LIMIT:]
+        # Ring buffer keeps the last TRACKED_RATING_LIMIT elo scores
+        self._teams.push_rating(self._teams.register(team_id), rating, self._date_stamp(game_date))
+
+
+    def _date_stamp(self, game_date: datetime) -> int:
+        '''
+        Returns game_date as a numeric stamp, reusing the last
+          conversion since both teams of a game (and most games
+          of a day) share the same date.
+        '''
+        if game_date != self._stamp_date:
+            self._stamp_date = game_date
+            self._stamp = date_to_stamp(game_date)
+        return self._stamp
     
 
     def update_ratings(
@@ -171,13 +265,17 @@ class EloSystem:
         team_away_id: int,
         home_score: int,
         away_score: int,
-        home_advantage: int=100,
+        home_advantage: int=None,
         game_date: datetime=None
     ) -> Tuple[float, float]:
         '''
         Returns a tuple containing new home team rating 
           and new away team rating after games were played.
+          home_advantage defaults to the system's own.
         '''
+        if home_advantage is None:
+            home_advantage = self.home_advantage
+
         # Get current ratings and calculate updated ratings
         rating_home = self.get_rating(team_home_id)
         rating_away = self.get_rating(team_away_id)
@@ -186,8 +284,8 @@ class EloSystem:
         expected_home = self._calculate_win_chance(adjusted_home, rating_away)
         expected_away = 1 - expected_home
 
-        home_streak = self.get_recent_streak(team_home_id)
-        away_streak = self.get_recent_streak(team_away_id)
+        home_streak = self._shared_streak(team_home_id)
+        away_streak = self._shared_streak(team_away_id)
         
         actual_home = 1 if home_score > away_score else 0
         actual_away = 1 - actual_home
@@ -211,9 +309,44 @@ class EloSystem:
         new_rating_home = rating_home + base_change_home + mov_change_home
         new_rating_away = rating_away + base_change_away + mov_change_away
         
+        self._record_game(
+            team_home_id, team_away_id, new_rating_home, new_rating_away, home_pts_margin, game_date
+        )
+
+        # Queue the rating delta for the append-only log
+        self._log_seq += 1
+        pending = self._pending_log
+        pending['date'].append(self._date_stamp(game_date))
+        pending['home'].append(team_home_id)
+        pending['away'].append(team_away_id)
+        pending['margin'].append(home_pts_margin)
+        pending['home_rating'].append(new_rating_home)
+        pending['away_rating'].append(new_rating_away)
+
+        return new_rating_home, new_rating_away
+
+
+    def _record_game(
+        self,
+        team_home_id: int,
+        team_away_id: int,
+        new_rating_home: float,
+        new_rating_away: float,
+        home_pts_margin: int,
+        game_date: datetime
+    ) -> None:
+        """
+        Private method to store a played game's new ratings and history.
+
+        Shared by update_ratings and log replay in _load_ratings.
+        """
+        actual_home = 1 if home_pts_margin > 0 else 0
+        actual_away = 1 - actual_home
+
         # Store updated ratings
-        self.team_ratings[team_home_id] = new_rating_home
-        self.team_ratings[team_away_id] = new_rating_away
+        teams = self._teams
+        teams.ratings[teams.register(team_home_id)] = new_rating_home
+        teams.ratings[teams.register(team_away_id)] = new_rating_away
 
         # Update history of recent games
         self._update_game_history(team_home_id, actual_home, home_pts_margin, game_date)
@@ -225,14 +358,14 @@ class EloSystem:
             self._update_rating_history(team_home_id, new_rating_home, game_date)
             self._update_rating_history(team_away_id, new_rating_away, game_date)
 
-        return new_rating_home, new_rating_away
+        return None
     
 
     def predict(
         self, 
         team_home_id: int, 
         team_away_id: int,
-        home_court_advantage: int = 100
+        home_court_advantage: int = None
     ) -> Dict[str, float]:
         """
         Predict game outcome
@@ -240,6 +373,9 @@ class EloSystem:
         Returns:
             Dict with prediction probabilities
         """
+        if home_court_advantage is None:
+            home_court_advantage = self.home_advantage
+
         rating_home = self.get_rating(team_home_id)
         rating_away = self.get_rating(team_away_id)
 
@@ -264,46 +400,158 @@ class EloSystem:
         }
 
 
-    def _save_ratings(self) -> None:
-        """
-        Returns None and saves list of team ratings 
-          to json file for data persistence. 
-          
-        Must run after update_ratings is called.
-        """
-        filepath = self._default_save_path
-        
-        data = {
-            'ratings': {str(k): v for k, v in self.team_ratings.items()},
+    def _reset_pending_log(self) -> None:
+        # columns of games recorded since the last save, typed arrays so queuing allocates nothing per game
+        self._pending_log = {
+            'date': array('q'),
+            'home': array('q'),
+            'away': array('q'),
+            'margin': array('d'), # exact, so a replay from the log rates mean-imputed scores like update_ratings
+            'home_rating': array('d'),
+            'away_rating': array('d'),
+        }
+
+
+    def _pending_log_entries(self) -> list[Dict]:
+        '''
+        Returns the queued games as log entries for the rating store.
+        '''
+        pending = self._pending_log
+        first_seq = self._log_seq - len(pending['home']) + 1
+        return [
+            {
+                'seq': first_seq + i,
+                'date': stamp_to_iso(pending['date'][i]),
+                'home': pending['home'][i],
+                'away': pending['away'][i],
+                'margin': pending['margin'][i],
+                'home_rating': pending['home_rating'][i],
+                'away_rating': pending['away_rating'][i],
+            }
+            for i in range(len(pending['home']))
+        ]
+
+
+    def _snapshot_data(self) -> Dict:
+        return {
+            'ratings': {str(k): v for k, v in self._teams.ratings_dict().items()},
             'team_names': self.team_names,
             'last_game_date': self.last_game_date.isoformat(),
             'rating_history': {
-                str(k): v for k, v in self.rating_history.items()
+                str(k): v for k, v in self._teams.rating_history_dict().items()
             },
             'game_history': {
-                str(k): v for k, v in self.game_history.items()
+                str(k): v for k, v in self._teams.game_history_dict().items()
             },
             'initial_rating': self.initial_rating,
-            'last_updated': datetime.now().isoformat()
+            'last_updated': self.last_updated,
+            'log_seq': self._log_seq,
         }
-        
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
-        
+
+
+    def _save_ratings(self, compact: bool = False) -> None:
+        """
+        Returns None and persists team ratings for data persistence.
+
+        Games played since the last save are appended to the rating
+          log. A full snapshot is only written when compact is set,
+          when no snapshot exists yet, or once the log is long enough.
+          
+        Must run after update_ratings is called.
+        """
+        self.last_updated = datetime.now().isoformat()
+        store = self._store
+
+        if compact or not store.snapshot_exists():
+            self._fold_timeline(self._pending_log_entries())
+            store.write_snapshot(self._snapshot_data())
+        else:
+            store.append(self._pending_log_entries(), self.last_updated)
+            if store.needs_compaction():
+                self._fold_timeline([])
+                store.write_snapshot(self._snapshot_data())
+
+        self._reset_pending_log()
+        self._save_serving_snapshot()
+        self._publish_shared_ratings()
         return None
-    
+
+
+    def _save_serving_snapshot(self) -> None:
+        '''
+        Returns None after writing the binary snapshot the API loads
+          at startup, tagged with the store files it matches.
+
+        It is only a startup cache, so failing to write it never
+          fails a save.
+        '''
+        from .serving_snapshot import write_serving_snapshot
+
+        try:
+            write_serving_snapshot(self, self._serving_path, self._store.fingerprint())
+        except OSError as e:
+            print(f"Error writing serving snapshot {self._serving_path}: {e}")
+        return None
+
+
+    def _publish_shared_ratings(self) -> None:
+        '''
+        Returns None after publishing the saved ratings as a new
+          shared generation, which every API worker switches to on
+          its next poll, see SharedRatings.
+        '''
+        from .shared_ratings import build_shared_ratings, publish_lock, publish_shared_ratings
+
+        try:
+            with publish_lock(self._shared_path):
+                publish_shared_ratings(build_shared_ratings(self, self._store.fingerprint()), self._shared_path)
+        except OSError as e:
+            print(f"Error publishing shared ratings {self._shared_path}: {e}")
+        return None
+
+
+    def _load_serving_snapshot(self, source_fingerprint: tuple) -> bool:
+        '''
+        Returns True if the binary snapshot matches the store files
+          with source_fingerprint and was loaded, skipping the JSON
+          parse and log replay of _load_ratings.
+        '''
+        from .serving_snapshot import load_serving_snapshot
+
+        return load_serving_snapshot(self, self._serving_path, source_fingerprint)
+
+
+    def _fold_timeline(self, pending_entries: list[Dict]) -> None:
+        '''
+        Returns None after moving the logged games (and any not yet
+          logged) into the point-in-time timeline, which must happen
+          before a snapshot empties the log.
+
+        Without a saved timeline there is nothing to extend: one built
+          from the log alone would miss every rating before it, so
+          the games wait for scripts/initialize_elo.py instead.
+        '''
+        from .rating_timeline import RatingTimeline
+
+        log_entries = self._store.committed_log_entries() + pending_entries
+        if not log_entries or not self._timeline_path.exists():
+            return None
+
+        timeline = RatingTimeline.load(self._timeline_path, log_entries, initial_rating=self.initial_rating)
+        timeline.save(self._timeline_path)
+        return None
+
 
     def _load_ratings(self):
         """
         Returns None and loads stored data for games and 
           team elos onto the EloSystem Class for computation.
 
+        Reads the snapshot and replays any logged games after it.
+
         Must be run before any new elo-calculations
         """
-        filepath = self._default_save_path
-
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        data, log_tail, last_updated = self._store.load()
 
         self.team_names = data['team_names']
         self.last_game_date = datetime.fromisoformat(data['last_game_date'])
@@ -328,5 +576,16 @@ class EloSystem:
 
         self.k_factor = data.get('k_factor', self.k_factor)
         self.initial_rating = data.get('initial_rating', self.initial_rating)
+        self._log_seq = data.get('log_seq', 0)
+
+        for entry in log_tail:
+            game_date = datetime.fromisoformat(entry['date']) if entry['date'] else None
+            self._record_game(
+                entry['home'], entry['away'], entry['home_rating'], entry['away_rating'], entry['margin'], game_date
+            )
+            self._log_seq = entry['seq']
+
+        self.last_updated = last_updated
+        self._reset_pending_log()
         
         return None
\ No newline at end of file
@@ -0,0 +1,347 @@
+#### ROLLING TEAM BOX-SCORE FEATURES ####
+
+## imports
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = Path(__file__).parent.parent / "db" / "features.npz" # backend/app/db
+
+# Box-score columns tracked per team, in the pipeline matchup naming (home_<col> / away_<col>).
+# opp_pts is the other side's pts, i.e. points allowed.
+FEATURE_COLUMNS = (
+    'pts', 'opp_pts', 'fg_pct', 'fg3_pct', 'ft_pct', 'fg3a', 'fta',
+    'oreb', 'dreb', 'reb', 'ast', 'stl', 'blk', 'tov', 'pf',
+)
+WINDOWS = (5, 10, 20) # rolling mean windows, in games
+EWM_SPAN = 10 # span of the exponentially weighted mean, alpha = 2 / (span + 1)
+
+
+class FeatureStore:
+    '''
+    Class FeatureStore keeps rolling box-score aggregates per team:
+      the mean over the last 5/10/20 games and an exponentially
+      weighted mean of every FEATURE_COLUMNS stat.
+
+    Each team has a fixed ring of its last max(WINDOWS) games plus
+      running window sums, so a game costs the same handful of array
+      operations however long the history is, and the whole team x
+      feature matrix is read without rescanning games. Missing stats
+      (NaN) are left out of the means rather than counted as zero.
+    '''
+    def __init__(self, path: Path = DEFAULT_PATH, columns: tuple = FEATURE_COLUMNS, windows: tuple = WINDOWS, ewm_span: float = EWM_SPAN):
+        self.path = Path(path)
+        self.columns = tuple(columns)
+        self.windows = tuple(sorted(windows))
+        self.ewm_span = ewm_span
+        self.alpha = 2 / (ewm_span + 1)
+        self.ring_size = self.windows[-1]
+        self.last_game_date = None # latest game folded in, older games are skipped
+
+        self.team_ids: list[int] = [] # dense index: team id
+        self.index: Dict[int, int] = {} # team id: dense index
+
+        n_windows = len(self.windows)
+        n_columns = len(self.columns)
+        self.ring = np.full((0, self.ring_size, n_columns), np.nan) # last ring_size games per team
+        self.heads = np.zeros(0, dtype=np.int64) # next ring slot to write
+        self.games = np.zeros(0, dtype=np.int64) # games seen per team
+        self.window_sums = np.zeros((0, n_windows, n_columns)) # sum of non-missing values per window
+        self.window_counts = np.zeros((0, n_windows, n_columns), dtype=np.int64) # non-missing values per window
+        self.ewm = np.full((0, n_columns), np.nan)
+        self.last_days = np.zeros(0, dtype=np.int64) # day number (days since 1970-01-01) of each team's last game, -1 if unknown
+        self._window_sizes = np.array(self.windows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.team_ids)
+
+    def register(self, team_id: int) -> int:
+        '''
+        Returns the dense index of team_id, growing every buffer by
+          one team the first time it is seen.
+        '''
+        idx = self.index.get(team_id)
+        if idx is not None:
+            return idx
+
+        idx = len(self.team_ids)
+        self.index[team_id] = idx
+        self.team_ids.append(team_id)
+
+        self.ring = np.concatenate([self.ring, np.full((1,) + self.ring.shape[1:], np.nan)])
+        self.heads = np.append(self.heads, 0)
+        self.games = np.append(self.games, 0)
+        self.window_sums = np.concatenate([self.window_sums, np.zeros((1,) + self.window_sums.shape[1:])])
+        self.window_counts = np.concatenate([self.window_counts, np.zeros((1,) + self.window_counts.shape[1:], dtype=np.int64)])
+        self.ewm = np.concatenate([self.ewm, np.full((1, len(self.columns)), np.nan)])
+        self.last_days = np.append(self.last_days, -1)
+        return idx
+
+    def push(self, team_id: int, values: np.ndarray) -> None:
+        '''
+        Returns None after folding one game's stats (ordered like
+          columns, NaN where missing) into the team's aggregates.
+        '''
+        idx = self.register(team_id)
+        head = int(self.heads[idx])
+        games = int(self.games[idx])
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        # Drop the game each window slides past, w games back in the ring
+        leaving = self.ring[idx, (head - self._window_sizes) % self.ring_size]
+        full = (games >= self._window_sizes)[:, np.newaxis]
+        leaving_valid = full & ~np.isnan(leaving)
+        self.window_sums[idx] += filled - np.where(leaving_valid, leaving, 0.0)
+        self.window_counts[idx] += valid.astype(np.int64) - leaving_valid
+
+        self.ring[idx, head] = values
+        head = (head + 1) % self.ring_size
+        self.heads[idx] = head
+        self.games[idx] = games + 1
+
+        ewm = self.ewm[idx]
+        self.ewm[idx] = np.where(
+            valid,
+            np.where(np.isnan(ewm), filled, self.alpha * filled + (1 - self.alpha) * ewm),
+            ewm
+        )
+
+        if head == 0:
+            self._resum(idx)
+        return None
+
+    def _resum(self, idx: int) -> None:
+        '''
+        Returns None after recomputing the team's window sums from
+          its ring, once per ring turn, so rounding from adding and
+          removing never accumulates.
+        '''
+        games = int(self.games[idx])
+        head = int(self.heads[idx])
+        for w, size in enumerate(self.windows):
+            recent = self.ring[idx, (head - np.arange(1, min(size, games) + 1)) % self.ring_size]
+            self.window_sums[idx, w] = np.nansum(recent, axis=0)
+            self.window_counts[idx, w] = np.sum(~np.isnan(recent), axis=0)
+        return None
+
+    def update_games(
+        self,
+        home_ids: np.ndarray,
+        away_ids: np.ndarray,
+        home_stats: np.ndarray,
+        away_stats: np.ndarray,
+        game_dates: np.ndarray = None,
+        record_pregame: bool = False
+    ):
+        """
+        Returns None, or with record_pregame the (home, away) feature
+          rows each team carried into each game, after folding a
+          chronologically sorted batch of games in.
+
+        Stats are [games, columns] arrays. With game_dates, games no
+          newer than last_game_date were already folded in and are
+          skipped, so re-running a batch is harmless.
+        """
+        n = len(home_ids)
+        home_stats = np.asarray(home_stats, dtype=np.float64).reshape(n, len(self.columns))
+        away_stats = np.asarray(away_stats, dtype=np.float64).reshape(n, len(self.columns))
+        pregame_home = np.full((n, self.n_features), np.nan) if record_pregame else None
+        pregame_away = np.full((n, self.n_features), np.nan) if record_pregame else None
+
+        dates = None
+        if game_dates is not None:
+            dates = np.asarray(game_dates).astype('datetime64[us]')
+            days = dates.astype('datetime64[D]').astype(np.int64).tolist()
+            last = np.datetime64(self.last_game_date, 'us') if self.last_game_date is not None else None
+
+        for i, (home_id, away_id) in enumerate(zip(np.asarray(home_ids).tolist(), np.asarray(away_ids).tolist())):
+            if dates is not None and last is not None and dates[i] <= last:
+                continue
+            if record_pregame:
+                pregame_home[i] = self.team_features([home_id])[0]
+                pregame_away[i] = self.team_features([away_id])[0]
+            self.push(home_id, home_stats[i])
+            self.push(away_id, away_stats[i])
+            if dates is not None:
+                self.last_days[self.index[home_id]] = days[i]
+                self.last_days[self.index[away_id]] = days[i]
+
+        if dates is not None and n > 0:
+            batch_last = dates.max().astype(datetime)
+            if self.last_game_date is None or batch_last > self.last_game_date:
+                self.last_game_date = batch_last
+
+        if record_pregame:
+            return pregame_home, pregame_away
+        return None
+
+    def update_matchups(self, games, record_pregame: bool = False):
+        """
+        Returns update_games of a matchups DataFrame, as built by
+          convert_to_matchups (home_<col> / away_<col>) or read from
+          game.csv (<col>_home / <col>_away).
+        """
+        home_ids, away_ids, home_stats, away_stats = matchup_arrays(games, self.columns)
+        return self.update_games(home_ids, away_ids, home_stats, away_stats, games['game_date'], record_pregame)
+
+    ## bulk reads
+
+    @property
+    def feature_names(self) -> list[str]:
+        names = [f"{column}_avg{size}" for size in self.windows for column in self.columns]
+        names += [f"{column}_ewm" for column in self.columns]
+        return names
+
+    @property
+    def n_features(self) -> int:
+        return (len(self.windows) + 1) * len(self.columns)
+
+    def feature_matrix(self) -> Tuple[np.ndarray, list[str], np.ndarray]:
+        """
+        Returns (team_ids, feature_names, matrix) where row i holds
+          every feature of team_ids[i], NaN where a team has no
+          non-missing value yet.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(self.window_counts > 0, self.window_sums / self.window_counts, np.nan)
+        matrix = np.concatenate([means.reshape(len(self.team_ids), -1), self.ewm], axis=1)
+        return np.array(self.team_ids, dtype=np.int64), self.feature_names, matrix
+
+    def team_features(self, team_ids) -> np.ndarray:
+        """
+        Returns a [len(team_ids), n_features] matrix of the teams'
+          current features, NaN rows for unseen teams.
+        """
+        rows = np.full((len(team_ids), self.n_features), np.nan)
+        n_means = len(self.windows) * len(self.columns)
+        for row, team_id in enumerate(team_ids):
+            idx = self.index.get(int(team_id))
+            if idx is None:
+                continue
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(self.window_counts[idx] > 0, self.window_sums[idx] / self.window_counts[idx], np.nan)
+            rows[row, :n_means] = means.reshape(-1)
+            rows[row, n_means:] = self.ewm[idx]
+        return rows
+
+    def rest_days(self, team_ids, on_date: datetime, cap: int) -> np.ndarray:
+        """
+        Returns the days each team has had off before a game on
+          on_date, capped at cap, which also stands in for teams
+          with no dated game yet.
+        """
+        day = int(np.datetime64(on_date, 'D').astype(np.int64))
+        rest = np.full(len(team_ids), cap, dtype=np.int64)
+        for row, team_id in enumerate(team_ids):
+            idx = self.index.get(int(team_id))
+            if idx is not None and self.last_days[idx] >= 0:
+                rest[row] = min(day - int(self.last_days[idx]), cap)
+        return rest
+
+    ## persistence
+
+    def save(self) -> None:
+        '''
+        Returns None after writing every buffer to path, swapped in
+          atomically so a reader never sees half a store.
+        '''
+        meta = {
+            'format': FORMAT_VERSION,
+            'columns': self.columns,
+            'windows': self.windows,
+            'ewm_span': self.ewm_span,
+            'team_ids': self.team_ids,
+            'last_game_date': self.last_game_date.isoformat() if self.last_game_date else None,
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, meta=np.array(json.dumps(meta)), ring=self.ring, heads=self.heads, games=self.games,
+                window_sums=self.window_sums, window_counts=self.window_counts, ewm=self.ewm,
+                last_days=self.last_days
+            )
+        os.replace(tmp_path, self.path)
+        return None
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_PATH) -> 'FeatureStore':
+        """
+        Returns the store saved at path, or an empty one if there is
+          none yet or it was saved with other columns or windows.
+        """
+        store = cls(path)
+        path = Path(path)
+        if not path.exists():
+            return store
+
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if (
+                meta.get('format') != FORMAT_VERSION
+                or tuple(meta['columns']) != store.columns
+                or tuple(meta['windows']) != store.windows
+                or meta['ewm_span'] != store.ewm_span
+            ):
+                print(f"Ignoring feature store {path} saved with other settings, rebuild it with scripts/build_features.py")
+                return store
+
+            store.ring = data['ring']
+            store.heads = data['heads']
+            store.games = data['games']
+            store.window_sums = data['window_sums']
+            store.window_counts = data['window_counts']
+            store.ewm = data['ewm']
+            # Stores saved before last_days was kept know no game dates
+            store.last_days = data['last_days'] if 'last_days' in data.files else np.full(len(meta['team_ids']), -1, dtype=np.int64)
+
+        store.team_ids = list(meta['team_ids'])
+        store.index = {team_id: idx for idx, team_id in enumerate(store.team_ids)}
+        store.last_game_date = datetime.fromisoformat(meta['last_game_date']) if meta['last_game_date'] else None
+        return store
+
+
+def csv_stat_columns(available) -> list[str]:
+    '''
+    Returns the game.csv box-score columns (<col>_home / <col>_away)
+      of FEATURE_COLUMNS that are present in available.
+    '''
+    return [
+        f"{stat}_{side}"
+        for stat in FEATURE_COLUMNS if stat != 'opp_pts' # derived from the other side's pts
+        for side in ('home', 'away')
+        if f"{stat}_{side}" in available
+    ]
+
+
+def matchup_arrays(games, columns: tuple = FEATURE_COLUMNS):
+    '''
+    Returns (home_ids, away_ids, home_stats, away_stats) from a
+      matchups DataFrame in either naming. Stats missing from the
+      frame are NaN, opp_pts is the other side's pts.
+    '''
+    if 'home_team_id' in games.columns:
+        home_ids, away_ids = games['home_team_id'], games['away_team_id']
+        column_of = lambda side, stat: f"{side}_{stat}"
+    else:
+        home_ids, away_ids = games['team_id_home'], games['team_id_away']
+        column_of = lambda side, stat: f"{stat}_{side}"
+
+    n = len(games)
+    stats = {'home': np.full((n, len(columns)), np.nan), 'away': np.full((n, len(columns)), np.nan)}
+    for side, other in (('home', 'away'), ('away', 'home')):
+        for c, stat in enumerate(columns):
+            column = column_of(other, 'pts') if stat == 'opp_pts' else column_of(side, stat)
+            if column in games.columns:
+                stats[side][:, c] = games[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    return (
+        home_ids.to_numpy(dtype=np.int64), away_ids.to_numpy(dtype=np.int64),
+        stats['home'], stats['away']
+    )
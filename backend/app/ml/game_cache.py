@@ -0,0 +1,158 @@
+#### COLUMNAR BINARY CACHE OF THE HISTORICAL GAME CSV ####
+
+## imports
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+
+CACHE_FORMAT_VERSION = 2
+SEASON_ID_TO_YEAR_FACTOR = 10000
+REGULAR_SEASON_PREFIX = 2 # season_id 2YYYY
+
+# csv column: on-disk dtype of the cached array
+CACHED_COLUMNS = {
+    'game_date': 'datetime64[s]',
+    'season_id': 'int32',
+    'team_id_home': 'int64',
+    'team_id_away': 'int64',
+    'pts_home': 'float64', # clean_data fills missing scores with the (fractional) mean
+    'pts_away': 'float64',
+}
+
+
+class GameColumnCache:
+    '''
+    Class GameColumnCache converts game.csv once into a directory of
+      .npy files, one per column the elo engine needs, sorted by
+      game_date, plus a per-season row index.
+
+    Later loads memory-map the arrays instead of parsing text. The
+      cache is rebuilt whenever the csv's size or mtime changes.
+    '''
+    def __init__(self, csv_path: str, cache_dir: str = None):
+        self.csv_path = Path(csv_path)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.csv_path.with_name(self.csv_path.stem + '_columns')
+        self._columns = None
+        self._season_index = None
+
+    def _source_stamp(self) -> Dict:
+        stat = self.csv_path.stat()
+        return {
+            'format_version': CACHE_FORMAT_VERSION,
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+        }
+
+    def is_fresh(self) -> bool:
+        manifest_path = self.cache_dir / 'manifest.json'
+        if not manifest_path.exists():
+            return False
+
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        return {key: manifest.get(key) for key in ('format_version', 'source_size', 'source_mtime_ns')} == self._source_stamp()
+
+    def build(self, chunk_rows: int = None) -> None:
+        """
+        Returns None after streaming the csv through the cleaner and
+          writing the sorted column arrays and season index.
+
+        Written to a temp directory and renamed into place, so a
+          half-built cache is never picked up.
+        """
+        from .data_cleaning import NBADataProcessor, DEFAULT_CHUNK_ROWS
+
+        processor = NBADataProcessor(str(self.csv_path), chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS)
+        stamp = self._source_stamp()
+
+        parts = {col: [] for col in CACHED_COLUMNS}
+        for chunk in processor.iter_clean_chunks(columns=list(CACHED_COLUMNS)):
+            for col, dtype in CACHED_COLUMNS.items():
+                parts[col].append(chunk[col].to_numpy().astype(dtype))
+
+        columns = {col: np.concatenate(chunks) for col, chunks in parts.items()}
+        order = np.argsort(columns['game_date'], kind='stable')
+        columns = {col: values[order] for col, values in columns.items()}
+
+        # Seasons are contiguous once sorted by date, so each one is a row range
+        years = columns['season_id'] % SEASON_ID_TO_YEAR_FACTOR
+        season_years, first_rows = np.unique(years, return_index=True)
+        _, last_rows_reversed = np.unique(years[::-1], return_index=True)
+        last_rows = len(years) - 1 - last_rows_reversed
+        season_index = {
+            str(int(year)): [int(first), int(last) + 1]
+            for year, first, last in zip(season_years, first_rows, last_rows)
+        }
+
+        tmp_dir = self.cache_dir.with_name(self.cache_dir.name + '.tmp')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        for col, values in columns.items():
+            np.save(tmp_dir / f"{col}.npy", values)
+        with open(tmp_dir / 'manifest.json', 'w') as f:
+            json.dump({**stamp, 'rows': int(len(years)), 'seasons': season_index}, f, indent=2)
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.cache_dir)
+
+        self._columns = None
+        self._season_index = None
+        return None
+
+    def load(self) -> Dict[str, np.ndarray]:
+        """
+        Returns the cached columns as read-only memory-mapped arrays,
+          building the cache first if it is missing or stale.
+        """
+        if self._columns is not None:
+            return self._columns
+
+        if not self.is_fresh():
+            self.build()
+
+        with open(self.cache_dir / 'manifest.json', 'r') as f:
+            manifest = json.load(f)
+
+        self._season_index = {int(year): tuple(bounds) for year, bounds in manifest['seasons'].items()}
+        self._columns = {
+            col: np.load(self.cache_dir / f"{col}.npy", mmap_mode='r')
+            for col in CACHED_COLUMNS
+        }
+        return self._columns
+
+    def season_rows(self, year: int) -> slice:
+        '''
+        Returns the row range of the season starting in `year`.
+        '''
+        self.load()
+        start, end = self._season_index.get(year, (0, 0))
+        return slice(start, end)
+
+    def modern_games(self, start_year: int = 1978, regular_season_only: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Returns the columns of every game from start_year on, the
+          same games NBADataProcessor.get_modern_games selects.
+        """
+        columns = self.load()
+        later_seasons = [start for year, (start, _) in self._season_index.items() if year >= start_year]
+        first_row = min(later_seasons) if later_seasons else len(columns['season_id'])
+
+        # Contiguous tail of the date-sorted arrays, still zero-copy
+        modern = {col: values[first_row:] for col, values in columns.items()}
+        season_id = modern['season_id']
+
+        if regular_season_only:
+            keep = (season_id >= REGULAR_SEASON_PREFIX * SEASON_ID_TO_YEAR_FACTOR + start_year) & (season_id < 30000)
+        else:
+            keep = (season_id % SEASON_ID_TO_YEAR_FACTOR) >= start_year
+
+        if keep.all():
+            return modern
+        return {col: values[keep] for col, values in modern.items()}
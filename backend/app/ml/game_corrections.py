@@ -0,0 +1,183 @@
+#### INCREMENTAL RECOMPUTE FROM CORRECTED OR MISSED GAMES ####
+
+## imports
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from .elo_replay import EloReplayEngine
+from .elo_system import EloSystem
+from .rating_timeline import RatingTimeline, _DAY
+from .team_state import date_to_stamp
+
+
+class GameCorrector:
+    '''
+    Class GameCorrector amends past game results, or inserts games
+      the daily pipeline missed, and recomputes every rating after
+      them without replaying from the first season.
+
+    It rolls back to the nearest RatingTimeline checkpoint before
+      the earliest changed game and replays only from there, so a
+      week-old correction costs about a week of replay.
+    '''
+    def __init__(self, elo: EloSystem, home_advantage: int = None):
+        self.Elo = elo
+        self.home_advantage = elo.home_advantage if home_advantage is None else home_advantage # same default update_ratings uses
+
+    def _engine(self) -> EloReplayEngine:
+        return EloReplayEngine(**dict(self.Elo.replay_parameters(), home_advantage=self.home_advantage))
+
+    def _load_timeline(self) -> RatingTimeline:
+        elo = self.Elo
+        timeline = RatingTimeline.load(
+            elo._timeline_path,
+            elo._store.committed_log_entries() + elo._pending_log_entries(),
+            initial_rating=elo.initial_rating
+        )
+        if len(timeline) == 0:
+            raise ValueError("No rating timeline to correct, run scripts/initialize_elo.py first")
+        if not self.matches_store(timeline):
+            raise ValueError("Rating timeline does not reproduce the stored ratings, rebuild it with scripts/initialize_elo.py")
+        return timeline
+
+    def matches_store(self, timeline: RatingTimeline, teams: set = None) -> bool:
+        '''
+        Returns True if the timeline's final ratings equal the loaded
+          EloSystem's for every rated team (or just those in teams).
+          Rewriting the store from a timeline that does not would
+          replace ratings it never saw.
+        '''
+        final = timeline.final_ratings()
+        return all(
+            final.get(team_id) == rating
+            for team_id, rating in self.Elo.team_ratings.items()
+            if teams is None or team_id in teams
+        )
+
+    def _merge_corrections(self, timeline: RatingTimeline, corrections: List[Dict]):
+        '''
+        Returns (start, dates, home_ids, away_ids, margins, inserted)
+          for the whole corrected game list, where start is the
+          first game whose result or position changed.
+        '''
+        dates = timeline.game_dates.copy()
+        home_ids = timeline.team_ids[timeline.home_codes]
+        away_ids = timeline.team_ids[timeline.away_codes]
+        margins = timeline.margins.astype(np.float64)
+
+        start = len(dates)
+        inserts = []
+        for game in corrections:
+            stamp = date_to_stamp(game['game_date'])
+            margin = float(game['home_pts']) - float(game['away_pts']) # exact, like update_ratings logs it
+
+            day_start = int(np.searchsorted(dates, stamp - stamp % _DAY, side='left'))
+            day_end = int(np.searchsorted(dates, stamp - stamp % _DAY + _DAY, side='left'))
+            same_game = np.flatnonzero(
+                (home_ids[day_start:day_end] == game['home_team_id']) &
+                (away_ids[day_start:day_end] == game['away_team_id'])
+            )
+
+            if len(same_game):
+                idx = day_start + int(same_game[0])
+                if margins[idx] != margin:
+                    margins[idx] = margin
+                    start = min(start, idx)
+            else:
+                pos = int(np.searchsorted(dates, stamp, side='right'))
+                inserts.append((pos, stamp, game['home_team_id'], game['away_team_id'], margin))
+                start = min(start, pos)
+
+        if inserts:
+            positions = [pos for pos, *_ in inserts]
+            dates = np.insert(dates, positions, [g[1] for g in inserts])
+            home_ids = np.insert(home_ids, positions, [g[2] for g in inserts])
+            away_ids = np.insert(away_ids, positions, [g[3] for g in inserts])
+            margins = np.insert(margins, positions, [g[4] for g in inserts])
+
+        return start, dates, home_ids, away_ids, margins, len(inserts)
+
+    def verify(self, timeline: RatingTimeline, start: int = None) -> bool:
+        """
+        Returns True if replaying every game in the timeline from
+          scratch gives bit-identical post-game ratings, final
+          ratings and histories, and the loaded EloSystem's ratings are
+          kept: all of them, or with start set, those of the teams
+          without a game from index start on.
+        """
+        full = self._engine()
+        full.replay(
+            timeline.team_ids[timeline.home_codes],
+            timeline.team_ids[timeline.away_codes],
+            timeline.margins,
+            np.zeros(len(timeline), dtype=np.int64),
+            timeline.game_dates.view('datetime64[us]'),
+        )
+
+        return (
+            np.array_equal(full.home_rating_after, timeline.home_rating_after) and
+            np.array_equal(full.away_rating_after, timeline.away_rating_after) and
+            full.get_ratings() == timeline.final_ratings() and
+            full.get_histories() == timeline.histories() and
+            set(self.Elo.team_ratings) <= set(full.get_ratings()) and
+            self.matches_store(timeline, None if start is None else set(self.Elo.team_ratings) - self._teams_from(timeline, start))
+        )
+
+    def _teams_from(self, timeline: RatingTimeline, start: int) -> set:
+        # ids of the teams playing any game from index start on
+        codes = np.union1d(timeline.home_codes[start:], timeline.away_codes[start:])
+        return set(timeline.team_ids[codes].tolist())
+
+    def apply(self, corrections: List[Dict], verify: bool = False) -> Dict:
+        """
+        Returns a summary dict after amending or inserting each game
+          in corrections and saving the recomputed ratings.
+
+        Each correction has home_team_id, away_team_id, home_pts,
+          away_pts and game_date. A game with the same date and teams
+          as a recorded one amends it, anything else is inserted.
+
+        Raises ValueError unless the saved timeline reproduces the
+          loaded ratings. With verify set nothing is saved unless the
+          result also matches a full replay bit for bit.
+        """
+        elo = self.Elo
+        timeline = self._load_timeline()
+        start, dates, home_ids, away_ids, margins, inserted = self._merge_corrections(timeline, corrections)
+
+        summary = {'changed_from': start, 'replayed_games': len(dates) - start, 'total_games': len(dates), 'inserted': inserted, 'verified': None}
+        if start == len(dates):
+            return summary
+
+        # Roll back to the league state before the first changed game, then replay the rest
+        ratings, masks, counts = timeline._state_at(start)
+        engine = self._engine()
+        engine.seed_state(timeline.team_ids, ratings, masks, counts)
+        engine.replay(home_ids[start:], away_ids[start:], margins[start:], np.zeros(len(dates) - start, dtype=np.int64))
+
+        log_seq = elo._log_seq + inserted
+        timeline.rewrite_from(
+            start, dates[start:], home_ids[start:], away_ids[start:], margins[start:],
+            engine.home_rating_after, engine.away_rating_after, log_seq=log_seq
+        )
+
+        if verify:
+            summary['verified'] = self.verify(timeline, start)
+            if not summary['verified']:
+                return summary
+
+        rating_history, game_history = timeline.histories()
+        elo.team_ratings = timeline.final_ratings()
+        elo.rating_history = rating_history
+        elo.game_history = game_history
+        elo.last_game_date = timeline.game_dates[-1:].view('datetime64[us]')[0].astype(datetime)
+        elo._log_seq = log_seq
+        elo._reset_pending_log()
+
+        # Timeline first: it already holds every logged game, so the snapshot may empty the log
+        timeline.save(elo._timeline_path)
+        elo._save_ratings(compact=True)
+
+        return summary
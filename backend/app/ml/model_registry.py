@@ -0,0 +1,120 @@
+#### REGISTRY OF NAMED ELO RATING MODELS ####
+
+## imports
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict
+
+from .elo_system import RUNTIME_DIR, EloSystem
+
+
+DEFAULT_MODEL = 'elo' # the model stored in db/database.json
+DB_DIR = Path(__file__).parent.parent / "db" # backend/app/db
+REGISTRY_PATH = Path(os.getenv('RATING_MODELS_PATH', DB_DIR / "models.json"))
+
+# EloSystem keyword arguments a model may set, with their defaults
+MODEL_PARAMETERS = {
+    'k_factor': 20,
+    'base_elo': 1300,
+    'home_advantage': 100,
+    'mov_scale': 1.5,
+    'upset_bonus': 1.2,
+    'mov_cap': 15.0,
+    'hot_streak_factor': 0.7,
+    'cold_streak_factor': 1.3,
+}
+_MODEL_NAME = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$') # also a directory name
+
+
+class ModelRegistry:
+    '''
+    Class ModelRegistry names every rating model served side by
+      side, each an EloSystem with its own parameters and store.
+
+    Models are read from a JSON file shaped like
+      {"default": "elo", "models": {"elo_k30": {"k_factor": 30}}}.
+      DEFAULT_MODEL always exists and keeps db/database.json, any
+      other model keeps its files under db/models/<name>/. Without
+      the file only DEFAULT_MODEL is registered.
+    '''
+    def __init__(self, path: Path = REGISTRY_PATH):
+        self.path = Path(path)
+        self.models: Dict[str, Dict] = {DEFAULT_MODEL: {}} # model name: parameter overrides
+        self.default = DEFAULT_MODEL # model served when a request names none
+
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, 'r') as f:
+            config = json.load(f)
+
+        for name, parameters in config.get('models', {}).items():
+            if not _MODEL_NAME.match(name):
+                raise ValueError(f"Invalid model name {name!r} in {self.path}")
+            unknown = set(parameters) - set(MODEL_PARAMETERS)
+            if unknown:
+                raise ValueError(f"Unknown parameters {sorted(unknown)} for model {name!r} in {self.path}")
+            self.models[name] = dict(parameters)
+
+        self.default = config.get('default', DEFAULT_MODEL)
+        if self.default not in self.models:
+            raise ValueError(f"Default model {self.default!r} is not registered in {self.path}")
+        return None
+
+    def names(self) -> list[str]:
+        return list(self.models)
+
+    def parameters(self, name: str) -> Dict:
+        """
+        Returns every parameter of the model, defaults filled in.
+        """
+        return dict(MODEL_PARAMETERS, **self.models[name])
+
+    def save_path(self, name: str) -> Path:
+        if name == DEFAULT_MODEL:
+            return DB_DIR / "database.json"
+        return DB_DIR / "models" / name / "database.json"
+
+    def runtime_dir(self, name: str) -> Path:
+        '''
+        Returns the untracked folder of the model's machine-local
+          files, see EloSystem.
+        '''
+        if name == DEFAULT_MODEL:
+            return RUNTIME_DIR
+        return RUNTIME_DIR / "models" / name
+
+    def create(self, name: str = None) -> EloSystem:
+        """
+        Returns an empty EloSystem for the model (the default one
+          if name is None), set up with its parameters and paths.
+        """
+        name = name or self.default
+        if name not in self.models:
+            raise KeyError(f"Unknown rating model {name!r}")
+
+        save_path = self.save_path(name)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        return EloSystem(save_path=save_path, runtime_dir=self.runtime_dir(name), **self.parameters(name))
+
+    def describe(self) -> Dict:
+        """
+        Returns the default model and every model's parameters.
+        """
+        return {
+            'default': self.default,
+            'models': {name: self.parameters(name) for name in self.models},
+        }
+
+
+
+_singleton_model_registry = None
+def get_model_registry() -> ModelRegistry:
+    global _singleton_model_registry
+
+    if (_singleton_model_registry == None):
+        _singleton_model_registry = ModelRegistry()
+    return _singleton_model_registry
@@ -0,0 +1,202 @@
+#### ONE-PASS UPDATE OF SEVERAL ELO MODELS ####
+
+## imports
+import math
+from typing import List
+
+import numpy as np
+
+from .elo_system import EloSystem
+
+
+# TeamState arrays of the recent games ring, the same in every model rated on the same games
+GAME_RING_FIELDS = ('recent_results', 'game_heads', 'game_counts', 'game_dates', 'game_margins')
+
+
+class MultiModelUpdater:
+    '''
+    Class MultiModelUpdater rates one batch of games into several
+      EloSystems at once, with the same results as calling
+      update_ratings on each of them in turn.
+
+    Game results, and so game history and hot/cold streaks, do not
+      depend on the model. They are worked out once per game on the
+      first model and copied to the others after the batch. Each
+      model only pays for its own rating arithmetic, done on plain
+      python floats like EloReplayEngine, and its rating history and
+      log entries are written in bulk at the end.
+
+    Models whose teams or game history differ (e.g. one was rebuilt
+      from other data) fall back to per-model update_ratings.
+    '''
+    def __init__(self, models: List[EloSystem]):
+        self.models = list(models)
+
+    def _can_share(self) -> bool:
+        '''
+        Returns True if every model has the same teams, in the same
+          dense order, and the same recent games ring.
+        '''
+        leader = self.models[0]._teams
+        for elo in self.models[1:]:
+            teams = elo._teams
+            if teams.team_ids != leader.team_ids or teams.game_limit != leader.game_limit:
+                return False
+            if any(getattr(teams, name) != getattr(leader, name) for name in GAME_RING_FIELDS):
+                return False
+        return True
+
+    def update(self, home_ids: list, away_ids: list, home_scores: list, away_scores: list, game_dates: list) -> None:
+        """
+        Returns None after rating a chronologically sorted batch of
+          games, given as plain python lists, into every model.
+        """
+        models = self.models
+        if not models or not home_ids:
+            return None
+
+        if len(models) == 1 or not self._can_share():
+            for game in zip(home_ids, away_ids, home_scores, away_scores, game_dates):
+                for elo in models:
+                    elo.update_ratings(game[0], game[1], game[2], game[3], None, game[4])
+            return None
+
+        leader = models[0]
+        teams = leader._teams
+        n = len(home_ids)
+        log = math.log
+
+        # Per model settings and rating arrays, unpacked once for the loop
+        settings = [
+            (
+                elo._teams.ratings, elo.initial_rating, elo.k_factor, elo.home_advantage, elo.mov_scale,
+                elo.upset_bonus, elo.mov_cap, elo.hot_streak_factor, elo.cold_streak_factor
+            )
+            for elo in models
+        ]
+        post_home = [[0.0] * n for _ in models]
+        post_away = [[0.0] * n for _ in models]
+        home_codes = [0] * n
+        away_codes = [0] * n
+        margins = [0.0] * n
+        stamps = [0] * n
+
+        for i in range(n):
+            team_home_id = home_ids[i]
+            team_away_id = away_ids[i]
+            if team_home_id not in teams.index or team_away_id not in teams.index:
+                # Same registration order as update_ratings, so dense indices stay aligned
+                for elo in models:
+                    elo._teams.register(team_home_id)
+                    elo._teams.register(team_away_id)
+            h = teams.index[team_home_id]
+            a = teams.index[team_away_id]
+
+            home_pts_margin = home_scores[i] - away_scores[i]
+            actual_home = 1 if home_scores[i] > away_scores[i] else 0
+            actual_away = 1 - actual_home
+            # The winner's streak only picks the factor, hot and cold are the same for every model
+            winner_streak = leader._shared_streak(team_home_id if actual_home else team_away_id)
+            is_hot = winner_streak['is_hot']
+            is_cold = winner_streak['is_cold']
+            base_multiplier_log = log(abs(home_pts_margin) + 1)
+
+            for j, (ratings, initial, k, hca, scale, upset, cap, hot, cold) in enumerate(settings):
+                rating_home = ratings[h]
+                if rating_home != rating_home: # NaN: no rating yet
+                    rating_home = initial
+                rating_away = ratings[a]
+                if rating_away != rating_away:
+                    rating_away = initial
+
+                # Same steps and operand order as update_ratings and _calculate_mov_multiplier
+                expected_home = 1 / (1 + 10 ** ((rating_away - (rating_home + hca)) / 400))
+                expected_away = 1 - expected_home
+                base_change_home = k * (actual_home - expected_home)
+                base_change_away = k * (actual_away - expected_away)
+
+                rating_diff = rating_home - rating_away if actual_home else rating_away - rating_home
+                mov_multiplier = base_multiplier_log * scale * (upset if rating_diff < 0 else 1.0) * (
+                    hot if is_hot else cold if is_cold else 1.0
+                )
+                mov_multiplier = min(mov_multiplier, cap)
+
+                new_rating_home = rating_home + base_change_home + mov_multiplier
+                new_rating_away = rating_away + base_change_away + -mov_multiplier
+                ratings[h] = new_rating_home
+                ratings[a] = new_rating_away
+                post_home[j][i] = new_rating_home
+                post_away[j][i] = new_rating_away
+
+            stamp = leader._date_stamp(game_dates[i])
+            teams.push_game(h, actual_home, home_pts_margin, stamp)
+            teams.push_game(a, actual_away, -home_pts_margin, stamp)
+
+            home_codes[i] = h
+            away_codes[i] = a
+            margins[i] = home_pts_margin # logged exactly, like update_ratings
+            stamps[i] = stamp
+
+        dated = [i for i in range(n) if game_dates[i]]
+        last_date = max((game_dates[i] for i in dated), default=None)
+
+        for j, elo in enumerate(models):
+            if j > 0:
+                for name in GAME_RING_FIELDS:
+                    getattr(elo._teams, name)[:] = getattr(teams, name)
+            if last_date is not None:
+                elo._update_last_game_date(last_date)
+            _push_rating_events(elo, home_codes, away_codes, post_home[j], post_away[j], stamps, dated)
+
+            # Queue every game for the append-only log, as update_ratings does one at a time
+            elo._log_seq += n
+            pending = elo._pending_log
+            pending['date'].extend(stamps)
+            pending['home'].extend(home_ids)
+            pending['away'].extend(away_ids)
+            pending['margin'].extend(margins)
+            pending['home_rating'].extend(post_home[j])
+            pending['away_rating'].extend(post_away[j])
+
+        return None
+
+
+def _push_rating_events(elo: EloSystem, home_codes, away_codes, post_home, post_away, stamps, dated) -> None:
+    '''
+    Returns None after writing the dated games' new ratings into the
+      model's rating history rings, in bulk instead of one
+      push_rating per team per game. Values are only moved, never
+      recomputed, so they match push_rating bit for bit.
+    '''
+    if not dated:
+        return None
+
+    teams = elo._teams
+    limit = teams.rating_limit
+    dated = np.asarray(dated, dtype=np.int64)
+
+    # Events in push order: home then away, game by game
+    team_seq = np.empty(2 * len(dated), dtype=np.int64)
+    team_seq[0::2] = np.asarray(home_codes, dtype=np.int64)[dated]
+    team_seq[1::2] = np.asarray(away_codes, dtype=np.int64)[dated]
+    value_seq = np.empty(2 * len(dated), dtype=np.float64)
+    value_seq[0::2] = np.asarray(post_home, dtype=np.float64)[dated]
+    value_seq[1::2] = np.asarray(post_away, dtype=np.float64)[dated]
+    stamp_seq = np.repeat(np.asarray(stamps, dtype=np.int64)[dated], 2)
+
+    dates_view = np.frombuffer(teams.rating_dates, dtype=np.int64)
+    values_view = np.frombuffer(teams.rating_values, dtype=np.float64)
+
+    order = np.argsort(team_seq, kind='stable')
+    codes, starts, counts = np.unique(team_seq[order], return_index=True, return_counts=True)
+    for idx, start, count in zip(codes.tolist(), starts.tolist(), counts.tolist()):
+        events = order[start:start + count]
+        head = teams.rating_heads[idx]
+        kept = events[-limit:] # older events would be overwritten within this batch anyway
+        slots = idx * limit + (head + np.arange(count - len(kept), count)) % limit
+
+        dates_view[slots] = stamp_seq[kept]
+        values_view[slots] = value_seq[kept]
+        teams.rating_heads[idx] = (head + count) % limit
+        teams.rating_counts[idx] = min(teams.rating_counts[idx] + count, limit)
+    return None
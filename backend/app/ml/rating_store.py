@@ -0,0 +1,223 @@
+#### APPEND-ONLY STORAGE FOR ELO RATINGS ####
+
+## imports
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError: # windows
+    fcntl = None
+    import msvcrt
+
+
+COMPACT_LOG_EVERY = 2000 # logged games before the log is folded into the snapshot
+
+
+class WriterLock:
+    '''
+    Class WriterLock is an exclusive lock on a lock file, shared by
+      every process that writes the rating store, so two updaters
+      never interleave their writes.
+
+    The OS drops the lock when its holder exits, so a crashed
+      updater never leaves the store locked.
+    '''
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Returns True once the lock is held, or False right away if
+          another process holds it and blocking is off.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return None
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+        return None
+
+    def __enter__(self) -> 'WriterLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.release()
+        return False
+
+
+class RatingStore:
+    '''
+    Class RatingStore persists EloSystem state as a JSON snapshot
+      plus an append-only log of per-game rating deltas.
+
+    Daily updates only append to the log. Every COMPACT_LOG_EVERY
+      games the log is folded into a new snapshot, which is written
+      to a temp file and swapped in atomically so a crash never
+      leaves an unreadable store.
+    '''
+    def __init__(self, snapshot_path: Path, log_path: Path = None, compact_every: int = COMPACT_LOG_EVERY, lock_path: Path = None):
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = Path(log_path) if log_path else self.snapshot_path.with_suffix('.log.jsonl')
+        self.lock_path = Path(lock_path) if lock_path else self.snapshot_path.with_suffix('.lock')
+        self.compact_every = compact_every
+        self.log_entries = 0 # committed game entries currently in the log
+        self._valid_log_bytes = None # end of last committed batch, set by load()
+
+    def writer_lock(self) -> WriterLock:
+        """
+        Returns the cross-process lock every writer of this store
+          must hold, see WriterLock.
+        """
+        return WriterLock(self.lock_path)
+
+    def snapshot_exists(self) -> bool:
+        return self.snapshot_path.exists()
+
+    def fingerprint(self) -> tuple:
+        '''
+        Returns (mtime_ns, size) of the snapshot and the log, which
+          changes on every save, so readers can cheaply spot new ratings.
+        '''
+        stats = []
+        for path in (self.snapshot_path, self.log_path):
+            try:
+                stat = path.stat()
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _read_log(self) -> Tuple[List[Dict], str, int]:
+        '''
+        Returns (entries, last_updated, valid_bytes) for every
+          committed batch in the log, stopping at a torn write.
+        '''
+        entries = []
+        batch = []
+        last_updated = None
+        valid_bytes = 0
+        offset = 0
+
+        if self.log_path.exists():
+            with open(self.log_path, 'rb') as f:
+                for raw_line in f:
+                    offset += len(raw_line)
+                    try:
+                        entry = json.loads(raw_line)
+                    except ValueError:
+                        break # torn write, nothing after it was committed
+
+                    if entry.get('type') == 'commit':
+                        entries.extend(batch)
+                        last_updated = entry.get('last_updated', last_updated)
+                        batch = []
+                        valid_bytes = offset
+                    else:
+                        batch.append(entry)
+
+        return entries, last_updated, valid_bytes
+
+    def committed_log_entries(self) -> List[Dict]:
+        """
+        Returns every committed game entry in the log, including
+          any a snapshot already covers.
+        """
+        return self._read_log()[0]
+
+    def load(self) -> Tuple[Dict, List[Dict], str]:
+        """
+        Returns (snapshot, tail, last_updated) where tail holds the
+          committed log entries newer than the snapshot.
+
+        Entries from a batch that never reached its commit marker
+          (a crash mid-append) are dropped.
+        """
+        with open(self.snapshot_path, 'r') as f:
+            snapshot = json.load(f)
+
+        snapshot_seq = snapshot.get('log_seq', 0)
+        entries, log_updated, valid_bytes = self._read_log()
+        tail = [e for e in entries if e['seq'] > snapshot_seq]
+        last_updated = log_updated or snapshot.get('last_updated')
+
+        self.log_entries = len(tail)
+        self._valid_log_bytes = valid_bytes
+
+        return snapshot, tail, last_updated
+
+    def append(self, entries: List[Dict], last_updated: str) -> None:
+        """
+        Returns None and appends one committed batch of game
+          entries to the log, fsynced before returning.
+        """
+        if not entries:
+            return None
+
+        lines = [json.dumps(e, separators=(',', ':')) for e in entries]
+        lines.append(json.dumps({'type': 'commit', 'seq': entries[-1]['seq'], 'last_updated': last_updated}, separators=(',', ':')))
+        payload = ('\n'.join(lines) + '\n').encode()
+
+        with open(self.log_path, 'ab') as f:
+            # Drop any uncommitted bytes a previous crash left behind
+            if self._valid_log_bytes is not None and f.tell() > self._valid_log_bytes:
+                f.truncate(self._valid_log_bytes)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            self._valid_log_bytes = f.tell()
+
+        self.log_entries += len(entries)
+        return None
+
+    def needs_compaction(self) -> bool:
+        return self.log_entries >= self.compact_every
+
+    def write_snapshot(self, data: Dict) -> None:
+        """
+        Returns None and atomically replaces the snapshot, then
+          empties the log it now contains.
+
+        data['log_seq'] must be the seq of the last game it includes,
+          so a crash between the swap and the log reset only leaves
+          entries that load() skips.
+        """
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        with open(self.log_path, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.log_entries = 0
+        self._valid_log_bytes = 0
+        return None
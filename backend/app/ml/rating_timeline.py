@@ -0,0 +1,444 @@
+#### POINT-IN-TIME ELO RATINGS ####
+
+## imports
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .team_state import NO_DATE, date_to_stamp, summarize_streak
+
+
+TIMELINE_FORMAT_VERSION = 1
+CHECKPOINT_EVERY_DAYS = 7 # league state saved at least this often
+SEASON_GAP_DAYS = 60 # a break this long between game days starts a new season
+STREAK_GAMES = 5 # same window as EloSystem.get_recent_streak
+STREAK_MASK = (1 << STREAK_GAMES) - 1
+
+_DAY = timedelta(days=1) // timedelta(microseconds=1) # microseconds per day, the stamp unit
+
+
+class RatingTimeline:
+    '''
+    Class RatingTimeline keeps every game's post-game ratings plus
+      checkpoints of the whole league's ratings and streaks, taken
+      at each season start and at least every CHECKPOINT_EVERY_DAYS.
+
+    An as-of lookup binary searches the last checkpoint before the
+      date and replays the few games between it and the date, so
+      any past day's ratings are rebuilt without replaying history.
+
+    State "as of" a date is the state entering that day, before any
+      of its games, i.e. what a prediction that morning would use.
+    '''
+    def __init__(self, initial_rating: float = 1300, checkpoint_days: int = CHECKPOINT_EVERY_DAYS):
+        self.initial_rating = initial_rating
+        self.checkpoint_days = checkpoint_days
+        self.log_seq = 0 # seq of the last rating log entry included
+
+        self.team_ids = np.empty(0, dtype=np.int64) # dense index: team id
+        self._team_index: dict[int, int] = {}
+
+        # One row per game, in date order
+        self.game_dates = np.empty(0, dtype=np.int64) # stamps, see team_state.date_to_stamp
+        self.home_codes = np.empty(0, dtype=np.int32)
+        self.away_codes = np.empty(0, dtype=np.int32)
+        self.margins = np.empty(0, dtype=np.float64) # home pts - away pts, fractional for mean-imputed scores
+        self.home_rating_after = np.empty(0, dtype=np.float64)
+        self.away_rating_after = np.empty(0, dtype=np.float64)
+
+        # One row per checkpoint: state before game checkpoint_games[i]
+        self.checkpoint_dates = np.zeros(1, dtype=np.int64)
+        self.checkpoint_games = np.zeros(1, dtype=np.int64)
+        self.checkpoint_ratings = np.empty((1, 0), dtype=np.float64) # NaN until a team has played
+        self.checkpoint_masks = np.empty((1, 0), dtype=np.uint8) # last STREAK_GAMES results as bits, bit 0 = latest
+        self.checkpoint_counts = np.empty((1, 0), dtype=np.uint8) # games seen, capped at STREAK_GAMES
+
+    def __len__(self) -> int:
+        return len(self.game_dates)
+
+    ## building
+
+    def _encode(self, team_ids) -> np.ndarray:
+        new_ids = [int(t) for t in dict.fromkeys(team_ids) if int(t) not in self._team_index]
+        if new_ids:
+            for team_id in new_ids:
+                self._team_index[team_id] = len(self._team_index)
+            self.team_ids = np.concatenate([self.team_ids, np.array(new_ids, dtype=np.int64)])
+
+            pad = ((0, 0), (0, len(new_ids)))
+            self.checkpoint_ratings = np.pad(self.checkpoint_ratings, pad, constant_values=np.nan)
+            self.checkpoint_masks = np.pad(self.checkpoint_masks, pad)
+            self.checkpoint_counts = np.pad(self.checkpoint_counts, pad)
+
+        index = self._team_index
+        return np.array([index[int(t)] for t in team_ids], dtype=np.int32)
+
+    def extend(self, game_dates, home_ids, away_ids, margins, home_rating_after, away_rating_after, log_seq: int = None) -> None:
+        """
+        Returns None after appending date-ordered games, adding a
+          checkpoint wherever a season or checkpoint interval starts.
+
+        game_dates are stamps; a missing date (NO_DATE) reuses the
+          previous game's date so the timeline stays sorted.
+        """
+        dates = np.asarray(game_dates, dtype=np.int64).copy()
+        n = len(dates)
+        if n == 0:
+            if log_seq is not None:
+                self.log_seq = log_seq
+            return None
+
+        previous = int(self.game_dates[-1]) if len(self.game_dates) else NO_DATE
+        for i in range(n):
+            if dates[i] == NO_DATE:
+                dates[i] = previous
+            previous = dates[i]
+
+        start = len(self.game_dates)
+        home_codes = self._encode(np.asarray(home_ids).tolist())
+        away_codes = self._encode(np.asarray(away_ids).tolist())
+
+        self.game_dates = np.concatenate([self.game_dates, dates])
+        self.home_codes = np.concatenate([self.home_codes, home_codes])
+        self.away_codes = np.concatenate([self.away_codes, away_codes])
+        self.margins = np.concatenate([self.margins, np.asarray(margins, dtype=np.float64)])
+        self.home_rating_after = np.concatenate([self.home_rating_after, np.asarray(home_rating_after, dtype=np.float64)])
+        self.away_rating_after = np.concatenate([self.away_rating_after, np.asarray(away_rating_after, dtype=np.float64)])
+
+        self._add_checkpoints(start)
+        if log_seq is not None:
+            self.log_seq = log_seq
+        return None
+
+    def extend_from_log(self, entries: List[Dict]) -> None:
+        """
+        Returns None after appending RatingStore log entries newer
+          than the timeline, in the shape EloSystem writes them.
+        """
+        entries = [e for e in entries if e['seq'] > self.log_seq]
+        if not entries:
+            return None
+
+        self.extend(
+            [date_to_stamp(datetime.fromisoformat(e['date'])) if e['date'] else NO_DATE for e in entries],
+            [e['home'] for e in entries],
+            [e['away'] for e in entries],
+            [e['margin'] for e in entries],
+            [e['home_rating'] for e in entries],
+            [e['away_rating'] for e in entries],
+            log_seq=entries[-1]['seq'],
+        )
+        return None
+
+    def _add_checkpoints(self, start: int) -> None:
+        '''
+        Returns None after walking games from `start` on and saving
+          the league state before each game day that opens a new
+          season or checkpoint interval.
+        '''
+        ratings, masks, counts = self._state_at(start)
+        ratings = ratings.copy()
+        masks = masks.copy()
+        counts = counts.copy()
+
+        dates = self.game_dates.tolist()
+        home = self.home_codes.tolist()
+        away = self.away_codes.tolist()
+        margins = self.margins.tolist()
+        interval = self.checkpoint_days * _DAY
+        season_gap = SEASON_GAP_DAYS * _DAY
+
+        last_checkpoint = int(self.checkpoint_dates[-1])
+        new_dates, new_games, new_ratings, new_masks, new_counts = [], [], [], [], []
+
+        for i in range(start, len(dates)):
+            day = dates[i]
+            if i > 0 and day != dates[i - 1]:
+                new_season = day - dates[i - 1] >= season_gap
+                if new_season or day // interval != last_checkpoint // interval:
+                    new_dates.append(day)
+                    new_games.append(i)
+                    new_ratings.append(ratings.copy())
+                    new_masks.append(masks.copy())
+                    new_counts.append(counts.copy())
+                    last_checkpoint = day
+
+            self._apply_game(i, home[i], away[i], margins[i], ratings, masks, counts)
+
+        if new_dates:
+            self.checkpoint_dates = np.concatenate([self.checkpoint_dates, new_dates])
+            self.checkpoint_games = np.concatenate([self.checkpoint_games, new_games])
+            self.checkpoint_ratings = np.vstack([self.checkpoint_ratings, new_ratings])
+            self.checkpoint_masks = np.vstack([self.checkpoint_masks, new_masks])
+            self.checkpoint_counts = np.vstack([self.checkpoint_counts, new_counts])
+
+        return None
+
+    def rewrite_from(self, start: int, game_dates, home_ids, away_ids, margins, home_rating_after, away_rating_after, log_seq: int = None) -> None:
+        """
+        Returns None after replacing every game from index `start`
+          on, dropping the checkpoints those games produced.
+        """
+        keep = int(np.searchsorted(self.checkpoint_games, start, side='left'))
+        keep = max(keep, 1) # the empty league checkpoint always stays
+
+        self.checkpoint_dates = self.checkpoint_dates[:keep]
+        self.checkpoint_games = self.checkpoint_games[:keep]
+        self.checkpoint_ratings = self.checkpoint_ratings[:keep]
+        self.checkpoint_masks = self.checkpoint_masks[:keep]
+        self.checkpoint_counts = self.checkpoint_counts[:keep]
+
+        self.game_dates = self.game_dates[:start]
+        self.home_codes = self.home_codes[:start]
+        self.away_codes = self.away_codes[:start]
+        self.margins = self.margins[:start]
+        self.home_rating_after = self.home_rating_after[:start]
+        self.away_rating_after = self.away_rating_after[:start]
+
+        self.extend(game_dates, home_ids, away_ids, margins, home_rating_after, away_rating_after, log_seq=log_seq)
+        return None
+
+    ## as-of lookups
+
+    def _apply_game(self, i: int, h: int, a: int, margin: float, ratings, masks, counts) -> None:
+        home_won = 1 if margin > 0 else 0
+        ratings[h] = self.home_rating_after[i]
+        ratings[a] = self.away_rating_after[i]
+        masks[h] = ((int(masks[h]) << 1) | home_won) & STREAK_MASK
+        masks[a] = ((int(masks[a]) << 1) | (1 - home_won)) & STREAK_MASK
+        counts[h] = min(int(counts[h]) + 1, STREAK_GAMES)
+        counts[a] = min(int(counts[a]) + 1, STREAK_GAMES)
+
+    def _state_at(self, game_index: int):
+        '''
+        Returns (ratings, masks, counts) before game `game_index`,
+          from the nearest checkpoint plus a short replay.
+        '''
+        cp = int(np.searchsorted(self.checkpoint_games, game_index, side='right')) - 1
+        ratings = self.checkpoint_ratings[cp]
+        masks = self.checkpoint_masks[cp]
+        counts = self.checkpoint_counts[cp]
+
+        first = int(self.checkpoint_games[cp])
+        if first == game_index:
+            return ratings, masks, counts
+
+        ratings = ratings.copy()
+        masks = masks.copy()
+        counts = counts.copy()
+        home = self.home_codes
+        away = self.away_codes
+        margins = self.margins
+        for i in range(first, game_index):
+            self._apply_game(i, int(home[i]), int(away[i]), float(margins[i]), ratings, masks, counts)
+
+        return ratings, masks, counts
+
+    def state_as_of(self, as_of: datetime):
+        """
+        Returns (ratings, masks, counts, games_before) entering the
+          day `as_of`, indexed like team_ids.
+        """
+        games_before = int(np.searchsorted(self.game_dates, date_to_stamp(as_of), side='left'))
+        ratings, masks, counts = self._state_at(games_before)
+        return ratings, masks, counts, games_before
+
+    def ratings_as_of(self, as_of: datetime) -> Dict[int, float]:
+        """
+        Returns every rated team's rating entering the day `as_of`.
+        """
+        ratings = self.state_as_of(as_of)[0]
+        return {
+            int(team_id): float(rating)
+            for team_id, rating in zip(self.team_ids, ratings)
+            if rating == rating # skip NaN, the team had not played yet
+        }
+
+    def predict_as_of(
+        self,
+        team_home_id: int,
+        team_away_id: int,
+        as_of: datetime,
+        home_court_advantage: int = 100
+    ) -> Dict[str, float]:
+        """
+        Returns the prediction EloSystem.predict would have made on
+          the morning of `as_of`, in the same shape.
+        """
+        ratings, masks, counts, _ = self.state_as_of(as_of)
+
+        def team_state(team_id: int):
+            idx = self._team_index.get(team_id)
+            if idx is None or ratings[idx] != ratings[idx]:
+                return self.initial_rating, summarize_streak(0, 0)
+            mask = int(masks[idx])
+            return float(ratings[idx]), summarize_streak(mask.bit_count(), int(counts[idx]))
+
+        rating_home, home_streak = team_state(team_home_id)
+        rating_away, away_streak = team_state(team_away_id)
+
+        prob_home_wins = 1 / (1 + 10 ** ((rating_away - (rating_home + home_court_advantage)) / 400))
+        prob_away_wins = 1 - prob_home_wins
+
+        return {
+            'home_win_probability': prob_home_wins,
+            'away_win_probability': prob_away_wins,
+            'home_rating': rating_home,
+            'away_rating': rating_away,
+            'home_streak': home_streak,
+            'away_streak': away_streak,
+            'confidence': max(prob_home_wins, prob_away_wins)
+        }
+
+    def final_ratings(self) -> Dict[int, float]:
+        """
+        Returns every team's rating after the last game.
+        """
+        ratings = self._state_at(len(self.game_dates))[0]
+        return {
+            int(team_id): float(rating)
+            for team_id, rating in zip(self.team_ids, ratings)
+            if rating == rating
+        }
+
+    def histories(self):
+        """
+        Returns (rating_history, game_history) as EloSystem would
+          hold them after playing every game in the timeline.
+        """
+        from .elo_replay import build_histories
+
+        return build_histories(
+            self.team_ids, self.home_codes, self.away_codes, self.margins,
+            self.game_dates.view('datetime64[us]'), self.home_rating_after, self.away_rating_after
+        )
+
+    def first_date(self):
+        if len(self.game_dates) == 0:
+            return None
+        return datetime(1970, 1, 1) + timedelta(microseconds=int(self.game_dates[0]))
+
+    def last_date(self):
+        if len(self.game_dates) == 0:
+            return None
+        return datetime(1970, 1, 1) + timedelta(microseconds=int(self.game_dates[-1]))
+
+    def season_records(self, as_of: datetime) -> Optional[Dict[int, tuple]]:
+        """
+        Returns {team id: (wins, losses)} entering the day `as_of` in
+          the season it belongs to, the games since the last break of
+          SEASON_GAP_DAYS or more. Once SEASON_GAP_DAYS have passed
+          since the last game a new season is under way and nobody has
+          a record yet, so the result is {}.
+
+        Returns None if the timeline has no games to tell from.
+        """
+        if len(self.game_dates) == 0:
+            return None
+
+        end = int(np.searchsorted(self.game_dates, date_to_stamp(as_of), side='left'))
+        if end == 0 or date_to_stamp(as_of) - int(self.game_dates[end - 1]) >= SEASON_GAP_DAYS * _DAY:
+            return {}
+
+        gaps = np.flatnonzero(np.diff(self.game_dates[:end]) >= SEASON_GAP_DAYS * _DAY)
+        start = int(gaps[-1]) + 1 if len(gaps) else 0
+
+        home, away = self.home_codes[start:end], self.away_codes[start:end]
+        home_won = self.margins[start:end] > 0
+        n_teams = len(self.team_ids)
+        wins = np.bincount(home[home_won], minlength=n_teams) + np.bincount(away[~home_won], minlength=n_teams)
+        played = np.bincount(home, minlength=n_teams) + np.bincount(away, minlength=n_teams)
+
+        return {
+            int(team_id): (int(won), int(games - won))
+            for team_id, won, games in zip(self.team_ids, wins, played)
+            if games
+        }
+
+    ## persistence
+
+    def save(self, path: Path) -> None:
+        """
+        Returns None after writing the timeline to a .npz file,
+          swapped in atomically.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp.npz')
+        np.savez(
+            tmp_path,
+            meta=np.array([TIMELINE_FORMAT_VERSION, self.log_seq, self.checkpoint_days], dtype=np.int64),
+            initial_rating=np.array(self.initial_rating, dtype=np.float64),
+            team_ids=self.team_ids,
+            game_dates=self.game_dates,
+            home_codes=self.home_codes,
+            away_codes=self.away_codes,
+            margins=self.margins,
+            home_rating_after=self.home_rating_after,
+            away_rating_after=self.away_rating_after,
+            checkpoint_dates=self.checkpoint_dates,
+            checkpoint_games=self.checkpoint_games,
+            checkpoint_ratings=self.checkpoint_ratings,
+            checkpoint_masks=self.checkpoint_masks,
+            checkpoint_counts=self.checkpoint_counts,
+        )
+        os.replace(tmp_path, path)
+        return None
+
+    @classmethod
+    def load(cls, path: Path, log_entries: List[Dict] = None, initial_rating: float = 1300) -> 'RatingTimeline':
+        """
+        Returns the timeline saved at `path` extended with any newer
+          log entries, or an empty one if none was saved.
+
+        The log only holds the games since the last snapshot, so it
+          never starts a timeline by itself: teams that have not
+          played since would read as unrated. scripts/initialize_elo.py
+          builds the first one.
+        """
+        path = Path(path)
+        timeline = cls(initial_rating=initial_rating)
+        if not path.exists():
+            return timeline
+
+        with np.load(path) as data:
+            version, log_seq, checkpoint_days = data['meta'].tolist()
+            if version != TIMELINE_FORMAT_VERSION:
+                print(f"Ignoring timeline {path} with format version {version}")
+                return timeline
+
+            timeline.initial_rating = float(data['initial_rating'])
+            timeline.checkpoint_days = checkpoint_days
+            timeline.log_seq = log_seq
+            for name in (
+                'team_ids', 'game_dates', 'home_codes', 'away_codes', 'margins',
+                'home_rating_after', 'away_rating_after', 'checkpoint_dates', 'checkpoint_games',
+                'checkpoint_ratings', 'checkpoint_masks', 'checkpoint_counts',
+            ):
+                setattr(timeline, name, data[name])
+            timeline._team_index = {int(t): idx for idx, t in enumerate(timeline.team_ids)}
+
+        if log_entries:
+            timeline.extend_from_log(log_entries)
+        return timeline
+
+    @classmethod
+    def from_engine(cls, engine, log_seq: int = 0, checkpoint_days: int = CHECKPOINT_EVERY_DAYS) -> 'RatingTimeline':
+        """
+        Returns a timeline of every game an EloReplayEngine replayed
+          (with game dates), e.g. while initializing ratings.
+        """
+        timeline = cls(initial_rating=engine.initial_rating, checkpoint_days=checkpoint_days)
+        team_ids = np.asarray(engine.team_ids, dtype=np.int64)
+        timeline.extend(
+            engine.game_dates.astype(np.int64),
+            team_ids[engine.home_codes],
+            team_ids[engine.away_codes],
+            engine.margins,
+            engine.home_rating_after,
+            engine.away_rating_after,
+            log_seq=log_seq,
+        )
+        return timeline
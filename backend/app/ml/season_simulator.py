@@ -0,0 +1,275 @@
+#### MONTE CARLO SEASON AND PLAYOFF SIMULATOR ####
+
+## imports
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+
+# Eastern conference franchises by nba api team id, every other team plays in the West
+EAST_TEAM_IDS = frozenset({
+    1610612737, 1610612738, 1610612739, 1610612741, 1610612748,
+    1610612749, 1610612751, 1610612752, 1610612753, 1610612754,
+    1610612755, 1610612761, 1610612764, 1610612765, 1610612766,
+})
+CONFERENCES = ('East', 'West')
+PLAY_IN_SEEDS = 10 # seeds 1-6 go straight through, 7-10 play in for the last two spots
+SERIES_HOME_GAMES = np.array([1, 1, 0, 0, 1, 0, 1], dtype=bool) # 2-2-1-1-1 from the home court team's side
+STAGES = ('playoffs', 'second_round', 'conference_finals', 'finals', 'champion')
+CHUNK_SIMULATIONS = 5000 # simulations per work unit, fixed so results never depend on the worker count
+
+
+class SeasonSimulator:
+    '''
+    Class SeasonSimulator plays the rest of a season forward many
+      times from the current Elo ratings, then the play-in and the
+      playoffs, and counts how often each team finishes on each win
+      total, seed and playoff round.
+
+    A chunk of simulations is drawn at once as NumPy arrays. With
+      update_ratings the ratings move after every simulated game, so
+      a simulated hot streak carries into the playoffs. That update
+      is plain Elo without the margin of victory multiplier, since
+      no margin is drawn.
+    '''
+    def __init__(
+        self,
+        ratings: Dict[int, float],
+        home_advantage: int = 100,
+        k_factor: int = 20,
+        initial_rating: float = 1300,
+        update_ratings: bool = False
+    ):
+        self.ratings = ratings # team id: current elo
+        self.home_advantage = home_advantage
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.update_ratings = update_ratings
+
+    def _prepare(self, home_ids: List[int], away_ids: List[int], records: Dict[int, tuple]) -> None:
+        '''
+        Returns None after encoding teams, schedule and current
+          records as the dense arrays every chunk works on.
+        '''
+        team_ids = sorted(set(self.ratings) | set(home_ids) | set(away_ids) | set(records))
+        index = {team_id: idx for idx, team_id in enumerate(team_ids)}
+        n_teams = len(team_ids)
+
+        self.team_ids = team_ids
+        self.home = np.array([index[t] for t in home_ids], dtype=np.int64)
+        self.away = np.array([index[t] for t in away_ids], dtype=np.int64)
+        self.base_ratings = np.array([self.ratings.get(t, self.initial_rating) for t in team_ids], dtype=np.float64)
+        self.base_wins = np.array([records.get(t, (0, 0))[0] for t in team_ids], dtype=np.int64)
+        self.base_losses = np.array([records.get(t, (0, 0))[1] for t in team_ids], dtype=np.int64)
+        self.games_left = np.bincount(self.home, minlength=n_teams) + np.bincount(self.away, minlength=n_teams)
+        self.max_wins = int((self.base_wins + self.games_left).max()) if n_teams else 0
+
+        self.conference = np.array([0 if t in EAST_TEAM_IDS else 1 for t in team_ids], dtype=np.int64)
+        self.conference_members = [np.flatnonzero(self.conference == c) for c in range(len(CONFERENCES))]
+        for name, members in zip(CONFERENCES, self.conference_members):
+            if len(members) < PLAY_IN_SEEDS:
+                raise ValueError(f"{name} has {len(members)} teams, a play-in needs at least {PLAY_IN_SEEDS}")
+
+        # One-hot team columns, so a chunk's win totals are two matrix products
+        self.home_onehot = np.zeros((len(self.home), n_teams), dtype=np.float32)
+        self.home_onehot[np.arange(len(self.home)), self.home] = 1
+        self.away_onehot = np.zeros((len(self.away), n_teams), dtype=np.float32)
+        self.away_onehot[np.arange(len(self.away)), self.away] = 1
+        return None
+
+    def _win_prob(self, ratings: np.ndarray, home: np.ndarray, away: np.ndarray) -> np.ndarray:
+        rows = np.arange(len(home))
+        return 1 / (1 + 10 ** ((ratings[rows, away] - ratings[rows, home] - self.home_advantage) / 400))
+
+    def _play_game(self, rng, ratings: np.ndarray, home: np.ndarray, away: np.ndarray):
+        '''
+        Returns (winners, losers) of one single game per simulation.
+        '''
+        home_won = rng.random(len(home)) < self._win_prob(ratings, home, away)
+        return np.where(home_won, home, away), np.where(home_won, away, home)
+
+    def _play_series(self, rng, ratings: np.ndarray, standing: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        '''
+        Returns the winners of a best of seven per simulation, home
+          court going to the team with the better regular season.
+
+        All seven games are drawn: whoever wins four or more of them
+          is whoever would have won four first.
+        '''
+        rows = np.arange(len(first))
+        first_hosts = standing[rows, first] >= standing[rows, second]
+        high = np.where(first_hosts, first, second)
+        low = np.where(first_hosts, second, first)
+
+        p_home = self._win_prob(ratings, high, low)
+        p_road = 1 - self._win_prob(ratings, low, high)
+        p_high = np.where(SERIES_HOME_GAMES, p_home[:, None], p_road[:, None])
+
+        high_won = (rng.random(p_high.shape) < p_high).sum(axis=1) >= 4
+        return np.where(high_won, high, low)
+
+    def _simulate_chunk(self, n_sims: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+        '''
+        Returns the win total, seed and playoff stage counts of
+          n_sims simulated seasons, drawn from their own seed.
+        '''
+        rng = np.random.default_rng(seed)
+        n_teams = len(self.team_ids)
+        wins = np.tile(self.base_wins, (n_sims, 1))
+
+        if self.update_ratings:
+            ratings = np.tile(self.base_ratings, (n_sims, 1))
+            for home, away in zip(self.home.tolist(), self.away.tolist()):
+                p_home = 1 / (1 + 10 ** ((ratings[:, away] - ratings[:, home] - self.home_advantage) / 400))
+                home_won = rng.random(n_sims) < p_home
+                change = self.k_factor * (home_won - p_home)
+                ratings[:, home] += change
+                ratings[:, away] -= change
+                wins[:, home] += home_won
+                wins[:, away] += ~home_won
+        else:
+            ratings = np.broadcast_to(self.base_ratings, (n_sims, n_teams))
+            p_home = 1 / (1 + 10 ** ((self.base_ratings[self.away] - self.base_ratings[self.home] - self.home_advantage) / 400))
+            home_won = (rng.random((n_sims, len(self.home)), dtype=np.float32) < p_home).astype(np.float32)
+            wins += (home_won @ self.home_onehot + (1 - home_won) @ self.away_onehot).astype(np.int64)
+
+        win_counts = np.stack([np.bincount(wins[:, t], minlength=self.max_wins + 1) for t in range(n_teams)])
+        seed_counts = np.zeros((n_teams, PLAY_IN_SEEDS), dtype=np.int64)
+        stage_counts = np.zeros((n_teams, len(STAGES)), dtype=np.int64)
+
+        def count_stage(stage: str, teams: List[np.ndarray]) -> None:
+            stage_counts[:, STAGES.index(stage)] += np.bincount(np.concatenate(teams), minlength=n_teams)
+
+        # Ties in the standings are broken at random
+        standing = wins + rng.random((n_sims, n_teams)) * 0.5
+        conference_champions = []
+
+        for members in self.conference_members:
+            order = members[np.argsort(-standing[:, members], axis=1)] # team codes, best record first
+            for seed_idx in range(PLAY_IN_SEEDS):
+                seed_counts[:, seed_idx] += np.bincount(order[:, seed_idx], minlength=n_teams)
+
+            # Play-in: 7 hosts 8 for the 7 seed, its loser hosts the 9/10 winner for the 8 seed
+            seventh, loser_78 = self._play_game(rng, ratings, order[:, 6], order[:, 7])
+            winner_910, _ = self._play_game(rng, ratings, order[:, 8], order[:, 9])
+            eighth, _ = self._play_game(rng, ratings, loser_78, winner_910)
+
+            seeds = [order[:, 0], order[:, 1], order[:, 2], order[:, 3], order[:, 4], order[:, 5], seventh, eighth]
+            count_stage('playoffs', seeds)
+
+            first_round = [
+                self._play_series(rng, ratings, standing, seeds[0], seeds[7]),
+                self._play_series(rng, ratings, standing, seeds[3], seeds[4]),
+                self._play_series(rng, ratings, standing, seeds[1], seeds[6]),
+                self._play_series(rng, ratings, standing, seeds[2], seeds[5]),
+            ]
+            count_stage('second_round', first_round)
+
+            second_round = [
+                self._play_series(rng, ratings, standing, first_round[0], first_round[1]),
+                self._play_series(rng, ratings, standing, first_round[2], first_round[3]),
+            ]
+            count_stage('conference_finals', second_round)
+
+            champion = self._play_series(rng, ratings, standing, second_round[0], second_round[1])
+            count_stage('finals', [champion])
+            conference_champions.append(champion)
+
+        count_stage('champion', [self._play_series(rng, ratings, standing, *conference_champions)])
+
+        return {'wins': win_counts, 'seeds': seed_counts, 'stages': stage_counts}
+
+    def _summarize(self, totals: Dict[str, np.ndarray], simulations: int, seed: int) -> Dict:
+        teams = []
+        for idx, team_id in enumerate(self.team_ids):
+            distribution = totals['wins'][idx] / simulations
+            cdf = np.cumsum(distribution)
+            teams.append({
+                'team_id': team_id,
+                'conference': CONFERENCES[self.conference[idx]],
+                'current_wins': int(self.base_wins[idx]),
+                'current_losses': int(self.base_losses[idx]),
+                'games_remaining': int(self.games_left[idx]),
+                'rating': float(self.base_ratings[idx]),
+                'mean_wins': float(distribution @ np.arange(len(distribution))),
+                'wins_p10': int(np.searchsorted(cdf, 0.1)),
+                'wins_p50': int(np.searchsorted(cdf, 0.5)),
+                'wins_p90': int(np.searchsorted(cdf, 0.9)),
+                'win_distribution': {wins: float(p) for wins, p in enumerate(distribution) if p > 0},
+                'seed_probabilities': (totals['seeds'][idx] / simulations).tolist(), # seeds 1-10
+                **{f"{stage}_probability": float(totals['stages'][idx, i] / simulations) for i, stage in enumerate(STAGES)},
+            })
+        teams.sort(key=lambda team: -team['mean_wins'])
+
+        return {
+            'simulations': simulations,
+            'seed': seed,
+            'update_ratings': self.update_ratings,
+            'games_remaining': len(self.home),
+            'teams': teams,
+        }
+
+    def run(
+        self,
+        home_ids: List[int],
+        away_ids: List[int],
+        simulations: int = 10_000,
+        seed: int = 0,
+        records: Dict[int, tuple] = None,
+        workers: int = None,
+        pool: Executor = None
+    ) -> Dict:
+        """
+        Returns per-team win distributions, seed and playoff odds over
+          `simulations` runs of the remaining schedule, game i being
+          home_ids[i] vs away_ids[i]. records holds each team's
+          current (wins, losses).
+
+        Simulations are split into fixed chunks, each with its own
+          child of `seed`, and spread over a process pool, so the same
+          seed gives the same result on any number of workers.
+
+        A long-lived pool shared by every run (e.g. a server's, see
+          simulation_pool) is used as is. Otherwise a pool of `workers`
+          processes is started for this run only.
+        """
+        if len(home_ids) != len(away_ids):
+            raise ValueError("home_ids and away_ids must be the same length")
+        if simulations < 1:
+            raise ValueError("simulations must be positive")
+        self._prepare(list(home_ids), list(away_ids), records or {})
+
+        sizes = [CHUNK_SIMULATIONS] * (simulations // CHUNK_SIMULATIONS)
+        if simulations % CHUNK_SIMULATIONS:
+            sizes.append(simulations % CHUNK_SIMULATIONS)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        workers = min(workers or os.cpu_count() or 1, len(sizes))
+
+        if pool is not None and len(sizes) > 1:
+            # Chunks carry the prepared simulator, a shared pool has no per-run initializer
+            partials = list(pool.map(_simulate_in_worker, [(self, n_sims, chunk_seed) for n_sims, chunk_seed in zip(sizes, seeds)]))
+        elif pool is None and workers > 1:
+            with simulation_pool(workers) as own_pool:
+                partials = list(own_pool.map(_simulate_in_worker, [(self, n_sims, chunk_seed) for n_sims, chunk_seed in zip(sizes, seeds)]))
+        else:
+            partials = [self._simulate_chunk(n_sims, chunk_seed) for n_sims, chunk_seed in zip(sizes, seeds)]
+
+        totals = {key: sum(partial[key] for partial in partials) for key in ('wins', 'seeds', 'stages')}
+        return self._summarize(totals, simulations, seed)
+
+
+def simulation_pool(workers: int = None) -> ProcessPoolExecutor:
+    '''
+    Returns a process pool for simulation chunks. Workers are
+      spawned rather than forked, forking a process that runs
+      threads (e.g. a web server) can deadlock the child.
+    '''
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _simulate_in_worker(chunk: tuple) -> Dict[str, np.ndarray]:
+    simulator, n_sims, seed = chunk
+    return simulator._simulate_chunk(n_sims, seed)
@@ -0,0 +1,81 @@
+#### PREBUILT BINARY RATINGS SNAPSHOT FOR THE API ####
+
+## imports
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+
+def write_serving_snapshot(elo, path: Path, source_fingerprint: tuple) -> None:
+    '''
+    Returns None after writing the EloSystem's ratings, streaks and
+      histories as raw typed arrays plus a small JSON header,
+      swapped in atomically.
+
+    source_fingerprint is the RatingStore fingerprint the state
+      matches, a reader whose store has moved on ignores the file.
+    '''
+    path = Path(path)
+    teams = elo._teams
+    meta = {
+        'format': FORMAT_VERSION,
+        'source': source_fingerprint,
+        'team_ids': teams.team_ids,
+        'game_limit': teams.game_limit,
+        'rating_limit': teams.rating_limit,
+        'team_names': elo.team_names,
+        'last_game_date': elo.last_game_date.isoformat() if elo.last_game_date else None,
+        'last_updated': elo.last_updated,
+        'k_factor': elo.k_factor,
+        'initial_rating': elo.initial_rating,
+        'log_seq': elo._log_seq,
+    }
+    arrays = {name: np.frombuffer(getattr(teams, name), dtype=getattr(teams, name).typecode) for name in teams.ARRAY_FIELDS}
+
+    # Unique temp name, several API workers may rebuild the same snapshot at once
+    path.parent.mkdir(parents=True, exist_ok=True) # the runtime dir is not created by a checkout
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+    return None
+
+
+def load_serving_snapshot(elo, path: Path, source_fingerprint: tuple) -> bool:
+    '''
+    Returns True after loading the snapshot at path onto elo, or
+      False, leaving elo untouched, when it is missing, unreadable
+      or was built from a different store fingerprint.
+    '''
+    path = Path(path)
+    if not path.exists():
+        return False
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != FORMAT_VERSION or meta['source'] != json.loads(json.dumps(source_fingerprint)):
+                return False
+            if (meta['game_limit'], meta['rating_limit']) != (elo._teams.game_limit, elo._teams.rating_limit):
+                return False
+            arrays = {name: data[name].tobytes() for name in elo._teams.ARRAY_FIELDS}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading serving snapshot {path}: {e}")
+        return False
+
+    elo._teams.restore(meta['team_ids'], arrays)
+    elo.team_names = meta['team_names']
+    elo.last_game_date = datetime.fromisoformat(meta['last_game_date']) if meta['last_game_date'] else None
+    elo.last_updated = meta['last_updated']
+    elo.k_factor = meta['k_factor']
+    elo.initial_rating = meta['initial_rating']
+    elo._log_seq = meta['log_seq']
+    elo._reset_pending_log()
+    return True
+
@@ -0,0 +1,242 @@
+#### MEMORY-MAPPED RATINGS SHARED BY EVERY API WORKER ####
+
+## imports
+import json
+import mmap
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from .rating_store import WriterLock
+
+
+FORMAT_VERSION = 1
+MAGIC = b'ELOSHRD1'
+STREAK_GAMES = 5 # same window as EloSystem.get_recent_streak
+
+# name: dtype of every array a segment holds, in file order
+SEGMENT_ARRAYS = {
+    'team_ids': np.int64, # rated teams, in serving order
+    'ratings': np.float64,
+    'home_win_matrix': np.float64, # [home, away] win probability of the home team
+    'streak_wins': np.int64,
+    'streak_played': np.int64,
+    'sorted_team_ids': np.int64, # team_ids sorted, for searchsorted lookups
+    'sorted_ratings': np.float64,
+}
+
+
+def normalize_fingerprint(fingerprint) -> list:
+    '''
+    Returns a RatingStore fingerprint as it reads back from JSON,
+      so fresh and stored fingerprints compare equal.
+    '''
+    return json.loads(json.dumps(fingerprint))
+
+
+class SharedRatings:
+    '''
+    Class SharedRatings is one published generation of serving
+      ratings: a small JSON header plus read-only numpy arrays,
+      see SEGMENT_ARRAYS.
+
+    Opened from a segment file the arrays are views straight into
+      the memory map, so every worker reading the same generation
+      shares the same pages of the OS page cache.
+    '''
+    def __init__(self, meta: Dict, arrays: Dict[str, np.ndarray], mapping: mmap.mmap = None):
+        self.meta = meta
+        self.generation: int = meta['generation'] # publish counter, 0 for a private unpublished copy
+        self.source = meta['source'] # store fingerprint the ratings were built from
+        self.stamp: str = meta['stamp'] # version stamp written by the updater
+        self.modified_at = datetime.fromisoformat(meta['modified_at'])
+        self.team_names = meta['team_names']
+        self.k_factor = meta['k_factor']
+        self.initial_rating = meta['initial_rating']
+        self.home_advantage = meta['home_advantage'] # the one the prediction matrix was built with
+        self._mapping = mapping # kept open while any view is alive
+        for name in SEGMENT_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def team_ratings(self) -> Dict[int, float]:
+        return dict(zip(self.team_ids.tolist(), self.ratings.tolist()))
+
+
+def build_shared_ratings(elo, source_fingerprint: tuple, home_advantage: float = None) -> SharedRatings:
+    '''
+    Returns a private, unpublished SharedRatings of the EloSystem's
+      current ratings, streaks and prediction matrix, by default
+      with the system's own home advantage.
+    '''
+    if home_advantage is None:
+        home_advantage = elo.home_advantage
+    team_ratings = elo.team_ratings
+    team_ids = np.fromiter(team_ratings.keys(), dtype=np.int64, count=len(team_ratings))
+    ratings = np.fromiter(team_ratings.values(), dtype=np.float64, count=len(team_ratings))
+
+    streak_wins = np.zeros(len(team_ids), dtype=np.int64)
+    streak_played = np.zeros(len(team_ids), dtype=np.int64)
+    for i, team_id in enumerate(team_ids.tolist()):
+        streak = elo.get_recent_streak(team_id, STREAK_GAMES)
+        streak_wins[i] = streak['wins']
+        streak_played[i] = streak['wins'] + streak['losses']
+
+    # Same expression as EloSystem._calculate_win_chance, elementwise
+    home_win_matrix = 1 / (1 + 10 ** ((ratings[np.newaxis, :] - (ratings[:, np.newaxis] + home_advantage)) / 400))
+    order = np.argsort(team_ids, kind='stable')
+
+    modified_at = datetime.fromisoformat(elo.last_updated) if elo.last_updated else elo.last_game_date
+    meta = {
+        'format': FORMAT_VERSION,
+        'generation': 0,
+        'source': normalize_fingerprint(source_fingerprint),
+        'stamp': elo.last_updated or elo.last_game_date.isoformat(),
+        'modified_at': modified_at.isoformat(),
+        'team_names': elo.team_names,
+        'k_factor': elo.k_factor,
+        'initial_rating': elo.initial_rating,
+        'home_advantage': home_advantage,
+    }
+    arrays = {
+        'team_ids': team_ids,
+        'ratings': ratings,
+        'home_win_matrix': home_win_matrix,
+        'streak_wins': streak_wins,
+        'streak_played': streak_played,
+        'sorted_team_ids': team_ids[order],
+        'sorted_ratings': ratings[order],
+    }
+    return SharedRatings(meta, arrays)
+
+
+def read_pointer(pointer_path: Path) -> Optional[Dict]:
+    '''
+    Returns {'generation', 'segment', 'source'} of the published
+      generation, or None if nothing was published yet.
+    '''
+    try:
+        with open(pointer_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Error reading shared ratings pointer {pointer_path}: {e}")
+        return None
+
+
+def publish_lock(pointer_path: Path) -> WriterLock:
+    '''
+    Returns the lock held while publishing, so concurrent
+      publishers never hand out the same generation twice.
+    '''
+    return WriterLock(Path(pointer_path).with_suffix('.lock'))
+
+
+def publish_shared_ratings(shared: SharedRatings, pointer_path: Path) -> int:
+    '''
+    Returns the new generation after writing shared to its own
+      segment file and atomically pointing pointer_path at it.
+
+    Call with publish_lock held. Segments older than the previous
+      generation are removed, the previous one stays for readers
+      that read the pointer just before the flip.
+    '''
+    pointer_path = Path(pointer_path)
+    pointer_path.parent.mkdir(parents=True, exist_ok=True)
+    current = read_pointer(pointer_path)
+    generation = (current['generation'] if current else 0) + 1
+
+    meta = dict(shared.meta, generation=generation)
+    layout = {}
+    offset = 0
+    for name, dtype in SEGMENT_ARRAYS.items():
+        values = np.ascontiguousarray(getattr(shared, name), dtype=dtype)
+        layout[name] = [offset, list(values.shape)]
+        offset += values.nbytes
+    meta['arrays'] = layout
+
+    header = json.dumps(meta).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    segment_name = f"{pointer_path.stem}.{generation}.seg"
+    segment_path = pointer_path.with_name(segment_name)
+    tmp_path = segment_path.with_name(f"{segment_name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        f.write(b'\0' * (data_start - len(MAGIC) - 8 - len(header)))
+        for name, dtype in SEGMENT_ARRAYS.items():
+            f.write(np.ascontiguousarray(getattr(shared, name), dtype=dtype).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, segment_path)
+
+    # The flip: readers see the old generation or the new one, never a mix
+    pointer = {'generation': generation, 'segment': segment_name, 'source': meta['source']}
+    tmp_pointer = pointer_path.with_name(f"{pointer_path.name}.{os.getpid()}.tmp")
+    with open(tmp_pointer, 'w') as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer_path)
+
+    for old_path in pointer_path.parent.glob(f"{pointer_path.stem}.*.seg"):
+        old_generation = old_path.name[len(pointer_path.stem) + 1:-len('.seg')]
+        if old_generation.isdigit() and int(old_generation) < generation - 1:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass # still mapped on windows, the next publish retries
+    return generation
+
+
+def open_shared_ratings(pointer_path: Path, source_fingerprint: tuple = None) -> Optional[SharedRatings]:
+    '''
+    Returns the published generation mapped read-only, or None
+      if there is none, it is unreadable, or source_fingerprint
+      is given and the generation was built from other store files.
+    '''
+    pointer_path = Path(pointer_path)
+    pointer = read_pointer(pointer_path)
+    if pointer is None:
+        return None
+    if source_fingerprint is not None and pointer['source'] != normalize_fingerprint(source_fingerprint):
+        return None
+
+    segment_path = pointer_path.with_name(pointer['segment'])
+    try:
+        with open(segment_path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"Error mapping shared ratings {segment_path}: {e}")
+        return None
+
+    try:
+        if mapping[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a shared ratings segment")
+        header_size = int.from_bytes(mapping[len(MAGIC):len(MAGIC) + 8], 'little')
+        meta = json.loads(mapping[len(MAGIC) + 8:len(MAGIC) + 8 + header_size])
+        if meta.get('format') != FORMAT_VERSION or meta['generation'] != pointer['generation']:
+            raise ValueError("segment does not match the pointer")
+
+        data_start = _align(len(MAGIC) + 8 + header_size)
+        arrays = {}
+        for name, dtype in SEGMENT_ARRAYS.items():
+            offset, shape = meta['arrays'][name]
+            count = int(np.prod(shape, dtype=np.int64))
+            # A view into the mapping, nothing is copied
+            arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + offset).reshape(shape)
+    except (ValueError, KeyError) as e:
+        print(f"Error reading shared ratings {segment_path}: {e}")
+        mapping.close()
+        return None
+
+    return SharedRatings(meta, arrays, mapping)
+
+
+def _align(size: int, boundary: int = 64) -> int:
+    return -(-size // boundary) * boundary
@@ -0,0 +1,230 @@
+#### COMPACT ARRAY-BACKED TEAM STATE FOR THE ELO SYSTEM ####
+
+## imports
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict
+
+
+NO_DATE = -(2 ** 63) # stored in place of a missing game date
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def date_to_stamp(game_date) -> int:
+    '''
+    Returns microseconds since the epoch for a datetime/Timestamp,
+      or NO_DATE when there is no date.
+    '''
+    if not game_date:
+        return NO_DATE
+    return (game_date - _EPOCH) // _MICROSECOND
+
+
+def stamp_to_iso(stamp: int):
+    if stamp == NO_DATE:
+        return None
+    return (_EPOCH + timedelta(microseconds=stamp)).isoformat()
+
+
+def summarize_streak(wins: int, played: int) -> Dict:
+    '''
+    Returns the streak summary EloSystem.get_recent_streak reports
+      for `wins` out of the last `played` games.
+    '''
+    losses = played - wins
+    return {
+        'wins': wins,
+        'losses': losses,
+        # Hot streak: 3+ wins in last 5 games
+        'is_hot': wins >= 3 and played >= 5,
+        # Cold streak: 3+ losses in last 5 games
+        'is_cold': losses >= 3 and played >= 5,
+    }
+
+
+class TeamState:
+    '''
+    Class TeamState keeps every team's rating and recent history in
+      flat typed arrays indexed by a dense team index.
+
+    Game and rating history are fixed-size ring buffers of numeric
+      dates, results and margins, so recording a game overwrites
+      slots in place and each team costs the same, fixed amount
+      of memory no matter how many games it has played.
+    '''
+    # every per-team typed array, what a serving snapshot stores
+    ARRAY_FIELDS = (
+        'ratings', 'recent_results', 'game_heads', 'game_counts', 'game_dates', 'game_margins',
+        'rating_heads', 'rating_counts', 'rating_dates', 'rating_values',
+    )
+
+    def __init__(self, game_limit: int, rating_limit: int):
+        self.game_limit = game_limit
+        self.rating_limit = rating_limit
+
+        self.team_ids: list[int] = [] # dense index: team id
+        self.index: dict[int, int] = {} # team id: dense index
+
+        self.ratings = array('d') # NaN until the team has a rating
+
+        # Recent games ring, game_limit slots per team
+        self.recent_results = array('L') # last game_limit results as bits, bit 0 = latest
+        self.game_heads = array('l') # next slot to write
+        self.game_counts = array('l')
+        self.game_dates = array('q')
+        self.game_margins = array('l')
+
+        # Rating history ring, rating_limit slots per team
+        self.rating_heads = array('l')
+        self.rating_counts = array('l')
+        self.rating_dates = array('q')
+        self.rating_values = array('d')
+
+    def __len__(self) -> int:
+        return len(self.team_ids)
+
+    def register(self, team_id: int) -> int:
+        '''
+        Returns the dense index of team_id, growing every array
+          by one team's worth of slots the first time it is seen.
+        '''
+        idx = self.index.get(team_id)
+        if idx is not None:
+            return idx
+
+        idx = len(self.team_ids)
+        self.index[team_id] = idx
+        self.team_ids.append(team_id)
+
+        self.ratings.append(float('nan'))
+        self.recent_results.append(0)
+        self.game_heads.append(0)
+        self.game_counts.append(0)
+        self.game_dates.extend([NO_DATE] * self.game_limit)
+        self.game_margins.extend([0] * self.game_limit)
+        self.rating_heads.append(0)
+        self.rating_counts.append(0)
+        self.rating_dates.extend([NO_DATE] * self.rating_limit)
+        self.rating_values.extend([0.0] * self.rating_limit)
+
+        return idx
+
+    def push_game(self, idx: int, won: int, margin: int, stamp: int) -> None:
+        limit = self.game_limit
+        head = self.game_heads[idx]
+        slot = idx * limit + head
+
+        self.game_dates[slot] = stamp
+        self.game_margins[slot] = round(margin) # mean-imputed scores make float margins
+        self.recent_results[idx] = ((self.recent_results[idx] << 1) | (1 if won else 0)) & ((1 << limit) - 1)
+        self.game_heads[idx] = head + 1 if head + 1 < limit else 0
+        if self.game_counts[idx] < limit:
+            self.game_counts[idx] += 1
+
+    def push_rating(self, idx: int, rating: float, stamp: int) -> None:
+        limit = self.rating_limit
+        head = self.rating_heads[idx]
+        slot = idx * limit + head
+
+        self.rating_dates[slot] = stamp
+        self.rating_values[slot] = rating
+        self.rating_heads[idx] = head + 1 if head + 1 < limit else 0
+        if self.rating_counts[idx] < limit:
+            self.rating_counts[idx] += 1
+
+    def recent_wins(self, idx: int, games: int):
+        '''
+        Returns (wins, played) over the team's last `games` games.
+        '''
+        played = min(self.game_counts[idx], games)
+        wins = (self.recent_results[idx] & ((1 << played) - 1)).bit_count()
+        return wins, played
+
+    def _ring_slots(self, idx: int, head: int, count: int, limit: int):
+        '''
+        Yields the ring slots of one team from oldest to newest.
+        '''
+        base = idx * limit
+        start = head - count
+        for offset in range(count):
+            yield base + (start + offset) % limit
+
+    ## dict views in the on-disk format
+
+    def ratings_dict(self) -> Dict[int, float]:
+        return {
+            team_id: rating
+            for team_id, rating in zip(self.team_ids, self.ratings)
+            if rating == rating # skip NaN, the team has no rating yet
+        }
+
+    def game_history_dict(self) -> Dict[int, list]:
+        history = {}
+        for idx, team_id in enumerate(self.team_ids):
+            count = self.game_counts[idx]
+            if count == 0:
+                continue
+
+            results = self.recent_results[idx]
+            entries = []
+            for age, slot in zip(range(count - 1, -1, -1), self._ring_slots(idx, self.game_heads[idx], count, self.game_limit)):
+                entries.append({
+                    'date': stamp_to_iso(self.game_dates[slot]),
+                    'won': (results >> age) & 1,
+                    'margin': self.game_margins[slot],
+                })
+            history[team_id] = entries
+        return history
+
+    def rating_history_dict(self) -> Dict[int, list]:
+        history = {}
+        for idx, team_id in enumerate(self.team_ids):
+            count = self.rating_counts[idx]
+            if count == 0:
+                continue
+
+            history[team_id] = [
+                {'date': stamp_to_iso(self.rating_dates[slot]), 'rating': self.rating_values[slot]}
+                for slot in self._ring_slots(idx, self.rating_heads[idx], count, self.rating_limit)
+            ]
+        return history
+
+    def load_ratings(self, ratings: Dict[int, float]) -> None:
+        for idx in range(len(self.ratings)):
+            self.ratings[idx] = float('nan')
+        for team_id, rating in ratings.items():
+            self.ratings[self.register(team_id)] = rating
+
+    def load_game_history(self, game_history: Dict[int, list]) -> None:
+        for idx in range(len(self.team_ids)):
+            self.game_heads[idx] = 0
+            self.game_counts[idx] = 0
+            self.recent_results[idx] = 0
+        for team_id, entries in game_history.items():
+            idx = self.register(team_id)
+            for entry in entries[-self.game_limit:]:
+                date = entry['date']
+                stamp = date_to_stamp(datetime.fromisoformat(date)) if date else NO_DATE
+                self.push_game(idx, entry['won'], entry['margin'], stamp)
+
+    def load_rating_history(self, rating_history: Dict[int, list]) -> None:
+        for idx in range(len(self.team_ids)):
+            self.rating_heads[idx] = 0
+            self.rating_counts[idx] = 0
+        for team_id, entries in rating_history.items():
+            idx = self.register(team_id)
+            for entry in entries[-self.rating_limit:]:
+                self.push_rating(idx, entry['rating'], date_to_stamp(datetime.fromisoformat(entry['date'])))
+
+    def restore(self, team_ids: list[int], arrays: Dict[str, bytes]) -> None:
+        '''
+        Returns None after replacing every team and array with the
+          raw bytes of a saved TeamState, see ARRAY_FIELDS.
+        '''
+        self.team_ids = list(team_ids)
+        self.index = {team_id: idx for idx, team_id in enumerate(self.team_ids)}
+        for name in self.ARRAY_FIELDS:
+            values = array(getattr(self, name).typecode)
+            values.frombytes(arrays[name])
+            setattr(self, name, values)
@@ -0,0 +1,230 @@
+#### LEARNED WIN PROBABILITY MODEL ON ELO AND ROLLING FEATURES ####
+# NumPy only, the API serves from it. Training, which needs pandas, is in win_model_training
+
+## imports
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+WIN_MODEL_FILE = "win_model.npz" # kept next to each rating model's database.json
+ELO_LOGIT_SCALE = math.log(10) / 400 # elo points to the log-odds of the elo win chance
+REST_DAYS_CAP = 7 # a week off or more counts the same, and stands in for unknown rest
+STREAK_GAMES = 5 # same window as EloSystem.get_recent_streak
+NEWTON_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-10
+
+# Per game features ahead of the home-minus-away feature store differences
+GAME_FEATURES = ('elo_logit', 'home_rest_days', 'away_rest_days', 'home_streak', 'away_streak')
+
+
+def win_model_path(save_path: Path) -> Path:
+    '''
+    Returns where the win model of the rating model stored at
+      save_path is exported.
+    '''
+    return Path(save_path).with_name(WIN_MODEL_FILE)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-z))
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float):
+    '''
+    Returns (weights, intercept) of an L2 regularized logistic
+      regression of y on the standardized X, fitted with Newton
+      steps. The intercept is not penalized.
+    '''
+    n, d = X.shape
+    design = np.column_stack([np.ones(n), X])
+    target = np.asarray(y, dtype=np.float64)
+    penalty = np.full(d + 1, float(l2))
+    penalty[0] = 0.0
+    beta = np.zeros(d + 1)
+
+    for _ in range(NEWTON_ITERATIONS):
+        prob = _sigmoid(design @ beta)
+        gradient = design.T @ (prob - target) + penalty * beta
+        hessian = (design * (prob * (1 - prob))[:, np.newaxis]).T @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian + 1e-9 * np.eye(d + 1), gradient)
+        beta -= step
+        if np.max(np.abs(step)) < NEWTON_TOLERANCE:
+            break
+
+    return beta[1:], float(beta[0])
+
+
+class WinModel:
+    '''
+    Class WinModel is a logistic regression of the home result on
+      the Elo log-odds, rest days, recent streaks and the
+      home-minus-away rolling box-score features, see
+      win_model_training.build_training_set.
+
+    The export is a handful of NumPy arrays. Every feature other than
+      the Elo log-odds belongs to one team, so compile() folds them
+      into one home and one away term per team, and any matchup is
+      sigmoid(constant + elo_weight * elo_logit + home[h] + away[a]).
+    '''
+    def __init__(self, feature_names: list[str], mean: np.ndarray, scale: np.ndarray, weights: np.ndarray, intercept: float, team_feature_means: np.ndarray, meta: Dict = None):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64) # training mean of each feature
+        self.scale = np.asarray(scale, dtype=np.float64) # training standard deviation, 1 for constant features
+        self.weights = np.asarray(weights, dtype=np.float64) # on standardized features
+        self.intercept = float(intercept)
+        self.team_feature_means = np.asarray(team_feature_means, dtype=np.float64) # fill for missing team features
+        self.meta = dict(meta or {})
+
+        # The same linear form on raw features: z = constant + X @ raw_weights
+        self.raw_weights = self.weights / self.scale
+        self.constant = self.intercept - float(self.raw_weights @ self.mean)
+
+    @classmethod
+    def fit(cls, training_set: Dict, rows: np.ndarray = None, l2: float = 1.0, meta: Dict = None) -> 'WinModel':
+        """
+        Returns a model fitted on the training_set rows (every row
+          by default) from win_model_training.build_training_set.
+        """
+        X = training_set['X'] if rows is None else training_set['X'][rows]
+        y = training_set['home_won'] if rows is None else training_set['home_won'][rows]
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale = np.where(scale > 0, scale, 1.0)
+
+        weights, intercept = fit_logistic((X - mean) / scale, y, l2)
+        return cls(
+            training_set['feature_names'], mean, scale, weights, intercept,
+            training_set['team_feature_means'], dict(meta or {}, l2=l2, games=int(len(y)))
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the home win probability of each row of X.
+        """
+        return _sigmoid(self.constant + X @ self.raw_weights)
+
+    def compile(self, team_ids, team_features: np.ndarray, rest_days: np.ndarray, streaks: np.ndarray) -> 'CompiledWinModel':
+        """
+        Returns the per team terms of team_ids, given each team's
+          FeatureStore row, rest days and streak (wins minus losses)
+          coming into its next game.
+        """
+        n_game = len(GAME_FEATURES)
+        elo_weight, home_rest, away_rest, home_streak, away_streak = self.raw_weights[:n_game].tolist()
+        diff_weights = self.raw_weights[n_game:]
+
+        has_features = ~np.all(np.isnan(team_features), axis=1)
+        filled = np.where(np.isnan(team_features), self.team_feature_means, team_features)
+        feature_terms = filled @ diff_weights
+        rest_days = np.asarray(rest_days, dtype=np.float64)
+        streaks = np.asarray(streaks, dtype=np.float64)
+
+        return CompiledWinModel(
+            team_ids,
+            home_terms=feature_terms + home_rest * rest_days + home_streak * streaks,
+            away_terms=-feature_terms + away_rest * rest_days + away_streak * streaks,
+            has_features=has_features,
+            elo_weight=elo_weight,
+            constant=self.constant
+        )
+
+    ## persistence
+
+    def save(self, path: Path) -> None:
+        '''
+        Returns None after writing the model to path, swapped in
+          atomically so a serving worker never reads half a model.
+        '''
+        path = Path(path)
+        meta = dict(self.meta, format=FORMAT_VERSION, feature_names=self.feature_names, intercept=self.intercept)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, meta=np.array(json.dumps(meta)), mean=self.mean, scale=self.scale,
+                weights=self.weights, team_feature_means=self.team_feature_means
+            )
+        os.replace(tmp_path, path)
+        return None
+
+    @classmethod
+    def load(cls, path: Path, feature_names: list[str] = None) -> Optional['WinModel']:
+        """
+        Returns the model exported at path, or None if there is none
+          or it was trained on other features than feature_names.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                arrays = {name: data[name] for name in ('mean', 'scale', 'weights', 'team_feature_means')}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading win model {path}: {e}")
+            return None
+
+        if meta.get('format') != FORMAT_VERSION or (feature_names is not None and meta['feature_names'] != list(feature_names)):
+            print(f"Ignoring win model {path} trained on other features, retrain it with scripts/train_win_model.py")
+            return None
+
+        return cls(meta['feature_names'], intercept=meta['intercept'], meta=meta, **arrays)
+
+
+class CompiledWinModel:
+    '''
+    Class CompiledWinModel is a WinModel folded onto one set of
+      teams for serving: one home and one away term per team, so a
+      whole home x away matrix is a broadcast add and a sigmoid.
+
+    Teams without any rolling features fall back to the Elo
+      probability, as do ids the model was not compiled for.
+    '''
+    def __init__(self, team_ids, home_terms: np.ndarray, away_terms: np.ndarray, has_features: np.ndarray, elo_weight: float, constant: float):
+        self.team_ids = np.asarray(team_ids, dtype=np.int64) # in the order of the terms
+        self.home_terms = home_terms
+        self.away_terms = away_terms
+        self.has_features = has_features
+        self.elo_weight = elo_weight
+        self.constant = constant
+
+        order = np.argsort(self.team_ids, kind='stable')
+        self._sorted_team_ids = self.team_ids[order]
+        self._sorted_positions = order
+
+    def predict_matrix(self, ratings: np.ndarray, home_advantage: float, elo_matrix: np.ndarray) -> np.ndarray:
+        """
+        Returns the [home, away] win probability matrix of the
+          compiled teams, given their ratings in the same order, with
+          elo_matrix wherever either team has no features.
+        """
+        elo_logit = ELO_LOGIT_SCALE * ((ratings[:, np.newaxis] + home_advantage) - ratings[np.newaxis, :])
+        z = self.constant + self.elo_weight * elo_logit + self.home_terms[:, np.newaxis] + self.away_terms[np.newaxis, :]
+        known = self.has_features[:, np.newaxis] & self.has_features[np.newaxis, :]
+        return np.where(known, _sigmoid(z), elo_matrix)
+
+    def _positions(self, team_ids: np.ndarray):
+        sorted_ids = self._sorted_team_ids
+        if len(sorted_ids) == 0:
+            return np.zeros(len(team_ids), dtype=np.int64), np.zeros(len(team_ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(sorted_ids, team_ids), len(sorted_ids) - 1)
+        positions = self._sorted_positions[pos]
+        found = (sorted_ids[pos] == team_ids) & self.has_features[positions]
+        return positions, found
+
+    def predict_pairs(self, home_ids: np.ndarray, away_ids: np.ndarray, rating_diffs: np.ndarray, elo_probs: np.ndarray) -> np.ndarray:
+        """
+        Returns the home win probability of each home/away pair given
+          rating_diffs (home rating plus advantage minus away rating),
+          with elo_probs for pairs involving a team without features.
+        """
+        home_pos, home_found = self._positions(home_ids)
+        away_pos, away_found = self._positions(away_ids)
+        z = self.constant + self.elo_weight * ELO_LOGIT_SCALE * rating_diffs + self.home_terms[home_pos] + self.away_terms[away_pos]
+        return np.where(home_found & away_found, _sigmoid(z), elo_probs)
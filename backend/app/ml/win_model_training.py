@@ -0,0 +1,170 @@
+#### WALK-FORWARD TRAINING OF THE LEARNED WIN PROBABILITY MODEL ####
+
+## imports
+from datetime import datetime
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from .data_cleaning import NBADataProcessor
+from .elo_replay import EloReplayEngine
+from .elo_sweep import PROBABILITY_EPSILON, score_predictions
+from .feature_store import FeatureStore
+from .win_model import GAME_FEATURES, REST_DAYS_CAP, STREAK_GAMES, WinModel
+
+
+L2_GRID = (0.1, 1.0, 10.0, 100.0) # ridge penalties tried by the walk-forward evaluation
+SEASON_ID_TO_YEAR_FACTOR = 10000
+
+
+def pregame_context(home_ids, away_ids, margins, game_dates):
+    '''
+    Returns (home_rest, away_rest, home_streak, away_streak): the
+      capped days off and the last STREAK_GAMES wins minus losses
+      each team carried into each game, in one pass over the
+      chronologically sorted games.
+    '''
+    n = len(home_ids)
+    days = np.asarray(game_dates).astype('datetime64[D]').astype(np.int64).tolist()
+    home_won = (np.asarray(margins) > 0).tolist()
+    rest = np.empty((2, n), dtype=np.int64)
+    streak = np.empty((2, n), dtype=np.int64)
+    last_day: Dict[int, int] = {} # team id: day of its previous game
+    recent: Dict[int, list] = {} # team id: last STREAK_GAMES results, 1 for a win
+
+    for i, (home_id, away_id) in enumerate(zip(np.asarray(home_ids).tolist(), np.asarray(away_ids).tolist())):
+        for side, team_id in enumerate((home_id, away_id)):
+            previous = last_day.get(team_id)
+            rest[side, i] = REST_DAYS_CAP if previous is None else min(days[i] - previous, REST_DAYS_CAP)
+            results = recent.get(team_id, ())
+            streak[side, i] = 2 * sum(results) - len(results)
+
+        for team_id, won in ((home_id, home_won[i]), (away_id, not home_won[i])):
+            last_day[team_id] = days[i]
+            results = recent.setdefault(team_id, [])
+            results.append(1 if won else 0)
+            if len(results) > STREAK_GAMES:
+                del results[0]
+
+    return rest[0], rest[1], streak[0], streak[1]
+
+
+def build_training_set(games: pd.DataFrame, elo_parameters: Dict) -> Dict:
+    '''
+    Returns the design matrix of every game in games, a date-sorted
+      frame of game.csv rows with whatever box-score columns it has,
+      built only from what was known before tip-off.
+
+    {'X', 'home_won', 'elo_prob', 'season_id', 'feature_names',
+      'team_feature_means'}. Team features missing before a team's
+      first games are filled with the league mean before the home
+      and away rows are differenced.
+    '''
+    home_ids = games['team_id_home'].to_numpy(dtype=np.int64)
+    away_ids = games['team_id_away'].to_numpy(dtype=np.int64)
+    margins = games['pts_home'].to_numpy(dtype=np.float64) - games['pts_away'].to_numpy(dtype=np.float64)
+
+    engine = EloReplayEngine(**elo_parameters)
+    engine.replay(home_ids, away_ids, games['pts_home'], games['pts_away'])
+    elo_prob = engine.pregame_home_prob
+    clipped = np.clip(elo_prob, PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+
+    store = FeatureStore() # fresh and never saved, it only replays the box scores
+    pregame_home, pregame_away = store.update_matchups(games, record_pregame=True)
+    pregame = np.concatenate([pregame_home, pregame_away])
+    counts = np.sum(~np.isnan(pregame), axis=0)
+    team_feature_means = np.nansum(pregame, axis=0) / np.maximum(counts, 1) # 0 for stats game.csv lacks
+    pregame_home = np.where(np.isnan(pregame_home), team_feature_means, pregame_home)
+    pregame_away = np.where(np.isnan(pregame_away), team_feature_means, pregame_away)
+
+    home_rest, away_rest, home_streak, away_streak = pregame_context(home_ids, away_ids, margins, games['game_date'])
+    X = np.column_stack([
+        np.log(clipped / (1 - clipped)), home_rest, away_rest, home_streak, away_streak,
+        pregame_home - pregame_away,
+    ])
+
+    return {
+        'X': X,
+        'home_won': margins > 0,
+        'elo_prob': elo_prob,
+        'season_id': games['season_id'].to_numpy(dtype=np.int64),
+        'feature_names': list(GAME_FEATURES) + [f"diff_{name}" for name in store.feature_names],
+        'team_feature_means': team_feature_means,
+    }
+
+
+def walk_forward(training_set: Dict, test_years: Iterable[int], l2_grid: Iterable[float] = L2_GRID, year_from: int = 1978) -> pd.DataFrame:
+    '''
+    Returns one row per (test season, l2) scoring a model fitted on
+      every earlier season from year_from, next to the Elo-only
+      probabilities of the same games.
+    '''
+    frame = pd.DataFrame({'season_id': training_set['season_id'], 'row': np.arange(len(training_set['season_id']))})
+    processor = NBADataProcessor()
+    home_won = training_set['home_won']
+    results = []
+
+    for year in test_years:
+        train_df, test_df = processor.split_dataset(frame, year_from=year_from, year_to=year)
+        test_rows = test_df.loc[test_df['actual_year'] == year, 'row'].to_numpy()
+        train_rows = train_df['row'].to_numpy()
+        if len(train_rows) == 0 or len(test_rows) == 0:
+            continue
+
+        elo_scores = score_predictions(training_set['elo_prob'][test_rows], home_won[test_rows])
+        for l2 in l2_grid:
+            model = WinModel.fit(training_set, train_rows, l2)
+            scores = score_predictions(model.predict_proba(training_set['X'][test_rows]), home_won[test_rows])
+            results.append({
+                'season': year,
+                'l2': l2,
+                **scores,
+                'elo_log_loss': elo_scores['log_loss'],
+                'elo_brier': elo_scores['brier'],
+                'elo_accuracy': elo_scores['accuracy'],
+            })
+
+    return pd.DataFrame(results)
+
+
+def best_l2(report: pd.DataFrame) -> float:
+    '''
+    Returns the penalty with the lowest game-weighted walk-forward
+      log-loss.
+    '''
+    weighted = (report['log_loss'] * report['games']).groupby(report['l2']).sum() / report['games'].groupby(report['l2']).sum()
+    return float(weighted.idxmin())
+
+
+def train_win_model(
+    games: pd.DataFrame,
+    elo_parameters: Dict,
+    test_seasons: int = 5,
+    l2_grid: Iterable[float] = L2_GRID,
+    year_from: int = 1978
+):
+    '''
+    Returns (model, walk-forward report): the penalty is picked on
+      the last test_seasons seasons, each scored by a model fitted on
+      the seasons before it, then the exported model is refitted on
+      every season.
+    '''
+    training_set = build_training_set(games, elo_parameters)
+    years = np.unique(training_set['season_id'] % SEASON_ID_TO_YEAR_FACTOR)
+    test_years = [int(year) for year in years[-test_seasons:]] if test_seasons > 0 else []
+
+    l2_grid = list(l2_grid)
+    report = walk_forward(training_set, test_years, l2_grid, year_from)
+    l2 = best_l2(report) if not report.empty else l2_grid[0]
+
+    all_rows, _ = NBADataProcessor().split_dataset(
+        pd.DataFrame({'season_id': training_set['season_id'], 'row': np.arange(len(training_set['season_id']))}),
+        year_from=year_from, year_to=int(years[-1]) + 1
+    )
+    model = WinModel.fit(training_set, all_rows['row'].to_numpy(), l2, meta={
+        'trained_at': datetime.now().isoformat(),
+        'seasons': [int(years[0]), int(years[-1])],
+        'elo_parameters': elo_parameters,
+    })
+    return model, report
@@ -0,0 +1,49 @@
+#### Script to backtest elo predictions across collected data ####
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from ml.data_cleaning import NBADataProcessor
+from ml.backtest import EloBacktest
+
+
+def backtest_elo(args) -> None:
+    Processor = NBADataProcessor()
+    games = Processor.get_modern_game_columns(start_year=args.start_year)
+
+    start = time.perf_counter()
+    backtest = EloBacktest(
+        k_factor=args.k_factor,
+        base_elo=args.base_elo,
+        home_advantage=args.home_advantage,
+        score_from_year=args.score_from,
+    ).run(games)
+    print(f"Backtested {len(games['season_id'])} games in {time.perf_counter() - start:.2f}s")
+
+    seasons = backtest.season_report()
+    print(seasons.to_string(index=False))
+    seasons.to_csv(args.output, index=False)
+    print(f"Season metrics written to {args.output}")
+
+    if args.reliability_output:
+        backtest.reliability_report().to_csv(args.reliability_output, index=False)
+        print(f"Reliability curves written to {args.reliability_output}")
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of pre-game elo predictions")
+    parser.add_argument('--k-factor', type=int, default=20)
+    parser.add_argument('--base-elo', type=int, default=1300)
+    parser.add_argument('--home-advantage', type=int, default=100)
+    parser.add_argument('--start-year', type=int, default=1978)
+    parser.add_argument('--score-from', type=int, default=None, help="first season scored, earlier ones only warm up ratings")
+    parser.add_argument('--output', type=str, default='elo_backtest_seasons.csv')
+    parser.add_argument('--reliability-output', type=str, default=None)
+
+    backtest_elo(parser.parse_args())
@@ -0,0 +1,37 @@
+#### Script to build the rolling team feature store from collected data ####
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from ml.data_cleaning import ELO_COLUMNS, NBADataProcessor
+from ml.elo_system import EloSystem
+from ml.feature_store import FeatureStore, csv_stat_columns
+
+
+def build_features() -> None:
+    Processor = NBADataProcessor()
+    available = set(pd.read_csv(Processor.data_path, nrows=0).columns)
+    columns = ELO_COLUMNS + [column for column in csv_stat_columns(available) if column not in ELO_COLUMNS]
+
+    games = Processor.get_modern_games(start_year=1978, columns=columns) # same games initialize_elo rates
+    games = games.sort_values('game_date', kind='stable')
+    print(f"Folding {len(games)} games into the feature store")
+
+    Features = FeatureStore() # fresh, not loaded: a rebuild starts from the first game
+    Features.update_matchups(games)
+
+    # Hold the store's writer lock so a scheduled update cannot write in between
+    with EloSystem()._store.writer_lock():
+        Features.save()
+    print(f"Saved {len(Features)} teams x {Features.n_features} features to {Features.path}")
+    return None
+
+
+## Ran once after initialize_elo, the daily update keeps the store current afterwards
+if __name__ == "__main__":
+    build_features()
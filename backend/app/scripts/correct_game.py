@@ -0,0 +1,44 @@
+#### Script to amend a past game result or add a missed game ####
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from ml.elo_system import EloSystem
+from services.update_service import get_update_service
+
+
+def correct_game(args) -> None:
+    games = pd.DataFrame([{
+        'game_date': args.date,
+        'home_team_id': args.home_team_id,
+        'away_team_id': args.away_team_id,
+        'home_pts': args.home_pts,
+        'away_pts': args.away_pts,
+    }])
+
+    # Hold the store's writer lock from load to save so a scheduled update cannot interleave
+    with EloSystem()._store.writer_lock():
+        service = get_update_service()
+        corrected = service.correct_games(games, verify=args.verify)
+
+    if not corrected:
+        sys.exit(1)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Amend or insert a past game and recompute the ratings after it")
+    parser.add_argument('--date', type=str, required=True, help="game date, YYYY-MM-DD")
+    parser.add_argument('--home-team-id', type=int, required=True)
+    parser.add_argument('--away-team-id', type=int, required=True)
+    parser.add_argument('--home-pts', type=int, required=True)
+    parser.add_argument('--away-pts', type=int, required=True)
+    parser.add_argument('--verify', action='store_true', help="check the result against a full replay before saving")
+
+    correct_game(parser.parse_args())
@@ -1,5 +1,6 @@
 #### Script to initialize elo ratings across collected data ####
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -7,39 +8,32 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from ml.data_cleaning import NBADataProcessor
-from ml.elo_system import EloSystem
+from ml.elo_replay import EloReplayEngine
+from ml.model_registry import DEFAULT_MODEL, get_model_registry
+from ml.rating_timeline import RatingTimeline
 
-def initialize_elo() -> None:
+def initialize_elo(model: str = DEFAULT_MODEL) -> None:
     Processor = NBADataProcessor()
-    games_df = Processor.get_modern_games(start_year=1978) # should clean data and return modern matches
+    games = Processor.get_modern_game_columns(start_year=1978) # cleaned modern matches from the binary cache
 
-    EloSys = EloSystem(base_elo=1300)
-    n = len(games_df)
+    EloSys = get_model_registry().create(model) # the model's parameters and its own store
+    n = len(games['game_date'])
 
-    print("Processing games now")
-    for count, (_, game) in enumerate(games_df.iterrows(), start=1):
-        EloSys.update_ratings(
-            team_home_id= int(game["team_id_home"]),
-            team_away_id= int(game["team_id_away"]),
-            home_score= int(game['pts_home']),
-            away_score= int(game['pts_away']),
-            game_date= game['game_date']
-        )
+    print(f"Processing {n} games now for model {model}")
+    Engine = EloReplayEngine(**EloSys.replay_parameters())
+    Engine.replay_games(games)
+    Engine.apply_to(EloSys)
 
-        if (count % 5000 == 0):
-            print(f"Processed {count} games out of {n}")
-
-    EloSys._save_ratings()
+    # Hold the store's writer lock so a scheduled update cannot write in between
+    with EloSys._store.writer_lock():
+        EloSys._save_ratings(compact=True) # fresh state, write a full snapshot
+        RatingTimeline.from_engine(Engine, log_seq=EloSys._log_seq).save(EloSys._timeline_path)
     return None
 
 
 ## Ran once to initialize elo model off collected raw data
-initialize_elo()
-
-
-
-
-
-
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate every collected game from scratch into a model's store")
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL, help="registered model name, see db/models.json")
 
-    
\ No newline at end of file
+    initialize_elo(parser.parse_args().model)
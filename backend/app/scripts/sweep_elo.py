@@ -0,0 +1,57 @@
+#### Script to sweep elo hyperparameters across collected data ####
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from ml.data_cleaning import NBADataProcessor
+from ml.game_cache import GameColumnCache
+from ml.elo_sweep import run_sweep
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def sweep_elo(args) -> None:
+    Processor = NBADataProcessor()
+    games_df = pd.DataFrame(GameColumnCache(Processor.data_path).load()) # cleaned, date-sorted elo columns
+
+    grid_size = len(args.k_factors) * len(args.base_elos) * len(args.home_advantages)
+    print(f"Evaluating {grid_size} configurations on {len(games_df)} games")
+
+    start = time.perf_counter()
+    results = run_sweep(
+        games_df,
+        k_factors=args.k_factors,
+        base_elos=args.base_elos,
+        home_advantages=args.home_advantages,
+        year_from=args.year_from,
+        year_to=args.year_to,
+        max_workers=args.workers,
+    )
+    print(f"Sweep finished in {time.perf_counter() - start:.1f}s")
+
+    results.to_csv(args.output, index=False)
+    print(results.head(10).to_string(index=False))
+    print(f"Ranked results written to {args.output}")
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid search k_factor, base_elo and home advantage")
+    parser.add_argument('--k-factors', type=_int_list, default=[10, 15, 20, 25, 30])
+    parser.add_argument('--base-elos', type=_int_list, default=[1300, 1500])
+    parser.add_argument('--home-advantages', type=_int_list, default=[0, 50, 75, 100, 125, 150, 200])
+    parser.add_argument('--year-from', type=int, default=1978)
+    parser.add_argument('--year-to', type=int, default=2020)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', type=str, default='elo_sweep_results.csv')
+
+    sweep_elo(parser.parse_args())
@@ -0,0 +1,68 @@
+#### Script to train the learned win probability model on collected data ####
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from ml.data_cleaning import ELO_COLUMNS, NBADataProcessor
+from ml.feature_store import csv_stat_columns
+from ml.model_registry import get_model_registry
+from ml.win_model import win_model_path
+from ml.win_model_training import L2_GRID, train_win_model
+
+
+def _float_list(value: str) -> list[float]:
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+def train(args) -> None:
+    registry = get_model_registry()
+    name = args.model or registry.default
+    elo = registry.create(name)
+
+    Processor = NBADataProcessor()
+    available = set(pd.read_csv(Processor.data_path, nrows=0).columns)
+    columns = ELO_COLUMNS + [column for column in csv_stat_columns(available) if column not in ELO_COLUMNS]
+
+    games = Processor.get_modern_games(start_year=args.year_from, columns=columns) # same games initialize_elo rates
+    games = games.sort_values('game_date', kind='stable')
+    print(f"Training the {name} win model on {len(games)} games")
+
+    start = time.perf_counter()
+    model, report = train_win_model(
+        games,
+        elo.replay_parameters(),
+        test_seasons=args.test_seasons,
+        l2_grid=args.l2,
+        year_from=args.year_from,
+    )
+    print(f"Trained in {time.perf_counter() - start:.1f}s, l2 = {model.meta['l2']}")
+
+    if not report.empty:
+        chosen = report[report['l2'] == model.meta['l2']]
+        print(chosen.to_string(index=False))
+        report.to_csv(args.output, index=False)
+        print(f"Walk-forward metrics written to {args.output}")
+
+    path = win_model_path(registry.save_path(name))
+    model.save(path)
+    print(f"Exported {len(model.feature_names)} feature weights to {path}")
+    return None
+
+
+## Run after build_features, serving picks the exported model up on its next reload
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward train the win model on elo and rolling box-score features")
+    parser.add_argument('--model', type=str, default=None, help="rating model whose elo feeds the win model")
+    parser.add_argument('--year-from', type=int, default=1978)
+    parser.add_argument('--test-seasons', type=int, default=5, help="latest seasons scored walk-forward")
+    parser.add_argument('--l2', type=_float_list, default=list(L2_GRID))
+    parser.add_argument('--output', type=str, default='win_model_walk_forward.csv')
+
+    train(parser.parse_args())
@@ -0,0 +1,231 @@
+#### LIGHTWEIGHT STAGE TIMERS AND COUNTERS ####
+
+## imports
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+
+METRICS_ENABLED = os.getenv('PIPELINE_METRICS', '1') != '0'
+DEFAULT_REPORT_PATH = Path(__file__).parent.parent / "db" / "pipeline_report.json" # backend/app/db
+REPORT_PATH = Path(os.getenv('PIPELINE_REPORT_PATH', DEFAULT_REPORT_PATH))
+
+
+class _StageTimer:
+    '''
+    Context manager timing one run of a stage. add_items records
+      how many games/rows the stage handled.
+    '''
+    __slots__ = ('_registry', '_name', '_items', '_start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, items: int):
+        self._registry = registry
+        self._name = name
+        self._items = items
+        self._start = 0.0
+
+    def add_items(self, items: int) -> None:
+        self._items += items
+
+    def __enter__(self) -> '_StageTimer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._registry._record_stage(self._name, time.perf_counter() - self._start, self._items, exc_type is not None)
+        return False
+
+
+class _NullTimer:
+    '''
+    Shared stand-in for _StageTimer while metrics are disabled, so
+      an instrumented stage costs one attribute check.
+    '''
+    __slots__ = ()
+
+    def add_items(self, items: int) -> None:
+        return None
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    '''
+    Class MetricsRegistry collects per-stage timings and plain event
+      counters for one process, and exports them as a JSON run
+      report or in the Prometheus text format.
+    '''
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages: Dict[str, Dict] = {} # stage name: timing totals
+            self._counters: Dict[str, int] = {} # event name: count
+            self._started_at = datetime.now().isoformat()
+
+    def stage(self, name: str, items: int = 0):
+        """
+        Returns a context manager timing the stage `name`.
+
+        with metrics.stage('clean_data', items=len(df)):
+            ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name, items)
+
+    def record_stage(self, name: str, seconds: float, items: int = 0) -> None:
+        '''
+        Records one run of a stage timed by the caller, for spans a
+          with block cannot wrap such as module imports.
+        '''
+        if not self.enabled:
+            return None
+        self._record_stage(name, seconds, items, False)
+        return None
+
+    def count(self, name: str, value: int = 1) -> None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        return None
+
+    def _record_stage(self, name: str, seconds: float, items: int, failed: bool) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {
+                    'runs': 0, 'failures': 0, 'items': 0,
+                    'total_seconds': 0.0, 'last_seconds': 0.0, 'max_seconds': 0.0,
+                }
+            stage['runs'] += 1
+            stage['failures'] += 1 if failed else 0
+            stage['items'] += items
+            stage['total_seconds'] += seconds
+            stage['last_seconds'] = seconds
+            stage['max_seconds'] = max(stage['max_seconds'], seconds)
+
+    def snapshot(self) -> Dict:
+        """
+        Returns a copy of every stage's totals and every counter.
+        """
+        with self._lock:
+            return {
+                'stages': {name: dict(stage) for name, stage in self._stages.items()},
+                'counters': dict(self._counters),
+            }
+
+    def run_report(self, **details) -> Dict:
+        """
+        Returns the structured report of this run: start and end
+          time, stage totals with per-item cost, counters and any
+          extra details passed in.
+        """
+        snapshot = self.snapshot()
+        for stage in snapshot['stages'].values():
+            stage['seconds_per_item'] = stage['total_seconds'] / stage['items'] if stage['items'] else None
+
+        return {
+            'started_at': self._started_at,
+            'finished_at': datetime.now().isoformat(),
+            **details,
+            **snapshot,
+        }
+
+    def write_report(self, path: Path = None, **details) -> Dict:
+        """
+        Returns the run report after writing it as JSON, swapped in
+          atomically so readers never see half a report.
+        """
+        path = Path(path or REPORT_PATH)
+        report = self.run_report(**details)
+
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+
+        return report
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus(snapshot: Dict, prefix: str) -> str:
+    """
+    Returns a snapshot or run report in the Prometheus text
+      exposition format, with every metric name under `prefix`.
+    """
+    lines = []
+    stages = snapshot.get('stages', {})
+    stage_metrics = (
+        ('stage_seconds_total', 'counter', 'total_seconds', 'Seconds spent in each stage.'),
+        ('stage_runs_total', 'counter', 'runs', 'Times each stage ran.'),
+        ('stage_failures_total', 'counter', 'failures', 'Stage runs that raised.'),
+        ('stage_items_total', 'counter', 'items', 'Games or rows each stage handled.'),
+        ('stage_last_seconds', 'gauge', 'last_seconds', 'Duration of the latest run of each stage.'),
+        ('stage_max_seconds', 'gauge', 'max_seconds', 'Longest run of each stage.'),
+    )
+
+    if stages:
+        for metric, kind, key, help_text in stage_metrics:
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name in sorted(stages):
+                lines.append(f'{prefix}_{metric}{{stage="{_label(name)}"}} {stages[name][key]}')
+
+    counters = snapshot.get('counters', {})
+    if counters:
+        lines.append(f"# HELP {prefix}_events_total Counted events.")
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name in sorted(counters):
+            lines.append(f'{prefix}_events_total{{event="{_label(name)}"}} {counters[name]}')
+
+    finished_at = snapshot.get('finished_at')
+    if finished_at:
+        lines.append(f"# HELP {prefix}_last_run_timestamp_seconds When the reported run finished.")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {datetime.fromisoformat(finished_at).timestamp()}")
+
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def load_run_report(path: Path = None) -> Dict:
+    """
+    Returns the last run report written by the pipeline, or None.
+    """
+    path = Path(path or REPORT_PATH)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except ValueError as e:
+        print(f"Error reading run report {path}: {e}")
+        return None
+
+
+
+_singleton_metrics = None
+def get_metrics() -> MetricsRegistry:
+    global _singleton_metrics
+
+    if (_singleton_metrics == None):
+        _singleton_metrics = MetricsRegistry()
+    return _singleton_metrics
@@ -1,24 +1,509 @@
 #### SERVICE FOR HANDLING PREDICTION REQUESTS ####
 
 from app.ml.elo_system import EloSystem
-from typing import Dict
+from app.ml.feature_store import DEFAULT_PATH as FEATURES_PATH, FeatureStore
+from app.ml.model_registry import get_model_registry
+from app.ml.season_simulator import SeasonSimulator, simulation_pool
+from app.ml.serving_snapshot import write_serving_snapshot
+from app.ml.shared_ratings import (
+    SharedRatings, build_shared_ratings, normalize_fingerprint, open_shared_ratings,
+    publish_lock, publish_shared_ratings, read_pointer
+)
+from app.ml.team_state import summarize_streak
+from app.ml.win_model import GAME_FEATURES, REST_DAYS_CAP, CompiledWinModel, WinModel, win_model_path
+from app.services.metrics import get_metrics
+from app.services.profiling import get_route_profiler
+from app.services.response_cache import CachedBody
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Dict, Optional
+from fastapi import HTTPException
+import hashlib
+import json
+import numpy as np
+import os
+import threading
+
+if TYPE_CHECKING:
+    from app.ml.rating_timeline import RatingTimeline
+
+
+RATINGS_POLL_SECONDS = float(os.getenv('RATINGS_POLL_SECONDS', '5')) # how often the shared pointer and store are checked for new ratings
+SIMULATION_WORKERS = int(os.getenv('SIMULATION_WORKERS', '0')) or None # processes shared by all season simulations, 0 = every core
+SIMULATION_CACHE_SIZE = 32 # simulation results kept per ratings generation
+
+
+class RatingsState:
+    '''
+    Class RatingsState is one immutable generation of ratings plus
+      everything precomputed from them for serving.
+
+    Ratings, streaks and the prediction matrix are read from a
+      SharedRatings generation, mapped from the segment every worker
+      shares. The full EloSystem is only loaded if a caller asks for it.
+
+    When the model has an exported WinModel and the feature store
+      knows both teams, predictions come from the learned model,
+      otherwise they are the Elo ones.
+
+    PredictionService swaps whole states, so a request that grabbed
+      a state never sees a half-loaded generation.
+    '''
+    def __init__(self, shared: SharedRatings, model: str, elo: EloSystem = None):
+        self.shared = shared
+        self.model = model # registry name of the rating model
+        self.home_advantage = shared.home_advantage
+        self.fingerprint = shared.source # store file stats this state was built from
+        self.generation = shared.stamp # version stamp written by the updater
+        self.shared_generation = shared.generation # publish counter of the mapped segment
+        self.initial_rating = shared.initial_rating
+        self._elo = elo
+        self._elo_lock = threading.Lock()
+        self._timeline = None # loaded on the first as-of query
+        self._timeline_lock = threading.Lock()
+        self._simulations: Dict[str, Dict] = {} # request key: season simulation result, oldest first
+        self._simulation_lock = threading.Lock()
+        self._compile_win_model()
+        self._build_prediction_matrix()
+        self._build_cached_responses()
+
+    @property
+    def Elo(self) -> EloSystem:
+        '''
+        Returns the full EloSystem of this generation, loaded from
+          the store on first use since serving never needs it.
+        '''
+        if self._elo is None:
+            with self._elo_lock:
+                if self._elo is None:
+                    elo = get_model_registry().create(self.model)
+                    if not elo._load_serving_snapshot(self.fingerprint):
+                        elo._load_ratings()
+                    self._elo = elo
+        return self._elo
+
+    def timeline(self) -> 'RatingTimeline':
+        '''
+        Returns the point-in-time ratings matching this generation,
+          the saved timeline plus the games still in the rating log,
+          empty until scripts/initialize_elo.py has saved one.
+        '''
+        if self._timeline is None:
+            with self._timeline_lock:
+                if self._timeline is None:
+                    from app.ml.rating_timeline import RatingTimeline # only as-of queries need it
+                    paths = get_model_registry().create(self.model)
+                    self._timeline = RatingTimeline.load(
+                        paths._timeline_path,
+                        paths._store.committed_log_entries(),
+                        initial_rating=self.initial_rating
+                    )
+        return self._timeline
+
+    def covered_timeline(self, as_of: datetime) -> 'RatingTimeline':
+        '''
+        Returns the timeline if it has games on or before as_of,
+          otherwise raises AsOfOutOfRange: earlier dates would
+          silently answer with every team at the initial rating.
+        '''
+        timeline = self.timeline()
+        covered = timeline_range(timeline)
+        if covered is None:
+            raise AsOfOutOfRange("No rating timeline on file, run scripts/initialize_elo.py to build one", covered)
+        if as_of.date().isoformat() < covered['from']:
+            raise AsOfOutOfRange(f"as_of {as_of.date().isoformat()} is before the first rated game", covered)
+        return timeline
+
+    def _compile_win_model(self) -> None:
+        '''
+        Returns None and folds the model's exported WinModel onto the
+          rated teams, with rest days counted to rest_date (today).
+          Without a model, or if it can't be read, win_model stays
+          None and every prediction is Elo-only.
+        '''
+        self.win_model: Optional[CompiledWinModel] = None
+        self.learned_stamp = _learned_stamp(self.model) # taken first, like the store fingerprint
+        self.rest_date = date.today() # day the compiled rest days count to, see PredictionService._current_state
+
+        try:
+            features = FeatureStore.load(FEATURES_PATH)
+            model = WinModel.load(
+                win_model_path(get_model_registry().save_path(self.model)),
+                list(GAME_FEATURES) + [f"diff_{name}" for name in features.feature_names]
+            )
+            if model is None or len(features) == 0:
+                return None
+
+            shared = self.shared
+            team_ids = shared.team_ids.tolist()
+            self.win_model = model.compile(
+                team_ids,
+                features.team_features(team_ids),
+                features.rest_days(team_ids, self.rest_date, REST_DAYS_CAP),
+                2 * shared.streak_wins - shared.streak_played
+            )
+            get_metrics().count('win_model_loads')
+        except Exception as e:
+            print(f"Error loading win model of {self.model}, serving elo predictions: {e}")
+        return None
+
+    def _build_prediction_matrix(self) -> None:
+        '''
+        Returns None and indexes the shared prediction matrix and
+          each team's streak summary by team id.
+
+        Ratings only change when a new generation is published, so
+          every prediction between known teams becomes a lookup.
+        '''
+        shared = self.shared
+        team_ids = shared.team_ids.tolist()
+
+        self.team_ids = team_ids
+        self.team_index = {team_id: idx for idx, team_id in enumerate(team_ids)}
+        self.home_win_matrix = shared.home_win_matrix # zero-copy view into the segment
+        if self.win_model is not None:
+            self.home_win_matrix = self.win_model.predict_matrix(shared.ratings, self.home_advantage, shared.home_win_matrix)
+        self.streaks = {
+            team_id: summarize_streak(wins, played)
+            for team_id, wins, played in zip(team_ids, shared.streak_wins.tolist(), shared.streak_played.tolist())
+        }
+        self.sorted_team_ids = shared.sorted_team_ids
+        self.sorted_ratings = shared.sorted_ratings
+
+        self.matrix_response = {
+            'team_ids': team_ids,
+            'home_win_probability': [
+                [round(prob, 2) for prob in row] for row in self.home_win_matrix.tolist()
+            ],
+            'streaks': self.streaks,
+            'generation': self.generation,
+        }
+        return None
+
+
+    def _build_cached_responses(self) -> None:
+        '''
+        Returns None and serializes the bodies of the read-only
+          routes once, so a request for them is a dict lookup.
+        '''
+        shared = self.shared
+        modified_at = shared.modified_at
+
+        self.team_ratings = shared.team_ratings()
+        self.modified_at = modified_at
+        self.ratings_response = CachedBody(self.team_ratings, modified_at)
+        self.team_names_response = CachedBody({'team_names': shared.team_names}, modified_at)
+        self.team_rating_responses = {
+            team_id: CachedBody(team_rating_body(team_id, rating), modified_at)
+            for team_id, rating in self.team_ratings.items()
+        }
+        return None
+
+    def get_rating(self, team_id: int) -> float:
+        return self.team_ratings.get(team_id, self.initial_rating)
+
+
+class AsOfOutOfRange(ValueError):
+    '''
+    Class AsOfOutOfRange is raised for an as-of date the rating
+      timeline does not cover. covered is {'from', 'to'}, or None
+      if the timeline is empty.
+    '''
+    def __init__(self, message: str, covered: Optional[Dict]):
+        super().__init__(message)
+        self.covered = covered
+
+
+def timeline_range(timeline) -> Optional[Dict]:
+    '''
+    Returns the first and last game day of the timeline, or None
+      if it has no games.
+    '''
+    if len(timeline) == 0:
+        return None
+    return {'from': timeline.first_date().date().isoformat(), 'to': timeline.last_date().date().isoformat()}
+
+
+def _learned_stamp(model: str) -> list:
+    '''
+    Returns the size and modification time of the files the learned
+      predictions are built from, None for a missing one.
+    '''
+    stamps = []
+    for path in (win_model_path(get_model_registry().save_path(model)), FEATURES_PATH):
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+
+def _rest_days_stale(state: RatingsState) -> bool:
+    '''
+    Returns True if state serves a learned model whose rest days
+      were counted to an earlier day than today.
+    '''
+    return state.win_model is not None and state.rest_date != date.today()
+
+
+def team_rating_body(team_id: int, rating: float) -> Dict:
+    return {
+        'team_id': team_id,
+        'rating': round(rating, 0)
+    }
+
+
+def _load_ratings_state(model: str) -> RatingsState:
+    '''
+    Returns a state of the model mapped from the published shared
+      generation of its store files, publishing it first if no
+      worker has.
+    '''
+    paths = get_model_registry().create(model)
+    metrics = get_metrics()
+    # Take the fingerprint first so writes racing the load trigger another reload
+    fingerprint = paths._store.fingerprint()
+
+    shared = open_shared_ratings(paths._shared_path, fingerprint)
+    if shared is not None:
+        metrics.count('ratings_loads_shared')
+        return RatingsState(shared, model)
+
+    # One worker builds the generation, the others wait here and map it
+    with publish_lock(paths._shared_path):
+        shared = open_shared_ratings(paths._shared_path, fingerprint)
+        if shared is not None:
+            metrics.count('ratings_loads_shared')
+            return RatingsState(shared, model)
+
+        elo = get_model_registry().create(model)
+        if elo._load_serving_snapshot(fingerprint):
+            metrics.count('ratings_loads_binary')
+        else:
+            # No snapshot for these store files yet, parse the JSON and leave one for the next load
+            elo._load_ratings()
+            try:
+                write_serving_snapshot(elo, elo._serving_path, fingerprint)
+            except OSError as e:
+                print(f"Error writing serving snapshot {elo._serving_path}: {e}")
+            metrics.count('ratings_loads_json')
+
+        shared = build_shared_ratings(elo, fingerprint)
+        try:
+            publish_shared_ratings(shared, paths._shared_path)
+            shared = open_shared_ratings(paths._shared_path, fingerprint) or shared
+            metrics.count('ratings_publishes')
+        except OSError as e:
+            # Serve a private copy, this worker just doesn't share it
+            print(f"Error publishing shared ratings {paths._shared_path}: {e}")
+
+    return RatingsState(shared, model, elo)
 
 
 class PredictionService:
-    def __init__(self):
-        self.Elo = EloSystem()
-        self.Elo._load_ratings()
-    
+    def __init__(self, model: str = None, poll_seconds: float = RATINGS_POLL_SECONDS):
+        self.model = model or get_model_registry().default # registry name of the served model
+        self._state: RatingsState = _load_ratings_state(self.model)
+        self._paths = get_model_registry().create(self.model) # store and shared pointer locations
+        self._reload_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher = None
+
+        if poll_seconds > 0:
+            self._watcher = threading.Thread(
+                target=self._watch_ratings, args=(poll_seconds,), name='ratings-watcher', daemon=True
+            )
+            self._watcher.start()
+
+
+    @property
+    def Elo(self) -> EloSystem:
+        return self._state.Elo
+
+
+    @property
+    def generation(self) -> str:
+        return self._state.generation
+
+
+    def _watch_ratings(self, poll_seconds: float) -> None:
+        '''
+        Returns None, runs on the watcher thread and reloads
+          ratings whenever a new generation is published or the
+          store files change on disk.
+        '''
+        while not self._stop_watching.wait(poll_seconds):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Error reloading ratings: {e}")
+
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+
+
+    def reload_if_changed(self) -> bool:
+        '''
+        Returns True if another generation was published or the
+          store changed since the current state was loaded, and a
+          new state was swapped in.
+
+        Every worker follows the same pointer, so all of them switch
+          within one poll of the flip. A retrained win model or an
+          updated feature store is picked up the same way, as is a
+          new day for the learned model's rest days.
+        '''
+        state = self._state
+        pointer = read_pointer(self._paths._shared_path)
+        same_generation = pointer is None or pointer['generation'] == state.shared_generation
+        if (
+            same_generation
+            and normalize_fingerprint(self._paths._store.fingerprint()) == state.fingerprint
+            and _learned_stamp(self.model) == state.learned_stamp
+            and not _rest_days_stale(state)
+        ):
+            return False
+
+        self.reload_ratings()
+        return True
+
+
+    def reload_ratings(self) -> None:
+        '''
+        Returns None after loading ratings from the store into a
+          new state and swapping it in with a single assignment.
+        '''
+        with self._reload_lock:
+            new_state = _load_ratings_state(self.model)
+            self._state = new_state
+        return None
+
+
+    def _current_state(self) -> RatingsState:
+        '''
+        Returns the state to serve learned predictions from, reloaded
+          first when its rest days were counted on an earlier day, so
+          a day without games or a stopped watcher never serves them
+          stale.
+        '''
+        state = self._state
+        if _rest_days_stale(state):
+            with self._reload_lock:
+                if _rest_days_stale(self._state): # another request may have just reloaded
+                    self._state = _load_ratings_state(self.model)
+            state = self._state
+        return state
+
 
     def make_prediction(self, home_team_id: int, away_team_id: int) -> Dict:
         '''
-        Returns a dictionary containing data 
-          on the predicted match outcome between 
+        Returns a dictionary containing data
+          on the predicted match outcome between
           home_team and away_team.
         '''
-        prediction_result = self.Elo.predict(team_home_id=home_team_id, team_away_id=away_team_id)
+        state = self._current_state()
+        home_idx = state.team_index.get(home_team_id)
+        away_idx = state.team_index.get(away_team_id)
+
+        if home_idx is None or away_idx is None:
+            # Unrated team, same defaults as EloSystem.predict
+            home_rating = state.get_rating(home_team_id) + state.home_advantage
+            home_win_probability = 1 / (1 + 10 ** ((state.get_rating(away_team_id) - home_rating) / 400))
+            home_streak = state.streaks.get(home_team_id) or summarize_streak(0, 0)
+            away_streak = state.streaks.get(away_team_id) or summarize_streak(0, 0)
+        else:
+            home_win_probability = float(state.home_win_matrix[home_idx, away_idx])
+            home_streak = state.streaks[home_team_id]
+            away_streak = state.streaks[away_team_id]
 
         # data sent to client side
+        return {
+            'home_team_id': home_team_id,
+            'away_team_id': away_team_id,
+            'home_win_probability': round(home_win_probability, 2),
+            'away_win_probability': round(1 - home_win_probability, 2),
+            'home_recent_streak': home_streak,
+            'away_recent_streak': away_streak,
+            'generation': state.generation,
+            ## Optional: Include ratings later
+        }
+
+
+    def _lookup_ratings(self, state: RatingsState, team_ids: np.ndarray) -> np.ndarray:
+        '''
+        Returns the current rating of every id in team_ids,
+          using the initial rating for unrated teams.
+        '''
+        sorted_ids = state.sorted_team_ids
+        ratings = np.full(len(team_ids), float(state.initial_rating))
+
+        if len(sorted_ids) == 0:
+            return ratings
+
+        pos = np.searchsorted(sorted_ids, team_ids)
+        pos_clipped = np.minimum(pos, len(sorted_ids) - 1)
+        found = sorted_ids[pos_clipped] == team_ids
+        ratings[found] = state.sorted_ratings[pos_clipped[found]]
+
+        return ratings
+
+
+    def predict_batch(
+        self,
+        home_team_ids: list[int],
+        away_team_ids: list[int],
+        home_advantages: list[float] = None
+    ) -> tuple[np.ndarray, str]:
+        '''
+        Returns (home win probabilities, generation) for each
+          home/away pair, in request order, in one vectorized pass,
+          from the learned model where it covers both teams.
+        '''
+        state = self._current_state()
+        home_ids = np.asarray(home_team_ids, dtype=np.int64)
+        away_ids = np.asarray(away_team_ids, dtype=np.int64)
+
+        if home_advantages is None:
+            advantage = state.home_advantage
+        else:
+            advantage = np.asarray(home_advantages, dtype=np.float64)
+
+        home_ratings = self._lookup_ratings(state, home_ids) + advantage
+        away_ratings = self._lookup_ratings(state, away_ids)
+
+        home_win_probability = 1 / (1 + 10 ** ((away_ratings - home_ratings) / 400))
+        if state.win_model is not None:
+            home_win_probability = state.win_model.predict_pairs(home_ids, away_ids, home_ratings - away_ratings, home_win_probability)
+
+        return home_win_probability, state.generation
+
+
+    def get_ratings_as_of(self, as_of: datetime) -> Dict:
+        '''
+        Returns every team's rating entering the day as_of. Raises
+          AsOfOutOfRange before the first rated game.
+        '''
+        state = self._state
+        timeline = state.covered_timeline(as_of)
+        return {
+            'as_of': as_of.date().isoformat(),
+            'ratings': timeline.ratings_as_of(as_of),
+            'covered': timeline_range(timeline),
+            'generation': state.generation,
+        }
+
+
+    def make_prediction_as_of(self, home_team_id: int, away_team_id: int, as_of: datetime) -> Dict:
+        '''
+        Returns the prediction that would have been made on the
+          morning of as_of, in the shape of make_prediction. Raises
+          AsOfOutOfRange before the first rated game.
+        '''
+        state = self._state
+        timeline = state.covered_timeline(as_of)
+        prediction_result = timeline.predict_as_of(home_team_id, away_team_id, as_of, state.home_advantage)
+
         return {
             'home_team_id': home_team_id,
             'away_team_id': away_team_id,
@@ -26,36 +511,174 @@ class PredictionService:
             'away_win_probability': round(prediction_result['away_win_probability'], 2),
             'home_recent_streak': prediction_result['home_streak'],
             'away_recent_streak': prediction_result['away_streak'],
-            ## Optional: Include ratings later
+            'home_rating': prediction_result['home_rating'],
+            'away_rating': prediction_result['away_rating'],
+            'as_of': as_of.date().isoformat(),
+            'covered': timeline_range(timeline),
+            'generation': state.generation,
         }
 
+
+    def simulate_season(
+        self,
+        home_team_ids: list[int],
+        away_team_ids: list[int],
+        simulations: int,
+        seed: int = 0,
+        update_ratings: bool = False,
+        current_records: Dict[int, tuple] = None
+    ) -> Dict:
+        '''
+        Returns win distributions and playoff odds over the remaining
+          schedule from the current ratings, see SeasonSimulator.
+
+        Without current_records each team starts from its record so
+          far this season, per the rating timeline. Raises ValueError
+          for teams that are not rated, or if the timeline has no games
+          to take records from. Results are cached per ratings
+          generation and records, so a repeated request is a lookup.
+        '''
+        state = self._state
+        unknown = sorted((set(home_team_ids) | set(away_team_ids) | set(current_records or {})) - set(state.team_index))
+        if unknown:
+            raise ValueError(f"Unknown team ids {unknown[:10]}, only rated teams can be simulated")
+
+        records = current_records
+        if records is None:
+            records = state.timeline().season_records(datetime.now())
+            if records is None:
+                raise ValueError("No rating timeline to take current records from, pass current_records")
+
+        key = hashlib.blake2b(json.dumps(
+            [home_team_ids, away_team_ids, simulations, seed, update_ratings, sorted(records.items())]
+        ).encode(), digest_size=16).hexdigest()
+
+        with state._simulation_lock:
+            cached = state._simulations.get(key)
+        if cached is not None:
+            return cached
+
+        simulator = SeasonSimulator(
+            state.team_ratings,
+            home_advantage=state.home_advantage,
+            k_factor=state.shared.k_factor,
+            initial_rating=state.initial_rating,
+            update_ratings=update_ratings
+        )
+        result = simulator.run(home_team_ids, away_team_ids, simulations, seed, records, pool=get_simulation_pool())
+        result['generation'] = state.generation
+
+        with state._simulation_lock:
+            if len(state._simulations) >= SIMULATION_CACHE_SIZE:
+                state._simulations.pop(next(iter(state._simulations)))
+            state._simulations[key] = result
+        return result
+
+
+    def get_prediction_matrix(self) -> Dict:
+        '''
+        Returns every home/away win probability at once. Row i is
+          the home team team_ids[i], column j the away team team_ids[j].
+        '''
+        return self._current_state().matrix_response
+
     def get_team_names(self) -> list[Dict]:
         '''
         Returns an array of dict types with team names (str)
           as keys and team ids (int) as values.
         '''
-        return self.Elo.get_team_names()
+        return self._state.shared.team_names
 
 
     def get_team_rating(self, team_id: int) -> float:
         """
         Returns a team's current ELO rating.
         """
-        return self.Elo.get_rating(team_id)
-    
+        return self._state.get_rating(team_id)
+
+    def get_ratings_response(self) -> CachedBody:
+        '''
+        Returns the serialized /ratings body of the current generation.
+        '''
+        return self._state.ratings_response
+
+    def get_team_names_response(self) -> CachedBody:
+        '''
+        Returns the serialized /teamnames body of the current generation.
+        '''
+        return self._state.team_names_response
+
+    def get_team_rating_response(self, team_id: int) -> CachedBody:
+        '''
+        Returns the serialized /rating/{team_id} body. Unrated ids
+          are built per request rather than growing the cache.
+        '''
+        state = self._state
+        cached = state.team_rating_responses.get(team_id)
+        if cached is None:
+            cached = CachedBody(team_rating_body(team_id, state.get_rating(team_id)), state.modified_at)
+        return cached
+
     def get_all_ratings(self) -> Dict[int, float]:
         """
         Returns all current ratings.
         """
-        return self.Elo.team_ratings
-    
-    
-
-_singleton_prediction_service = None
-def get_prediction_service() -> PredictionService:
-    global _singleton_prediction_service
-
-    if (_singleton_prediction_service == None):
-        _singleton_prediction_service = PredictionService() # invoke pred service class
-    return _singleton_prediction_service
-    
+        return dict(self._state.team_ratings)
+
+
+
+_prediction_services: Dict[str, PredictionService] = {} # model name: service
+def get_prediction_service(model: Optional[str] = None) -> PredictionService:
+    '''
+    Returns the service of the named rating model, the registry's
+      default without one. As a route dependency, model is the
+      ?model= query parameter every prediction endpoint takes.
+    '''
+    with get_route_profiler().dependency('get_prediction_service'):
+        registry = get_model_registry()
+        name = model or registry.default
+        if name not in registry.models:
+            raise HTTPException(status_code=404, detail=f"Unknown rating model {name!r}, one of {registry.names()}")
+
+        service = _prediction_services.get(name)
+        if service is None:
+            service = _prediction_services[name] = PredictionService(name) # invoke pred service class
+        return service
+
+
+_singleton_simulation_pool = None
+_simulation_pool_lock = threading.Lock()
+def get_simulation_pool():
+    '''
+    Returns the one process pool every season simulation of this
+      server shares, so concurrent requests queue for SIMULATION_WORKERS
+      processes instead of each starting its own. None runs them inline.
+    '''
+    global _singleton_simulation_pool
+
+    if SIMULATION_WORKERS == 1:
+        return None
+    with _simulation_pool_lock:
+        if (_singleton_simulation_pool == None):
+            _singleton_simulation_pool = simulation_pool(SIMULATION_WORKERS)
+    return _singleton_simulation_pool
+
+
+def shutdown_simulation_pool() -> None:
+    global _singleton_simulation_pool
+
+    with _simulation_pool_lock:
+        if _singleton_simulation_pool is not None:
+            _singleton_simulation_pool.shutdown(cancel_futures=True)
+            _singleton_simulation_pool = None
+    return None
+
+
+def reload_prediction_services() -> None:
+    '''
+    Returns None after every loaded model's service has picked up
+      newly published ratings, without waiting for its watcher.
+    '''
+    for service in list(_prediction_services.values()):
+        service.reload_if_changed()
+    return None
@@ -0,0 +1,280 @@
+#### OPT-IN API LATENCY, MEMORY AND SAMPLING PROFILER ####
+
+## imports
+import bisect
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict
+
+from app.services.metrics import MetricsRegistry
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Upper bounds in ms, each ~1.41x the last: 0.05ms up to ~9s
+LATENCY_BUCKETS_MS = tuple(0.05 * 2 ** (i / 2) for i in range(36))
+MAX_PROFILE_SECONDS = 300
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+
+
+class LatencyHistogram:
+    '''
+    Class LatencyHistogram counts request latencies in fixed log
+      spaced buckets, so recording is O(log buckets) and memory
+      stays constant no matter how many requests are seen.
+    '''
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1) # last bucket: slower than every bound
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns the q-th latency quantile in ms, interpolated inside
+          the bucket it falls in.
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0.0
+                high = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return min(low + (high - low) * (rank - seen) / bucket_count, self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.sum_ms / self.count if self.count else None,
+            'max_ms': self.max_ms,
+            **{f"p{round(q * 100)}_ms": self.quantile(q) for q in QUANTILES},
+        }
+
+
+def process_memory() -> Dict[str, int]:
+    '''
+    Returns the process's current and peak resident set size in bytes.
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_bytes = peak if sys.platform == 'darwin' else peak * 1024 # kilobytes on linux
+
+    rss_bytes = None
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            rss_bytes = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+
+    return {'rss_bytes': rss_bytes, 'peak_rss_bytes': peak_bytes}
+
+
+class RouteProfiler:
+    '''
+    Class RouteProfiler keeps a latency histogram and status counts
+      per route template, plus stage timings of request dependencies
+      such as get_prediction_service.
+    '''
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            # API_PROFILING=1 records from startup, otherwise it is toggled on the admin endpoint
+            enabled = os.getenv('API_PROFILING', '0') == '1'
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.dependencies = MetricsRegistry(enabled=enabled)
+        self.reset()
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.dependencies.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes: Dict[str, Dict] = {} # "METHOD /route/{param}": histogram and statuses
+            self._since = datetime.now().isoformat()
+        self.dependencies.reset()
+
+    def record(self, route: str, status: int, ms: float) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {'latency': LatencyHistogram(), 'statuses': Counter()}
+            entry['latency'].observe(ms)
+            entry['statuses'][status] += 1
+
+    def dependency(self, name: str):
+        """
+        Returns a context manager timing a dependency, a no-op while
+          profiling is off.
+        """
+        return self.dependencies.stage(name)
+
+    def report(self) -> Dict:
+        with self._lock:
+            routes = {
+                route: {**entry['latency'].summary(), 'statuses': {str(k): v for k, v in sorted(entry['statuses'].items())}}
+                for route, entry in sorted(self._routes.items())
+            }
+        return {
+            'enabled': self.enabled,
+            'since': self._since,
+            'routes': routes,
+            'dependencies': self.dependencies.snapshot()['stages'],
+            'memory': process_memory(),
+        }
+
+
+class SamplingProfiler:
+    '''
+    Class SamplingProfiler samples every thread's Python stack at a
+      fixed interval for a time window and aggregates the samples in
+      the folded "frame;frame;frame count" format flamegraph.pl and
+      speedscope read.
+
+    It runs on its own daemon thread, so the server keeps serving
+      while it samples real traffic.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stacks = Counter()
+        self._samples = 0
+        self._started_at = None
+        self._finished_at = None
+        self._seconds = 0.0
+        self._interval = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS) -> bool:
+        """
+        Returns False if a profile is already running, otherwise
+          starts sampling for `seconds` and returns True.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._seconds = min(seconds, MAX_PROFILE_SECONDS)
+            self._interval = max(interval_ms, 1) / 1000
+            self._started_at = datetime.now().isoformat()
+            self._finished_at = None
+            self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+            self._thread.start()
+        return True
+
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self._seconds
+        labels = {} # code object: label, most frames repeat every sample
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = self._frame_label(frame)
+                    stack.append(label)
+                    frame = frame.f_back
+                self._stacks[';'.join(reversed(stack))] += 1
+            self._samples += 1
+            time.sleep(self._interval)
+
+        self._finished_at = datetime.now().isoformat()
+
+    def status(self) -> Dict:
+        return {
+            'running': self.running,
+            'started_at': self._started_at,
+            'finished_at': self._finished_at,
+            'window_seconds': self._seconds,
+            'interval_ms': self._interval * 1000,
+            'samples': self._samples,
+        }
+
+    def folded(self) -> str:
+        """
+        Returns the samples so far in folded stack format, one stack
+          per line, most sampled first.
+        """
+        stacks = self._stacks.copy()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class ProfilingMiddleware:
+    '''
+    ASGI middleware recording each HTTP request's latency against its
+      route template (/apis/rating/{team_id}, not the raw path).
+      Checks a single flag and passes straight through while
+      profiling is off.
+    '''
+    def __init__(self, app, profiler: 'RouteProfiler' = None):
+        self.app = app
+        self.profiler = profiler or get_route_profiler()
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope['type'] != 'http' or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            profiler.record(f"{scope.get('method', '')} {path}", status, ms)
+
+
+
+_singleton_route_profiler = None
+def get_route_profiler() -> RouteProfiler:
+    global _singleton_route_profiler
+
+    if (_singleton_route_profiler == None):
+        _singleton_route_profiler = RouteProfiler()
+    return _singleton_route_profiler
+
+
+_singleton_sampling_profiler = None
+def get_sampling_profiler() -> SamplingProfiler:
+    global _singleton_sampling_profiler
+
+    if (_singleton_sampling_profiler == None):
+        _singleton_sampling_profiler = SamplingProfiler()
+    return _singleton_sampling_profiler
@@ -0,0 +1,67 @@
+#### PRE-SERIALIZED RESPONSES WITH ETAGS FOR THE RATINGS ROUTES ####
+
+## imports
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+
+CACHE_MAX_AGE_SECONDS = int(os.getenv('RATINGS_CACHE_MAX_AGE', '300')) # how long clients reuse a body before revalidating
+
+
+class CachedBody:
+    '''
+    Class CachedBody is one route's JSON body serialized once per
+      ratings generation, with the strong ETag and Last-Modified
+      date sent alongside it.
+    '''
+    __slots__ = ('body', 'etag', 'last_modified', 'modified_at')
+
+    def __init__(self, content, modified_at: datetime):
+        # Same serialization as FastAPI's JSONResponse, so bodies are byte for byte unchanged
+        self.body = json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+        self.modified_at = modified_at.astimezone(timezone.utc).replace(microsecond=0) # naive times are local, as the updater writes them
+        self.last_modified = format_datetime(self.modified_at, usegmt=True)
+
+
+def _not_modified(request: Request, cached: CachedBody) -> bool:
+    '''
+    Returns True if the client's copy is current: If-None-Match
+      lists the ETag (or *), or without one, If-Modified-Since is
+      no older than the ratings.
+    '''
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        # If-None-Match compares weakly, a W/ prefix still matches
+        return '*' in tags or any(tag.removeprefix('W/') == cached.etag for tag in tags)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= cached.modified_at
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def cached_json_response(request: Request, cached: CachedBody) -> Response:
+    """
+    Returns the cached body as a JSON response, or an empty 304 if
+      the request's conditional headers show the client has it.
+    """
+    headers = {
+        'ETag': cached.etag,
+        'Last-Modified': cached.last_modified,
+        'Cache-Control': f"public, max-age={CACHE_MAX_AGE_SECONDS}",
+    }
+
+    if _not_modified(request, cached):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type='application/json', headers=headers)
@@ -3,20 +3,51 @@
 from typing import Dict
 import pandas as pd
 
+from ml.feature_store import FeatureStore
+from ml.multi_model_update import MultiModelUpdater
+from services.metrics import get_metrics
+
 class UpdateService:
+    '''
+    Class UpdateService rates new games into every registered rating
+      model, see ModelRegistry. Elo is the default model, the one
+      stored in db/database.json.
+    '''
     def __init__(self):
-        from ml.elo_system import EloSystem
         from ml.data_cleaning import NBADataProcessor
+        from ml.model_registry import DEFAULT_MODEL, get_model_registry
 
-        self.Elo = EloSystem()
         self.Processor = NBADataProcessor()
-        self.Elo._load_ratings()
+        self.Models = {} # model name: loaded EloSystem
+
+        registry = get_model_registry()
+        for name in registry.names():
+            elo = registry.create(name)
+            try:
+                elo._load_ratings()
+            except FileNotFoundError:
+                if name == DEFAULT_MODEL:
+                    raise
+                print(f"Skipping model {name}, no ratings yet: run scripts/initialize_elo.py --model {name}")
+                continue
+            self.Models[name] = elo
+
+        self.Elo = self.Models[DEFAULT_MODEL]
+        self.Features = FeatureStore.load() # rolling box-score aggregates, shared by every model
     
     def update_team_ratings(self, new_games: pd.DataFrame) -> bool:
+        '''
+        Returns False if rating or saving failed. All models are
+          updated in one pass over the games, see MultiModelUpdater,
+          so the work that does not depend on the model is paid once
+          per game rather than once per model.
+        '''
         if new_games is None or new_games.empty:
             return True 
         
-        new_games_processed = self.Processor.clean_data(new_games)
+        metrics = get_metrics()
+        with metrics.stage('clean_data', items=len(new_games)):
+            new_games_processed = self.Processor.clean_data(new_games)
 
         if new_games_processed.empty:
             return True
@@ -27,23 +58,94 @@ class UpdateService:
         if (n == 0):
             return True
 
+        models = list(self.Models.values())
         try:
-            for count, (_, game) in enumerate(new_games_processed.iterrows(), start=1):
-                self.Elo.update_ratings(
-                    team_home_id= int(game["home_team_id"]),
-                    team_away_id= int(game["away_team_id"]),
-                    home_score= int(game['home_pts']),
-                    away_score= int(game['away_pts']),
-                    game_date= game['game_date']
+            with metrics.stage('rating_loop', items=n * len(models)):
+                MultiModelUpdater(models).update(
+                    new_games_processed['home_team_id'].astype('int64').tolist(),
+                    new_games_processed['away_team_id'].astype('int64').tolist(),
+                    new_games_processed['home_pts'].astype('float64').tolist(), # mean-imputed scores stay fractional
+                    new_games_processed['away_pts'].astype('float64').tolist(),
+                    new_games_processed['game_date'].tolist()
                 )
 
+            with metrics.stage('save_ratings', items=n):
+                for elo in models:
+                    elo._save_ratings()
+
+            metrics.count('games_rated', n)
+        except Exception as e:
+            print(f"Error updating ratings: {e}")
+            metrics.count('update_errors')
+            return False
+
+        self.update_features(new_games_processed)
+        return True
 
-            self.Elo._save_ratings()
+
+    def update_features(self, games: pd.DataFrame) -> bool:
+        '''
+        Returns False if folding the games' box scores into the
+          feature store failed. Features are secondary, so a failure
+          here never fails the rating update.
+        '''
+        metrics = get_metrics()
+        try:
+            with metrics.stage('feature_update', items=len(games)):
+                self.Features.update_matchups(games)
+                self.Features.save()
             return True
-        except:
+        except Exception as e:
+            print(f"Error updating features: {e}")
+            metrics.count('feature_errors')
             return False
 
 
+    def correct_games(self, games: pd.DataFrame, verify: bool = False) -> bool:
+        '''
+        Returns True after amending games already rated (same date,
+          home and away team) or inserting missed ones, recomputing
+          only the ratings from the nearest checkpoint before them.
+
+        With verify set, the recomputed ratings are checked against a
+          full replay and nothing is saved if they differ.
+        '''
+        from ml.game_corrections import GameCorrector
+
+        if games is None or games.empty:
+            return True
+
+        games_processed = self.Processor.clean_data(games)
+        corrections = [
+            {
+                'home_team_id': int(game['home_team_id']),
+                'away_team_id': int(game['away_team_id']),
+                'home_pts': float(game['home_pts']), # clean_data may impute fractional scores
+                'away_pts': float(game['away_pts']),
+                'game_date': game['game_date'].to_pydatetime(),
+            }
+            for _, game in games_processed.iterrows()
+        ]
+
+        corrected = True
+        for name, elo in self.Models.items():
+            try:
+                summary = GameCorrector(elo).apply(corrections, verify=verify)
+            except Exception as e:
+                print(f"Error correcting games in model {name}: {e}")
+                corrected = False
+                continue
+
+            print(
+                f"{name}: replayed {summary['replayed_games']} of {summary['total_games']} games "
+                f"({summary['inserted']} inserted)"
+            )
+            if verify:
+                print(f"{name}: full replay check: {'identical' if summary['verified'] else 'MISMATCH, nothing saved'}")
+                corrected = corrected and (bool(summary['verified']) or summary['replayed_games'] == 0)
+        return corrected
+
+
 
 _singleton_update_service = None
 def get_update_service() -> UpdateService:
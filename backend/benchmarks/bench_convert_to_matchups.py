@@ -0,0 +1,141 @@
+#### BENCHMARK: VECTORIZED VS PER-GAME _convert_to_matchups ####
+#
+# Run from backend/:  python -m benchmarks.bench_convert_to_matchups
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# pipeline.py imports from the app folder root
+sys.path.append(str(Path(__file__).parent.parent / "app"))
+
+from background_tasks.pipeline import convert_to_matchups
+from benchmarks.synthetic import make_game_log
+
+
+def legacy_convert_to_matchups(game_log_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-game loop that _convert_to_matchups used before it was
+      vectorized, kept as the benchmark reference.
+    """
+    if game_log_df.empty:
+        return pd.DataFrame()
+    
+    matchups = []
+    
+    # Process each unique game
+    for game_id in game_log_df['GAME_ID'].unique():
+        game_data: pd.DataFrame = game_log_df[game_log_df['GAME_ID'] == game_id]
+        
+        if len(game_data) != 2:
+            continue
+        
+        teams = game_data.to_dict('records')
+        
+        if '@' in teams[0]['MATCHUP']:
+            away_team, home_team = teams[0], teams[1]
+        else:
+            home_team, away_team = teams[0], teams[1]
+        
+        matchup = {
+            # Game info
+            'game_id': game_id,
+            'game_date': home_team['GAME_DATE'],
+            'season_id': home_team['SEASON_ID'],
+            
+            # Home team
+            'home_team_id': home_team['TEAM_ID'],
+            'home_team_name': home_team['TEAM_NAME'],
+            'home_team_abbr': home_team['TEAM_ABBREVIATION'],
+            'home_wl': home_team['WL'],
+            'home_pts': home_team['PTS'],
+            'home_fgm': home_team['FGM'],
+            'home_fga': home_team['FGA'],
+            'home_fg_pct': home_team['FG_PCT'],
+            'home_fg3m': home_team['FG3M'],
+            'home_fg3a': home_team['FG3A'],
+            'home_fg3_pct': home_team['FG3_PCT'],
+            'home_ftm': home_team['FTM'],
+            'home_fta': home_team['FTA'],
+            'home_ft_pct': home_team['FT_PCT'],
+            'home_oreb': home_team['OREB'],
+            'home_dreb': home_team['DREB'],
+            'home_reb': home_team['REB'],
+            'home_ast': home_team['AST'],
+            'home_stl': home_team['STL'],
+            'home_blk': home_team['BLK'],
+            'home_tov': home_team['TOV'],
+            'home_pf': home_team['PF'],
+            
+            # Away team
+            'away_team_id': away_team['TEAM_ID'],
+            'away_team_name': away_team['TEAM_NAME'],
+            'away_team_abbr': away_team['TEAM_ABBREVIATION'],
+            'away_wl': away_team['WL'],
+            'away_pts': away_team['PTS'],
+            'away_fgm': away_team['FGM'],
+            'away_fga': away_team['FGA'],
+            'away_fg_pct': away_team['FG_PCT'],
+            'away_fg3m': away_team['FG3M'],
+            'away_fg3a': away_team['FG3A'],
+            'away_fg3_pct': away_team['FG3_PCT'],
+            'away_ftm': away_team['FTM'],
+            'away_fta': away_team['FTA'],
+            'away_ft_pct': away_team['FT_PCT'],
+            'away_oreb': away_team['OREB'],
+            'away_dreb': away_team['DREB'],
+            'away_reb': away_team['REB'],
+            'away_ast': away_team['AST'],
+            'away_stl': away_team['STL'],
+            'away_blk': away_team['BLK'],
+            'away_tov': away_team['TOV'],
+            'away_pf': away_team['PF'],
+            
+            # Derived fields
+            'home_win': 1 if home_team['WL'] == 'W' else 0,
+            'away_win': 1 if away_team['WL'] == 'W' else 0,
+            'point_differential': home_team['PTS'] - away_team['PTS'],
+        }
+        
+        matchups.append(matchup)
+    
+    return pd.DataFrame(matchups)
+
+
+def _best_of(fn, df: pd.DataFrame, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes: list[int], repeats: int = 3) -> None:
+    print(f"{'games':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+
+    for n_games in sizes:
+        df = make_game_log(n_games)
+
+        # Same rows, columns and values as the per-game loop
+        pd.testing.assert_frame_equal(
+            convert_to_matchups(df), legacy_convert_to_matchups(df), check_dtype=False
+        )
+
+        legacy = _best_of(legacy_convert_to_matchups, df, repeats)
+        vectorized = _best_of(convert_to_matchups, df, repeats)
+        print(f"{n_games:>8} {legacy:>12.4f} {vectorized:>15.4f} {legacy / vectorized:>8.1f}x")
+
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark game log to matchup conversion")
+    parser.add_argument('--sizes', type=lambda v: [int(x) for x in v.split(',')], default=[100, 1230, 5000, 10000])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.repeats)
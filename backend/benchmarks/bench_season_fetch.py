@@ -0,0 +1,69 @@
+#### BENCHMARK: SERIAL VS CONCURRENT + CACHED SEASON FETCHES ####
+#
+# Run from backend/:  python -m benchmarks.bench_season_fetch
+# Uses a LocalSource over synthetic CSV season logs, so no network is needed.
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# pipeline modules import from the app folder root
+sys.path.append(str(Path(__file__).parent.parent / "app"))
+
+from background_tasks.season_fetcher import LocalSource, SeasonFetcher
+from benchmarks.synthetic import make_game_log
+
+
+def _write_seasons(directory: Path, first_year: int, n_seasons: int, games_per_season: int) -> list[str]:
+    seasons = []
+    for offset in range(n_seasons):
+        year = first_year + offset
+        season = f"{year}-{str(year + 1)[-2:]}"
+        df = make_game_log(games_per_season, seed=offset, start_date=f"{year}-10-24")
+        df.to_csv(directory / f"{season}__Regular_Season.csv", index=False)
+        seasons.append(season)
+    return seasons
+
+
+def _timed_fetch(fetcher: SeasonFetcher, seasons: list[str]) -> tuple[float, int]:
+    start = time.perf_counter()
+    logs = fetcher.fetch_seasons(seasons)
+    return time.perf_counter() - start, sum(len(df) for df in logs)
+
+
+def run_benchmark(n_seasons: int, games_per_season: int, latency: float, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source_dir = tmp / "source"
+        source_dir.mkdir()
+        seasons = _write_seasons(source_dir, 2010, n_seasons, games_per_season)
+        source = LocalSource(source_dir, latency_seconds=latency)
+
+        serial = SeasonFetcher(source, max_workers=1, use_cache=False) # old behaviour
+
+        concurrent = SeasonFetcher(source, cache_dir=tmp / "cache", max_workers=workers)
+
+        serial_time, rows = _timed_fetch(serial, seasons)
+        cold_time, cold_rows = _timed_fetch(concurrent, seasons)
+        warm_time, warm_rows = _timed_fetch(concurrent, seasons)
+        assert rows == cold_rows == warm_rows
+
+        print(f"{n_seasons} seasons, {rows} rows, {latency:.2f}s simulated latency per request")
+        print(f"  serial, uncached:           {serial_time:.3f}s")
+        print(f"  concurrent ({workers} workers), cold: {cold_time:.3f}s")
+        print(f"  concurrent, cached:         {warm_time:.3f}s")
+
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark catch-up season fetching")
+    parser.add_argument('--seasons', type=int, default=8)
+    parser.add_argument('--games-per-season', type=int, default=1230)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    run_benchmark(args.seasons, args.games_per_season, args.latency, args.workers)
@@ -0,0 +1,198 @@
+#### IN-PROCESS ASGI LOAD GENERATOR FOR THE /apis ROUTES ####
+#
+# Run through the suite from backend/:  python -m benchmarks.suite --load-only
+# Requests go straight into the app's ASGI callable, no server or sockets,
+# so the numbers measure the app itself: routing, validation, the prediction
+# service and serialization.
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import numpy as np
+
+
+class Scenario:
+    '''
+    Class Scenario is one request shape the load generator repeats,
+      e.g. POST /apis/prediction with a fixed body.
+    '''
+    def __init__(self, name: str, method: str, path: str, query: str = '', body: Dict = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = json.dumps(body).encode() if body is not None else b''
+
+
+def default_scenarios(team_ids: List[int]) -> List[Scenario]:
+    '''
+    Returns the read and prediction routes the frontend hits,
+      using the given team ids.
+    '''
+    home_id, away_id = team_ids[0], team_ids[1]
+    n = len(team_ids)
+    # A full season of matchups, the away team offset by 1..n-1 so no team plays itself
+    slate = {
+        'home_team_ids': [team_ids[i % n] for i in range(1230)],
+        'away_team_ids': [team_ids[(i + 1 + (i // n) % (n - 1)) % n] for i in range(1230)],
+    }
+
+    return [
+        Scenario('ratings', 'GET', '/apis/ratings'),
+        Scenario('teamnames', 'GET', '/apis/teamnames'),
+        Scenario('rating', 'GET', f'/apis/rating/{home_id}'),
+        Scenario('prediction', 'POST', '/apis/prediction', body={'home_team_id': home_id, 'away_team_id': away_id}),
+        Scenario('prediction_matrix', 'GET', '/apis/predictions/matrix'),
+        Scenario('predictions_batch', 'POST', '/apis/predictions/batch', body=slate),
+    ]
+
+
+async def _request(app, scenario: Scenario) -> int:
+    '''
+    Returns the response status after sending one request through
+      the ASGI app and draining the whole response body.
+    '''
+    status = 500
+    done = asyncio.Event()
+    body_sent = False
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0', 'spec_version': '2.3'},
+        'http_version': '1.1',
+        'method': scenario.method,
+        'scheme': 'http',
+        'path': scenario.path,
+        'raw_path': scenario.path.encode(),
+        'query_string': scenario.query.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'loadtest'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(scenario.body)).encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('loadtest', 80),
+    }
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': scenario.body, 'more_body': False}
+        # Only disconnect once the response is out, like a client that waits for it
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    '''
+    Runs the app's startup and shutdown handlers around the load
+      test, as a server would.
+    '''
+    messages = asyncio.Queue()
+    sent = asyncio.Queue()
+    await messages.put({'type': 'lifespan.startup'})
+
+    async def receive():
+        return await messages.get()
+
+    async def send(message):
+        await sent.put(message)
+
+    task = asyncio.create_task(app({'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}, receive, send))
+    started = await sent.get()
+    if started['type'] == 'lifespan.startup.failed':
+        raise RuntimeError(f"App startup failed: {started.get('message')}")
+    try:
+        yield
+    finally:
+        await messages.put({'type': 'lifespan.shutdown'})
+        await sent.get()
+        await task
+
+
+def _latency_summary(latencies_ms: np.ndarray, statuses: List[int], seconds: float) -> Dict:
+    errors = sum(1 for status in statuses if status >= 400)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        'requests': len(latencies_ms),
+        'errors': errors,
+        'seconds': seconds,
+        'requests_per_second': len(latencies_ms) / seconds,
+        'mean_ms': float(latencies_ms.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+async def _run_scenario(app, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> Dict:
+    for _ in range(warmup):
+        await _request(app, scenario)
+
+    latencies = np.empty(requests, dtype=np.float64)
+    statuses = []
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request
+        while next_request < requests:
+            i = next_request
+            next_request += 1
+            start = time.perf_counter()
+            statuses.append(await _request(app, scenario))
+            latencies[i] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _latency_summary(latencies, statuses, time.perf_counter() - start)
+
+
+async def _run_load_test(app, scenarios: List[Scenario], requests: int, concurrency: int, warmup: int) -> Dict[str, Dict]:
+    results = {}
+    async with _lifespan(app):
+        for scenario in scenarios:
+            results[scenario.name] = await _run_scenario(app, scenario, requests, concurrency, warmup)
+            summary = results[scenario.name]
+            print(
+                f"{scenario.name:<22} {summary['requests_per_second']:>10.1f} req/s "
+                f"p50 {summary['p50_ms']:>8.2f} p95 {summary['p95_ms']:>8.2f} p99 {summary['p99_ms']:>8.2f} ms "
+                f"{summary['errors']:>4} errors"
+            )
+    return results
+
+
+def run_load_test(requests: int, concurrency: int, warmup: int = 20, only: list[str] = None) -> Dict[str, Dict]:
+    """
+    Returns {scenario name: throughput and latency quantiles} after
+      driving each /apis scenario with `concurrency` concurrent
+      clients until `requests` requests have completed.
+
+    Serves the ratings in app/db read only, with the reload
+      watcher off so it does not compete for the GIL.
+    """
+    os.environ.setdefault('RATINGS_POLL_SECONDS', '0')
+    from app.main import app
+    from app.services.prediction_service import get_prediction_service
+
+    team_ids = sorted(get_prediction_service().get_all_ratings())
+    scenarios = [s for s in default_scenarios(team_ids) if not only or s.name in only]
+    return asyncio.run(_run_load_test(app, scenarios, requests, concurrency, warmup))
@@ -0,0 +1,252 @@
+#### MICRO-BENCHMARKS FOR THE ELO UPDATE AND PREDICTION PATHS ####
+#
+# Run through the suite from backend/:  python -m benchmarks.suite --micro-only
+# Every benchmark works on synthetic games in a temp folder, the repo db is never touched.
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+# ml modules import from the app folder root
+sys.path.append(str(Path(__file__).parent.parent / "app"))
+
+from background_tasks.pipeline import convert_to_matchups
+from ml.elo_replay import EloReplayEngine
+from ml.elo_system import EloSystem, TRACKED_GAME_LIMIT, TRACKED_RATING_LIMIT
+from ml.feature_store import FeatureStore
+from ml.multi_model_update import MultiModelUpdater
+from ml.team_state import TeamState
+from ml.win_model import REST_DAYS_CAP, WinModel
+from ml.win_model_training import build_training_set
+from benchmarks.synthetic import FIRST_TEAM_ID, N_TEAMS, make_game_history, make_game_log
+
+
+DAILY_SLATE = 15 # games on a busy night, what the daily update appends
+
+
+def _best_of(setup: Callable, run: Callable, repeats: int) -> float:
+    '''
+    Returns the fastest of `repeats` timed calls of run(setup()),
+      setup runs outside the timer so every repeat starts fresh.
+    '''
+    best = float('inf')
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _result(seconds: float, ops: int) -> Dict:
+    return {'ops': ops, 'seconds': seconds, 'seconds_per_op': seconds / ops}
+
+
+def _game_rows(games) -> list[tuple]:
+    # python values, the shapes UpdateService hands to update_ratings
+    return list(zip(
+        games['team_id_home'].tolist(),
+        games['team_id_away'].tolist(),
+        games['pts_home'].tolist(),
+        games['pts_away'].tolist(),
+        games['game_date'].tolist(),
+    ))
+
+
+def _temp_elo(directory: Path, **parameters) -> EloSystem:
+    # every store, snapshot and shared ratings path lives next to this one
+    return EloSystem(save_path=directory / "database.json", **parameters)
+
+
+def _rated_elo(games, directory: Path) -> EloSystem:
+    '''
+    Returns an EloSystem in `directory` holding the replayed ratings
+      and full histories of games, with nothing pending to log.
+    '''
+    engine = EloReplayEngine(k_factor=20, base_elo=1300)
+    engine.replay_games(games)
+    elo = engine.apply_to(_temp_elo(directory))
+    elo.team_names = [{f"Team {i:02d}": FIRST_TEAM_ID + i} for i in range(N_TEAMS)]
+    return elo
+
+
+def bench_elo_update(games, repeats: int, directory: Path) -> Dict:
+    rows = _game_rows(games)
+
+    def run(elo: EloSystem):
+        for home_id, away_id, home_pts, away_pts, game_date in rows:
+            elo.update_ratings(home_id, away_id, home_pts, away_pts, game_date=game_date)
+
+    return _result(_best_of(lambda: _temp_elo(directory), run, repeats), len(rows))
+
+
+def bench_multi_model_update(games, repeats: int, directory: Path) -> Dict:
+    '''
+    Four models with different settings rated in one pass, per game,
+      to compare with elo_update's single model.
+    '''
+    rows = _game_rows(games)
+    columns = [list(column) for column in zip(*rows)]
+    parameters = [{}, {'k_factor': 30}, {'home_advantage': 80}, {'mov_scale': 1.0, 'mov_cap': 10.0}]
+
+    def setup() -> MultiModelUpdater:
+        return MultiModelUpdater([_temp_elo(directory, **p) for p in parameters])
+
+    return _result(_best_of(setup, lambda updater: updater.update(*columns), repeats), len(rows))
+
+
+def bench_elo_replay(games, repeats: int, directory: Path) -> Dict:
+    def run(_):
+        EloReplayEngine(k_factor=20, base_elo=1300).replay_games(games)
+
+    return _result(_best_of(lambda: None, run, repeats), len(games))
+
+
+def bench_predict(games, repeats: int, directory: Path) -> Dict:
+    elo = _rated_elo(games, directory)
+    rng = np.random.default_rng(0)
+    home = FIRST_TEAM_ID + rng.integers(0, N_TEAMS, 10_000)
+    away = FIRST_TEAM_ID + (home - FIRST_TEAM_ID + rng.integers(1, N_TEAMS, len(home))) % N_TEAMS
+    pairs = list(zip(home.tolist(), away.tolist()))
+
+    def run(_):
+        for home_id, away_id in pairs:
+            elo.predict(home_id, away_id)
+
+    return _result(_best_of(lambda: None, run, repeats), len(pairs))
+
+
+def bench_history_trim(games, repeats: int, directory: Path) -> Dict:
+    '''
+    Pushes game and rating history into teams whose ring buffers
+      are already full, so every push evicts the oldest entry.
+    '''
+    n_pushes = 100_000
+    rng = np.random.default_rng(0)
+    idxs = rng.integers(0, N_TEAMS, n_pushes).tolist()
+    margins = rng.integers(-30, 31, n_pushes).tolist()
+    ratings = (1300 + rng.normal(0, 100, n_pushes)).tolist()
+
+    def setup() -> TeamState:
+        teams = TeamState(TRACKED_GAME_LIMIT, TRACKED_RATING_LIMIT)
+        for team in range(N_TEAMS):
+            idx = teams.register(FIRST_TEAM_ID + team)
+            for _ in range(TRACKED_RATING_LIMIT):
+                teams.push_game(idx, 1, 1, 0)
+                teams.push_rating(idx, 1300.0, 0)
+        return teams
+
+    def run(teams: TeamState):
+        for stamp, (idx, margin, rating) in enumerate(zip(idxs, margins, ratings)):
+            teams.push_game(idx, margin > 0, margin, stamp)
+            teams.push_rating(idx, rating, stamp)
+        teams.game_history_dict()
+        teams.rating_history_dict()
+
+    return _result(_best_of(setup, run, repeats), n_pushes)
+
+
+def bench_snapshot_save(games, repeats: int, directory: Path) -> Dict:
+    elo = _rated_elo(games, directory)
+    return _result(_best_of(lambda: elo, lambda e: e._save_ratings(compact=True), repeats), 1)
+
+
+def bench_log_append_save(games, repeats: int, directory: Path) -> Dict:
+    '''
+    The daily path: one night's slate appended to the rating log
+      behind an existing snapshot.
+    '''
+    slate = _game_rows(games.tail(DAILY_SLATE))
+
+    def setup() -> EloSystem:
+        for path in directory.iterdir():
+            path.unlink()
+        elo = _rated_elo(games, directory)
+        elo._save_ratings(compact=True)
+        for home_id, away_id, home_pts, away_pts, game_date in slate:
+            elo.update_ratings(home_id, away_id, home_pts, away_pts, game_date=game_date)
+        return elo
+
+    return _result(_best_of(setup, lambda e: e._save_ratings(), repeats), len(slate))
+
+
+def bench_snapshot_load(games, repeats: int, directory: Path) -> Dict:
+    _rated_elo(games, directory)._save_ratings(compact=True)
+    return _result(_best_of(lambda: _temp_elo(directory), lambda e: e._load_ratings(), repeats), 1)
+
+
+def bench_convert_to_matchups(games, repeats: int, directory: Path) -> Dict:
+    game_log = make_game_log(1230)
+    return _result(_best_of(lambda: None, lambda _: convert_to_matchups(game_log), repeats), 1230)
+
+
+def bench_feature_update(games, repeats: int, directory: Path) -> Dict:
+    # a season of full box scores, as the pipeline hands them over
+    matchups = convert_to_matchups(make_game_log(1230))
+    matchups['game_date'] = pd.to_datetime(matchups['game_date'])
+
+    def setup() -> FeatureStore:
+        return FeatureStore(directory / "features.npz")
+
+    return _result(_best_of(setup, lambda store: store.update_matchups(matchups), repeats), len(matchups))
+
+
+def bench_win_model_matrix(games, repeats: int, directory: Path) -> Dict:
+    # a model fitted on the synthetic history, compiled onto every team as serving does
+    training_set = build_training_set(games, _temp_elo(directory).replay_parameters())
+    store = FeatureStore(directory / "features.npz")
+    store.update_matchups(games)
+    team_ids = store.team_ids
+    compiled = WinModel.fit(training_set).compile(
+        team_ids,
+        store.team_features(team_ids),
+        store.rest_days(team_ids, store.last_game_date, REST_DAYS_CAP),
+        np.zeros(len(team_ids))
+    )
+    ratings = 1300 + np.random.default_rng(0).normal(0, 100, len(team_ids))
+    elo_matrix = 1 / (1 + 10 ** ((ratings[np.newaxis, :] - (ratings[:, np.newaxis] + 100)) / 400))
+    matrices = 1000
+
+    def run(_):
+        for _ in range(matrices):
+            compiled.predict_matrix(ratings, 100, elo_matrix)
+
+    return _result(_best_of(lambda: None, run, repeats), matrices)
+
+
+MICRO_BENCHMARKS = {
+    'elo_update': bench_elo_update,
+    'multi_model_update': bench_multi_model_update,
+    'elo_replay': bench_elo_replay,
+    'predict': bench_predict,
+    'history_trim': bench_history_trim,
+    'snapshot_save': bench_snapshot_save,
+    'log_append_save': bench_log_append_save,
+    'snapshot_load': bench_snapshot_load,
+    'convert_to_matchups': bench_convert_to_matchups,
+    'feature_update': bench_feature_update,
+    'win_model_matrix': bench_win_model_matrix,
+}
+
+
+def run_micro_benchmarks(n_seasons: int, repeats: int, only: list[str] = None) -> Dict[str, Dict]:
+    """
+    Returns {benchmark name: ops, best seconds and seconds per op}
+      for every micro-benchmark, or just those named in only.
+    """
+    games = make_game_history(n_seasons)
+    results = {}
+
+    for name, bench in MICRO_BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            results[name] = bench(games, repeats, Path(tmp))
+        print(f"{name:<22} {results[name]['ops']:>8} ops {results[name]['seconds_per_op'] * 1e6:>12.2f} us/op")
+
+    return results
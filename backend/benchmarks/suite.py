@@ -0,0 +1,143 @@
+#### BENCHMARK SUITE: MICRO-BENCHMARKS, LOAD TEST AND BASELINES ####
+#
+# Run from backend/:
+#   python -m benchmarks.suite --save benchmarks/baselines/main.json
+#   python -m benchmarks.suite --compare benchmarks/baselines/main.json --threshold 0.15
+#
+# --compare exits with status 1 when any tracked metric got slower than the
+# baseline by more than the threshold, so it can gate a CI job. Baselines are
+# only comparable on the same machine, save one per machine.
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+# metric: True when higher is better, only these are compared against a baseline
+TRACKED_METRICS = {
+    'seconds_per_op': False,
+    'p50_ms': False,
+    'p95_ms': False,
+    'requests_per_second': True,
+}
+
+
+def _environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.node(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(args) -> Dict:
+    """
+    Returns the machine-readable results of every selected group:
+      environment, settings, and per benchmark/scenario numbers.
+    """
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'environment': _environment(),
+        'settings': {
+            'seasons': args.seasons, 'repeats': args.repeats,
+            'requests': args.requests, 'concurrency': args.concurrency,
+        },
+        'micro': {},
+        'load': {},
+    }
+
+    if not args.load_only:
+        from benchmarks.micro import run_micro_benchmarks
+        print(f"Micro-benchmarks over {args.seasons} synthetic seasons, best of {args.repeats}")
+        results['micro'] = run_micro_benchmarks(args.seasons, args.repeats, args.only)
+
+    if not args.micro_only:
+        from benchmarks.load_test import run_load_test
+        print(f"\nLoad test, {args.requests} requests per route at concurrency {args.concurrency}")
+        results['load'] = run_load_test(args.requests, args.concurrency, only=args.only)
+
+    return results
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[Dict]:
+    """
+    Returns one row per tracked metric present in both runs, with
+      the relative slowdown (positive is worse) and whether it
+      is beyond threshold.
+    """
+    rows = []
+    for group in ('micro', 'load'):
+        for name, current_numbers in current.get(group, {}).items():
+            baseline_numbers = baseline.get(group, {}).get(name)
+            if baseline_numbers is None:
+                continue
+
+            for metric, higher_is_better in TRACKED_METRICS.items():
+                old, new = baseline_numbers.get(metric), current_numbers.get(metric)
+                if not old or not new:
+                    continue
+                slowdown = old / new - 1 if higher_is_better else new / old - 1
+                rows.append({
+                    'benchmark': f"{group}.{name}", 'metric': metric,
+                    'baseline': old, 'current': new,
+                    'slowdown': slowdown, 'regressed': slowdown > threshold,
+                })
+    return rows
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> None:
+    print(f"\n{'benchmark':<30} {'metric':<20} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        flag = '  SLOWER' if row['regressed'] else ''
+        print(
+            f"{row['benchmark']:<30} {row['metric']:<20} {row['baseline']:>12.6g} "
+            f"{row['current']:>12.6g} {row['slowdown']:>+8.1%}{flag}"
+        )
+
+    regressed = [row for row in rows if row['regressed']]
+    print(f"\n{len(regressed)} of {len(rows)} metrics slower than the baseline by more than {threshold:.0%}")
+    return None
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"Saved results to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the micro-benchmarks and API load test")
+    parser.add_argument('--seasons', type=int, default=10, help="synthetic seasons of 1230 games for the micro-benchmarks")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=500, help="requests per load test route")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', type=lambda v: v.split(','), default=None, help="comma separated benchmark/scenario names")
+    parser.add_argument('--micro-only', action='store_true')
+    parser.add_argument('--load-only', action='store_true')
+    parser.add_argument('--save', type=Path, default=None, help="write the results as a baseline json")
+    parser.add_argument('--compare', type=Path, default=None, help="baseline json to compare the results against")
+    parser.add_argument('--threshold', type=float, default=0.15, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    if args.save:
+        _write_json(args.save, results)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row['regressed'] for row in rows):
+            sys.exit(1)
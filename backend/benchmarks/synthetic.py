@@ -0,0 +1,133 @@
+#### SYNTHETIC NBA-SHAPED DATA FOR BENCHMARKS ####
+
+import numpy as np
+import pandas as pd
+
+
+FIRST_TEAM_ID = 1610612737
+N_TEAMS = 30
+
+
+def make_game_log(n_games: int, seed: int = 0, start_date: str = '2023-10-24') -> pd.DataFrame:
+    '''
+    Returns a LeagueGameLog-shaped team game log (two rows per game,
+      same columns as the nba api) with random but plausible stats.
+    '''
+    rng = np.random.default_rng(seed)
+
+    home = rng.integers(0, N_TEAMS, n_games)
+    away = (home + rng.integers(1, N_TEAMS, n_games)) % N_TEAMS
+    day_offsets = np.sort(rng.integers(0, max(n_games // 7, 1), n_games))
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(day_offsets, unit='D')
+    home_pts = rng.integers(85, 135, n_games)
+    away_pts = rng.integers(85, 135, n_games)
+    away_pts = np.where(away_pts == home_pts, away_pts + 1, away_pts) # no ties in the nba
+
+    abbrs = np.array([f"T{i:02d}" for i in range(N_TEAMS)])
+    names = np.array([f"Team {i:02d}" for i in range(N_TEAMS)])
+    season_year = pd.Timestamp(start_date).year
+    game_ids = np.array([f"002{season_year % 100:02d}{i:05d}" for i in range(n_games)])
+
+    # Each game shows up as two rows, in random home/away order like the api
+    home_first = rng.random(n_games) < 0.5
+    team = np.empty(2 * n_games, dtype=np.int64)
+    opp = np.empty(2 * n_games, dtype=np.int64)
+    is_home = np.empty(2 * n_games, dtype=bool)
+    team[0::2] = np.where(home_first, home, away)
+    team[1::2] = np.where(home_first, away, home)
+    opp[0::2] = np.where(home_first, away, home)
+    opp[1::2] = np.where(home_first, home, away)
+    is_home[0::2] = home_first
+    is_home[1::2] = ~home_first
+
+    pts = np.empty(2 * n_games, dtype=np.int64)
+    opp_pts = np.empty(2 * n_games, dtype=np.int64)
+    pts[0::2] = np.where(home_first, home_pts, away_pts)
+    pts[1::2] = np.where(home_first, away_pts, home_pts)
+    opp_pts[0::2] = np.where(home_first, away_pts, home_pts)
+    opp_pts[1::2] = np.where(home_first, home_pts, away_pts)
+
+    n_rows = 2 * n_games
+    fga = rng.integers(75, 100, n_rows)
+    fgm = (fga * rng.uniform(0.4, 0.55, n_rows)).astype(np.int64)
+    fg3a = rng.integers(25, 45, n_rows)
+    fg3m = (fg3a * rng.uniform(0.3, 0.42, n_rows)).astype(np.int64)
+    fta = rng.integers(12, 30, n_rows)
+    ftm = (fta * rng.uniform(0.7, 0.85, n_rows)).astype(np.int64)
+    oreb = rng.integers(6, 15, n_rows)
+    dreb = rng.integers(28, 40, n_rows)
+
+    matchup = np.where(
+        is_home,
+        np.char.add(np.char.add(abbrs[team], ' vs. '), abbrs[opp]),
+        np.char.add(np.char.add(abbrs[team], ' @ '), abbrs[opp]),
+    )
+
+    return pd.DataFrame({
+        'SEASON_ID': f"2{season_year}",
+        'TEAM_ID': FIRST_TEAM_ID + team,
+        'TEAM_ABBREVIATION': abbrs[team],
+        'TEAM_NAME': names[team],
+        'GAME_ID': np.repeat(game_ids, 2),
+        'GAME_DATE': np.repeat(dates.strftime('%Y-%m-%d').to_numpy(), 2),
+        'MATCHUP': matchup,
+        'WL': np.where(pts > opp_pts, 'W', 'L'),
+        'MIN': 240,
+        'FGM': fgm,
+        'FGA': fga,
+        'FG_PCT': np.round(fgm / fga, 3),
+        'FG3M': fg3m,
+        'FG3A': fg3a,
+        'FG3_PCT': np.round(fg3m / fg3a, 3),
+        'FTM': ftm,
+        'FTA': fta,
+        'FT_PCT': np.round(ftm / fta, 3),
+        'OREB': oreb,
+        'DREB': dreb,
+        'REB': oreb + dreb,
+        'AST': rng.integers(18, 32, n_rows),
+        'STL': rng.integers(4, 12, n_rows),
+        'BLK': rng.integers(2, 9, n_rows),
+        'TOV': rng.integers(8, 19, n_rows),
+        'PF': rng.integers(14, 25, n_rows),
+        'PTS': pts,
+        'PLUS_MINUS': pts - opp_pts,
+        'VIDEO_AVAILABLE': 1,
+    })
+
+
+def make_game_history(
+    n_seasons: int,
+    games_per_season: int = 1230,
+    seed: int = 0,
+    first_year: int = 1980
+) -> pd.DataFrame:
+    '''
+    Returns a game.csv-shaped history (one row per game, the columns
+      NBADataProcessor.get_modern_games keeps) of n_seasons regular
+      seasons, each spread over late October to mid April.
+    '''
+    rng = np.random.default_rng(seed)
+    n_games = n_seasons * games_per_season
+
+    home = rng.integers(0, N_TEAMS, n_games)
+    away = (home + rng.integers(1, N_TEAMS, n_games)) % N_TEAMS
+    home_pts = rng.integers(85, 135, n_games)
+    away_pts = rng.integers(85, 135, n_games)
+    away_pts = np.where(away_pts == home_pts, away_pts + 1, away_pts) # no ties in the nba
+
+    season_years = first_year + np.repeat(np.arange(n_seasons), games_per_season)
+    season_starts = pd.to_datetime([f"{year}-10-24" for year in range(first_year, first_year + n_seasons)])
+    day_offsets = np.sort(rng.integers(0, 170, (n_seasons, games_per_season)), axis=1).ravel()
+    dates = season_starts.repeat(games_per_season) + pd.to_timedelta(day_offsets, unit='D')
+
+    return pd.DataFrame({
+        'season_id': 20000 + season_years,
+        'team_id_home': FIRST_TEAM_ID + home,
+        'team_id_away': FIRST_TEAM_ID + away,
+        'pts_home': home_pts,
+        'pts_away': away_pts,
+        'wl_home': np.where(home_pts > away_pts, 'W', 'L'),
+        'wl_away': np.where(home_pts > away_pts, 'L', 'W'),
+        'game_date': dates,
+    })